@@ -0,0 +1,76 @@
+"""Event loop latency while scanning synthetic tree of installed games folders.
+
+Builds root folder with N unrelated subfolders plus few game folders and measures
+the longest event loop stall (as seen by a 1 ms ticker) during `_scan_folders`.
+Baseline is the previous approach: two blocking `os.walk` listings made on the loop.
+
+Usage: python benchmarks/bench_appfinder.py [--folders N]
+"""
+import os
+import sys
+import time
+import asyncio
+import pathlib
+import argparse
+import tempfile
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from local import AppFinder  # noqa: E402
+
+
+GAMES = ['Shank 2', 'Trine 2 Complete Story', 'Haven Moon', 'Samorost 2']
+OWNED = {'Shank 2', 'Trine 2: Complete Story', 'Haven Moon - DRM free', 'Samorost 2', 'Dummy', 'Halcyon 6'}
+
+
+def build_tree(root: pathlib.Path, folders: int):
+    for i in range(folders):
+        (root / f'unrelated folder {i}').mkdir()
+    for name in GAMES:
+        (root / name).mkdir()
+        exe = root / name / f'{name}.exe'
+        exe.touch()
+        exe.chmod(0o755)
+
+
+async def max_stall(coro):
+    stalls = []
+
+    async def ticker():
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stalls.append(time.perf_counter() - start - 0.001)
+
+    tick = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await coro
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0.01)  # let the ticker record the last stall
+    tick.cancel()
+    return elapsed, max(stalls)
+
+
+async def blocking_listing(root):
+    for _ in range(2):  # exact and close matching passes
+        next(os.walk(root))
+
+
+async def main(folders: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        root = pathlib.Path(tmp)
+        build_tree(root, folders)
+        print(f'folders: {folders + len(GAMES)}')
+        elapsed, stall = await max_stall(blocking_listing(root))
+        print(f'blocking listing only: total {elapsed * 1000:.1f} ms; max loop stall {stall * 1000:.1f} ms')
+        elapsed, stall = await max_stall(AppFinder()._scan_folders([root], set(OWNED)))
+        print(f'_scan_folders (with matching): total {elapsed * 1000:.1f} ms; max loop stall {stall * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--folders', type=int, default=10000)
+    args = parser.parse_args()
+    asyncio.get_event_loop().run_until_complete(main(args.folders))
@@ -0,0 +1,85 @@
+"""Size and encode / decode time of persistent cache entries built from tests/data fixtures.
+
+Compares JsonCodec with CompactCodec for the entries written by the plugin: sharded library orders
+(projected as in LibraryResolver) and trove games. "handshake" is parsing Galaxy message carrying
+the whole cache (done before `handshake_complete`) followed by decoding entries read in `handshake_complete`;
+library and trove entries are decoded lazily, when games are requested, so they are measured separately
+as "deferred".
+
+Usage: python benchmarks/bench_cache_codec.py [--repeat N]
+"""
+import sys
+import json
+import timeit
+import pathlib
+import argparse
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from library import LibraryResolver  # noqa: E402
+from model.game import TroveGame  # noqa: E402
+from persistence import JsonCodec, CompactCodec  # noqa: E402
+
+
+def load(name):
+    with open(ROOT / 'tests' / 'data' / name) as f:
+        return json.load(f)
+
+
+def build_entries():
+    entries = {
+        'library_order_' + order['gamekey']: LibraryResolver._project_order(order)
+        for order in load('orders.json')
+    }
+    entries['trove_games'] = [
+        TroveGame(trove).serialize() for i in range(1, 5) for trove in load(f'troves_{i}.json')
+    ]
+    entries['last_version'] = '0.9.0'
+    return entries
+
+
+def is_deferred(key):
+    """Entries decoded on first use instead of in handshake_complete"""
+    return key.startswith('library_') or key == 'trove_games'
+
+
+def best_of(fn, repeat):
+    return min(timeit.repeat(fn, number=repeat, repeat=5)) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    entries = build_entries()
+    print(f'entries: {len(entries)}')
+    print(
+        f'{"codec":<14}{"size KB":>10}{"message KB":>12}{"encode ms":>12}{"decode ms":>12}'
+        f'{"handshake ms":>14}{"deferred ms":>13}'
+    )
+    for codec in [JsonCodec(), CompactCodec()]:
+        encoded = {k: codec.encode(v) for k, v in entries.items()}
+        assert {k: codec.decode(v) for k, v in encoded.items()} == entries
+        message = json.dumps({'jsonrpc': '2.0', 'method': 'initialize_cache', 'params': {'data': encoded}})
+
+        def handshake():
+            data = json.loads(message)['params']['data']
+            return {k: codec.decode(v) for k, v in data.items() if not is_deferred(k)}
+
+        def deferred():
+            return {k: codec.decode(v) for k, v in encoded.items() if is_deferred(k)}
+
+        size = sum(map(len, encoded.values()))
+        encode = best_of(lambda: [codec.encode(v) for v in entries.values()], args.repeat)
+        decode = best_of(lambda: [codec.decode(v) for v in encoded.values()], args.repeat)
+        print(
+            f'{type(codec).__name__:<14}{size / 1024:>10.1f}{len(message) / 1024:>12.1f}{encode * 1000:>12.2f}'
+            f'{decode * 1000:>12.2f}{best_of(handshake, args.repeat) * 1000:>14.2f}'
+            f'{best_of(deferred, args.repeat) * 1000:>13.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Plugin process cold start: time from spawning the process to responses of Galaxy handshake.
+
+Acts as Galaxy client: listens on a local port, spawns `src/plugin.py` the way Galaxy does, then sends
+`get_capabilities` and `initialize_cache` and measures when their responses arrive. Error reporting is disabled
+in the spawned plugin. With --importtime also lists the slowest imports of `plugin` module.
+
+Usage: python benchmarks/bench_cold_start.py [--runs N] [--cache FILE] [--importtime]
+"""
+import sys
+import json
+import time
+import asyncio
+import pathlib
+import argparse
+import statistics
+import subprocess
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+SRC = ROOT / 'src'
+
+# runs plugin.py main as Galaxy would, only with error reporting disabled
+PLUGIN_RUNNER = f'''
+import sys
+sys.path.insert(0, {str(SRC)!r})
+import plugin
+plugin.SENTRY_DSN = None
+plugin.main()
+'''
+
+STAGES = ['connected', 'capabilities', 'handshake']
+
+
+async def cold_start(cache: dict) -> dict:
+    connected = asyncio.get_running_loop().create_future()
+
+    def on_connection(reader, writer):
+        connected.set_result((time.perf_counter(), reader, writer))
+
+    server = await asyncio.start_server(on_connection, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    start = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, '-c', PLUGIN_RUNNER, 'handshake_token', str(port),
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+    )
+    try:
+        connected_at, reader, writer = await asyncio.wait_for(connected, 60)
+
+        async def call(request_id: str, method: str, params: dict) -> float:
+            message = {'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params}
+            writer.write((json.dumps(message) + '\n').encode())
+            while True:
+                response = json.loads(await asyncio.wait_for(reader.readline(), 60))
+                if response.get('id') == request_id:
+                    if 'error' in response:
+                        raise RuntimeError(f'{method} failed: {response["error"]}')
+                    return time.perf_counter()
+
+        result = {'connected': connected_at - start}
+        result['capabilities'] = await call('1', 'get_capabilities', {}) - start
+        result['handshake'] = await call('2', 'initialize_cache', {'data': cache}) - start
+        await call('3', 'shutdown', {})
+        writer.close()
+    finally:
+        if process.returncode is None:
+            try:
+                await asyncio.wait_for(process.wait(), 10)
+            except asyncio.TimeoutError:
+                process.kill()
+        server.close()
+        await server.wait_closed()
+    return result
+
+
+def slowest_imports(limit: int = 15):
+    """Cumulative time of the slowest modules imported by `plugin` (`python -X importtime`)"""
+    code = f'import sys; sys.path.insert(0, {str(SRC)!r}); import plugin'
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative), name.rstrip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--cache', type=pathlib.Path, help='JSON file with persistent cache sent on handshake')
+    parser.add_argument('--importtime', action='store_true')
+    args = parser.parse_args()
+
+    cache = json.loads(args.cache.read_text()) if args.cache else {}
+    results = [asyncio.run(cold_start(cache)) for _ in range(args.runs)]
+
+    print(f'{args.runs} runs, ms from process spawn')
+    print(f'{"":<14}{"median":>10}{"min":>10}{"max":>10}')
+    for stage in STAGES:
+        values = [r[stage] * 1000 for r in results]
+        print(f'{stage:<14}{statistics.median(values):>10.1f}{min(values):>10.1f}{max(values):>10.1f}')
+
+    if args.importtime:
+        print('\nslowest imports of plugin module, cumulative ms')
+        for cumulative, name in slowest_imports():
+            print(f'{cumulative / 1000:>10.1f}  {name}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Galaxy import (authentication, owned games, subscriptions and their games) against local stand-in server.
+
+Runs the real plugin with AuthorizedHumbleAPI talking over HTTP to tests/standin.py serving tests/data fixtures.
+"cold" is the first start with empty caches, "warm" the next start reusing persistent and HTTP caches.
+Reports wall time per stage, requests per endpoint and peak memory allocated by Python (tracemalloc).
+
+Usage: python benchmarks/bench_end_to_end.py [--latency S] [--error-rate R] [--fetch-rate N]
+"""
+import sys
+import time
+import asyncio
+import pathlib
+import argparse
+import tempfile
+import tracemalloc
+from collections import Counter
+from unittest.mock import Mock
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+sys.path.insert(0, str(ROOT / 'tests'))
+
+import standin  # noqa: E402
+from library import LibraryResolver  # noqa: E402
+import plugin as plugin_module  # noqa: E402
+from plugin import HumbleBundlePlugin, __version__  # noqa: E402
+from settings import Settings  # noqa: E402
+from webservice import AuthorizedHumbleAPI  # noqa: E402
+
+
+async def timed_import(plugin):
+    stages = {}
+    start = time.perf_counter()
+
+    async def stage(name, coro):
+        began = time.perf_counter()
+        result = await coro
+        stages[name] = time.perf_counter() - began
+        return result
+
+    await stage('authenticate', plugin.authenticate(standin.auth_cookie()))
+    await stage('owned games', plugin.get_owned_games())
+    subscriptions = await stage('subscriptions', plugin.get_subscriptions())
+    names = [sub.subscription_name for sub in subscriptions if sub.owned]
+
+    async def subscription_games():
+        context = await plugin.prepare_subscription_games_context(names)
+        for name in names:
+            async for _ in plugin.get_subscription_games(name, context):
+                pass
+        plugin.subscription_games_import_complete()
+
+    await stage('subscription games', subscription_games())
+    stages['total'] = time.perf_counter() - start
+    return stages
+
+
+def create_plugin(persistent_cache):
+    plugin = HumbleBundlePlugin(Mock(), Mock(), 'handshake_token')
+    plugin.push_cache = Mock(spec=())
+    plugin._installed_check.cancel()
+    plugin._statuses_check.cancel()
+    plugin._persistent_cache = persistent_cache
+    plugin.handshake_complete()
+    return plugin
+
+
+async def run(args):
+    results = []
+    server = standin.HumbleStandIn(
+        standin.Account.from_fixtures(), latency=args.latency, error_rate=args.error_rate, etags=True
+    )
+    async with server:
+        AuthorizedHumbleAPI._AUTHORITY = server.url
+        persistent_cache = {'last_version': f'"{__version__}"'}
+        for name in ['cold', 'warm']:
+            before = Counter(server.requests)
+            plugin = create_plugin(persistent_cache)
+            tracemalloc.start()
+            stages = await timed_import(plugin)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            plugin._cache_store.flush()
+            persistent_cache = plugin.persistent_cache
+            await plugin.shutdown()
+            results.append((name, stages, Counter(server.requests) - before, peak))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every response')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--fetch-rate', type=float, default=LibraryResolver.FETCH_RATE,
+                        help='orders fetched per second by the plugin')
+    args = parser.parse_args()
+
+    plugin_module.SENTRY_DSN = None  # no reports from benchmark runs
+    tmp = pathlib.Path(tempfile.mkdtemp())
+    Settings.LOCAL_CONFIG_FILE = tmp / 'config.cfg'
+    AuthorizedHumbleAPI.HTTP_CACHE_DIR = tmp / 'http-cache'
+    LibraryResolver.FETCH_RATE = args.fetch_rate
+
+    results = asyncio.run(run(args))
+    stage_names = list(results[0][1])
+    print(f'latency {args.latency}s, error rate {args.error_rate}, fetch rate {args.fetch_rate}/s')
+    print(f'{"run":<6}' + ''.join(f'{s:>20}' for s in stage_names) + f'{"requests":>10}{"peak MB":>10}')
+    for name, stages, requests, peak in results:
+        print(
+            f'{name:<6}' + ''.join(f'{stages[s]:>19.2f}s' for s in stage_names)
+            + f'{sum(requests.values()):>10}{peak / 1024 / 1024:>10.1f}'
+        )
+    for name, _, requests, _ in results:
+        print(f'\n{name} requests by endpoint:')
+        for endpoint, count in requests.most_common():
+            print(f'  {count:>5}  {endpoint}')
+
+
+if __name__ == '__main__':
+    main()
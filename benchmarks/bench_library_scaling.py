@@ -0,0 +1,164 @@
+"""Time and memory of library pipeline stages against account size, on synthetic accounts (tests/synthetic.py).
+
+Stages:
+  refresh cold   LibraryResolver._refresh_orders with empty cache: fetching (API without latency), projection,
+                 content hashing and metadata of every order
+  refresh warm   the same with fresh cache; only orders that may still change are fetched again
+  subproducts    LibraryResolver._get_subproducts over cached orders
+  keys           LibraryResolver._get_keys over cached orders, revealed keys included
+  resolve        LibraryResolver(only_cache=True): both sources and title deduplication
+  encode         CompactCodec encoding of every cached order, as done for persistent cache shards
+Memory is peak of Python allocations during the stage (tracemalloc), measured in a separate run.
+
+Usage: python benchmarks/bench_library_scaling.py [--sizes 100 1000 10000 50000] [--repeat N] [--seed S]
+                                                  [--csv FILE] [--plot FILE]
+"""
+import sys
+import time
+import asyncio
+import pathlib
+import argparse
+import importlib.util
+import tracemalloc
+from unittest.mock import Mock
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+sys.path.insert(0, str(ROOT / 'tests'))
+
+from library import LibraryResolver  # noqa: E402
+from persistence import CompactCodec  # noqa: E402
+from settings import LibrarySettings  # noqa: E402
+from utils.fetcher import FetchScheduler  # noqa: E402
+import synthetic  # noqa: E402
+
+
+STAGES = ['refresh cold', 'refresh warm', 'subproducts', 'keys', 'resolve', 'encode']
+
+
+class Api:
+    def __init__(self, orders):
+        self._orders = {order['gamekey']: order for order in orders}
+
+    async def get_gamekeys(self):
+        return list(self._orders)
+
+    async def get_order_details(self, gamekey):
+        return self._orders[gamekey]
+
+
+def create_resolver(api, cache):
+    fetcher = FetchScheduler(concurrency=LibraryResolver.FETCH_CONCURRENCY, rate=1e9)
+    settings = LibrarySettings(show_revealed_keys=True)
+    return LibraryResolver(api, settings, Mock(), cache, fetcher=fetcher)
+
+
+def stages(orders):
+    """Yields (stage name, function) in order; later stages use cache built by earlier ones"""
+    api = Api(orders)
+    state = {}
+
+    def refresh_cold():
+        state['cache'] = {'orders_projection': LibraryResolver.ORDER_PROJECTION_VERSION}
+        asyncio.run(create_resolver(api, state['cache'])._refresh_orders())
+
+    def refresh_warm():
+        asyncio.run(create_resolver(api, state['cache'])._refresh_orders())
+
+    def cached_orders():
+        return list(state['cache']['orders'].values())
+
+    codec = CompactCodec()
+    yield 'refresh cold', refresh_cold
+    yield 'refresh warm', refresh_warm
+    yield 'subproducts', lambda: LibraryResolver._get_subproducts(cached_orders())
+    yield 'keys', lambda: LibraryResolver._get_keys(cached_orders(), show_revealed_keys=True)
+    yield 'resolve', lambda: asyncio.run(create_resolver(api, state['cache'])(only_cache=True))
+    yield 'encode', lambda: [codec.encode(order) for order in cached_orders()]
+
+
+def measure_time(orders, repeat):
+    result = {}
+    for name, fn in stages(orders):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        result[name] = min(timings)
+    return result
+
+
+def measure_memory(orders):
+    result = {}
+    tracemalloc.start()
+    for name, fn in stages(orders):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        result[name] = peak - base
+    tracemalloc.stop()
+    return result
+
+
+def plot(path, sizes, times, memory):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, (time_ax, memory_ax) = plt.subplots(1, 2, figsize=(12, 5))
+    for stage in STAGES:
+        time_ax.plot(sizes, [times[size][stage] * 1000 for size in sizes], marker='o', label=stage)
+        memory_ax.plot(sizes, [memory[size][stage] / 1024 / 1024 for size in sizes], marker='o', label=stage)
+    for ax, label in [(time_ax, 'time [ms]'), (memory_ax, 'peak memory [MB]')]:
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.set_xlabel('orders')
+        ax.set_ylabel(label)
+        ax.grid(True, which='both', alpha=0.3)
+    time_ax.legend()
+    fig.tight_layout()
+    fig.savefig(path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--csv', help='write results to this file')
+    parser.add_argument('--plot', help='draw time and memory charts to this image; requires matplotlib')
+    args = parser.parse_args()
+    if args.plot and importlib.util.find_spec('matplotlib') is None:
+        parser.error('--plot requires matplotlib')
+
+    times, memory, games = {}, {}, {}
+    header = f'{"orders":>8}{"games":>8}' + ''.join(f'{stage:>15}' for stage in STAGES)
+    print('time [ms] / peak memory [MB] per stage')
+    print(header)
+    for size in args.sizes:
+        orders = synthetic.generate_orders(size, args.seed)
+        times[size] = measure_time(orders, args.repeat)
+        memory[size] = measure_memory(orders)
+        cache = {'orders_projection': LibraryResolver.ORDER_PROJECTION_VERSION}
+        asyncio.run(create_resolver(Api(orders), cache)._refresh_orders())
+        games[size] = len(asyncio.run(create_resolver(None, cache)(only_cache=True)))
+        del orders, cache
+        print(
+            f'{size:>8}{games[size]:>8}'
+            + ''.join(f'{times[size][s] * 1000:>9.1f}/{memory[size][s] / 1024 / 1024:<5.1f}' for s in STAGES)
+        )
+
+    if args.csv:
+        with open(args.csv, 'w') as f:
+            f.write('orders,games,stage,seconds,peak_bytes\n')
+            for size in args.sizes:
+                for stage in STAGES:
+                    f.write(f'{size},{games[size]},{stage},{times[size][stage]:.6f},{memory[size][stage]}\n')
+    if args.plot:
+        plot(args.plot, args.sizes, times, memory)
+
+
+if __name__ == '__main__':
+    main()
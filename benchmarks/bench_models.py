@@ -0,0 +1,65 @@
+"""Per-poll cost of game model objects built from tests/data fixtures.
+
+Simulates work done on every `_check_installed` poll (`os_compatibile` for each game)
+and on `get_os_compatibility` / `install_game` (accessing `downloads`).
+
+Usage: python benchmarks/bench_models.py [--repeat N]
+"""
+import sys
+import json
+import timeit
+import pathlib
+import argparse
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from model.game import Subproduct, TroveGame  # noqa: E402
+from model.types import HP  # noqa: E402
+
+
+def load(name):
+    with open(ROOT / 'tests' / 'data' / name) as f:
+        return json.load(f)
+
+
+def build_games():
+    games = []
+    for order in load('orders.json'):
+        games.extend(Subproduct(sub) for sub in order['subproducts'])
+    for i in range(1, 5):
+        games.extend(TroveGame(trove) for trove in load(f'troves_{i}.json'))
+    return games
+
+
+def check_installed_poll(games):
+    return {g.human_name: g.machine_name for g in games if g.os_compatibile(HP.WINDOWS)}
+
+
+def os_compatibility_poll(games):
+    return [[hp for hp in g.downloads] for g in games]
+
+
+def install_lookup(games):
+    for g in games:
+        try:
+            g.downloads[HP.WINDOWS]
+        except KeyError:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    build_time = min(timeit.repeat(build_games, number=1, repeat=5))
+    games = build_games()
+    print(f'games: {len(games)}; parsing fixtures into models: {build_time * 1000:.2f} ms')
+    for fn in [check_installed_poll, os_compatibility_poll, install_lookup]:
+        best = min(timeit.repeat(lambda: fn(games), number=args.repeat, repeat=5)) / args.repeat
+        print(f'{fn.__name__:<24} {best * 1e6:10.1f} us per poll')
+
+
+if __name__ == '__main__':
+    main()
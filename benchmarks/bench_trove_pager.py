@@ -0,0 +1,80 @@
+"""Trove import time against local stand-in server with injected latency.
+
+Serves `api/v1/trove/chunk?index=N` from tests/data/troves_*.json (and empty list after them)
+with fixed latency per request and compares sequential paging with prefetching windows.
+
+Usage: python benchmarks/bench_trove_pager.py [--latency SECONDS] [--chunks N]
+"""
+import sys
+import json
+import time
+import asyncio
+import pathlib
+import argparse
+import tempfile
+
+from aiohttp import web
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from httpcache import HttpCache  # noqa: E402
+from webservice import AuthorizedHumbleAPI  # noqa: E402
+
+
+def load_chunks(count):
+    fixtures = []
+    for i in range(1, 5):
+        with open(ROOT / 'tests' / 'data' / f'troves_{i}.json') as f:
+            fixtures.append(json.load(f))
+    return [fixtures[i % len(fixtures)] for i in range(count)]
+
+
+async def start_server(chunks, latency):
+    async def chunk(request):
+        await asyncio.sleep(latency)
+        index = int(request.query['index'])
+        return web.json_response(chunks[index] if index < len(chunks) else [])
+
+    app = web.Application()
+    app.router.add_get('/api/v1/trove/chunk', chunk)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://127.0.0.1:{port}/'
+
+
+async def import_troves(authority, window):
+    with tempfile.TemporaryDirectory() as tmp:  # not the user cache directory
+        api = AuthorizedHumbleAPI(http_cache=HttpCache(pathlib.Path(tmp)))
+        api._AUTHORITY = authority
+        api.TROVE_CHUNKS_WINDOW = window
+        start = time.perf_counter()
+        count = 0
+        async for chunk in api.get_trove_details():
+            count += len(chunk)
+        elapsed = time.perf_counter() - start
+        await api.close_session()
+    return count, elapsed
+
+
+async def main(latency, chunks_count):
+    chunks = load_chunks(chunks_count)
+    runner, authority = await start_server(chunks, latency)
+    try:
+        print(f'chunks: {chunks_count}; latency: {latency * 1000:.0f} ms')
+        for window in [1, 2, 4, 8]:
+            count, elapsed = await import_troves(authority, window)
+            print(f'  window {window}: {count} troves in {elapsed:.2f}s')
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency', type=float, default=0.15)
+    parser.add_argument('--chunks', type=int, default=20)
+    args = parser.parse_args()
+    asyncio.get_event_loop().run_until_complete(main(args.latency, args.chunks))
@@ -0,0 +1,88 @@
+"""Time and peak memory of extracting webpack JSON from subscription pages.
+
+Pages are synthesized from tests/data fixtures to sizes of real pages:
+~155K for `get_choice_marketing_data`, ~220K for `get_choice_content_data`
+and ~180K for `get_montly_trove_data`. Pages are fed in 16K chunks, like read from the response.
+
+Usage: python benchmarks/bench_webpack.py [--repeat N]
+"""
+import sys
+import json
+import timeit
+import pathlib
+import argparse
+import tracemalloc
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from utils.webpack import WebpackJsonExtractor  # noqa: E402
+
+CHUNK = 16 * 1024
+
+
+def load(name):
+    with open(ROOT / 'tests' / 'data' / name) as f:
+        return json.load(f)
+
+
+def page(webpack_id: str, data, size: int) -> bytes:
+    """HTML with markup around the script; JSON placed in the middle like on real pages"""
+    script = f'<script id="{webpack_id}" type="application/json">\n  {json.dumps(data)}\n</script>'
+    filler = max(0, size - len(script)) // 2
+    markup = '<div class="entry"><a href="/x">link</a></div>\n'
+    padding = markup * (filler // len(markup) + 1)
+    return f'<html><body>{padding[:filler]}{script}{padding[:filler]}</body></html>'.encode()
+
+
+def pages():
+    troves = load('troves_1.json')
+    return {
+        'get_choice_marketing_data': page('webpack-choice-marketing-data', {'userOptions': {'email': 'a@b.c'}}, 155_000),
+        'get_choice_content_data': page('webpack-monthly-product-data', {'contentChoiceOptions': troves[:10]}, 220_000),
+        'get_montly_trove_data': page('webpack-monthly-trove-data', {'newlyAdded': troves[:5], 'standardProducts': troves}, 180_000),
+    }
+
+
+def old_extract(body: bytes, webpack_id: str):
+    chunks = [body[i:i + CHUNK] for i in range(0, len(body), CHUNK)]
+    txt = b''.join(chunks).decode()
+    search = f'<script id="{webpack_id}" type="application/json">'
+    json_start = txt.find(search) + len(search)
+    candidate = txt[json_start:].strip()
+    parsed, _ = json.JSONDecoder().raw_decode(candidate)
+    return parsed
+
+
+def new_extract(body: bytes, webpack_id: str):
+    extractor = WebpackJsonExtractor(webpack_id)
+    for i in range(0, len(body), CHUNK):
+        if extractor.feed(body[i:i + CHUNK]):
+            break
+    return extractor.result()
+
+
+def peak_memory(fn, *args) -> int:
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+    for name, body in pages().items():
+        webpack_id = body.split(b'<script id="')[1].split(b'"')[0].decode()
+        assert old_extract(body, webpack_id) == new_extract(body, webpack_id)
+        print(f'{name}: page {len(body) / 1024:.0f} KB')
+        for fn in [old_extract, new_extract]:
+            best = min(timeit.repeat(lambda: fn(body, webpack_id), number=args.repeat, repeat=5)) / args.repeat
+            peak = peak_memory(fn, body, webpack_id)
+            print(f'  {fn.__name__}: {best * 1e6:.0f} µs; peak memory {peak / 1024:.0f} KB')
+
+
+if __name__ == '__main__':
+    main()
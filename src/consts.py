@@ -12,10 +12,19 @@ class SOURCE(enum.Enum):
     KEYS = 'keys'
 
 
+class OPTIONS_MODE(enum.Enum):
+    """Variants of options window (gui.options); kept here so the plugin process does not import GUI toolkit"""
+    NORMAL = 'normal'
+    WELCOME = 'welcome'
+    NEWS = 'news'
+
+
 class BITNESS(enum.Enum):
     B64 = 64
     B32 = 32
 
+ORDERS_FETCH_CONCURRENCY = 10  # concurrent order details requests; also connections per host of the API
+
 NON_GAME_BUNDLE_TYPES = {'mobilebundle', 'softwarebundle', 'bookbundle', 'audiobookbundle', 'comicsbundle', 'rpgbookbundle', 'mangabundle'}
 
 IS_WINDOWS = sys.platform == 'win32'
@@ -1,6 +1,5 @@
 import logging
 import pathlib
-import enum
 from typing import Optional
 
 import toga
@@ -10,18 +9,12 @@ from gui.baseapp import BaseApp
 from gui.toga_helpers import set_tooltip, LinkLabel, OneColumnTable, OptionContainer
 
 from settings import Settings
-from consts import SOURCE, IS_MAC, IS_WINDOWS
+from consts import SOURCE, IS_MAC, IS_WINDOWS, OPTIONS_MODE
 
 
 logger = logging.getLogger(__name__)
 
 
-class OPTIONS_MODE(enum.Enum):
-    NORMAL = 'normal'
-    WELCOME = 'welcome'
-    NEWS = 'news'
-
-
 class Options(BaseApp):
     NAME = 'Galaxy HumbleBundle Options'
     if IS_WINDOWS:
@@ -4,6 +4,11 @@ This module serves for two things:
 2) simple asyncio handler for 1) that cares about communication with GUI process
 
 So handler 2) called from outside spawns separate python process that runs 1).
+To show a window without waiting for python and toga startup, a spare worker process with GUI modules imported
+is started when a page is likely to be requested soon (see `prepare`) and after each use, and is let go after
+SPARE_IDLE_TIMEOUT seconds unused. It gets page to show and reports the outcome as JSON messages over its
+stdin/stdout (see `_serve`); its stderr is logged. As toga main loop can be run only once per process,
+each worker shows single page.
 
 Why? Because GUIs don't want to be spawned as a not-main thread.
 And also used `toga` toolkit cannot be pickled by `multiprocessing`: https://github.com/beeware/toga/issues/734.
@@ -17,11 +22,17 @@ Toga is in developement stage and lacks many features. So why using it?
 
 import sys
 import enum
+import json
 import logging
-from typing import Optional, Iterable
+import traceback
+from collections import deque
+from typing import Callable, Dict, IO, List, Optional, Iterable
 from contextlib import suppress
 
 
+SPARE_IDLE_TIMEOUT = 300
+
+
 class PAGE(enum.Enum):
     KEYS = 'keys'
     OPTIONS = 'options'
@@ -31,33 +42,204 @@ class GUIError(Exception):
     pass
 
 
+def _worker_command() -> List[str]:
+    return [sys.executable, __file__, 'worker']  # the code under __name__; the same file for convenience
+
+
+def _send(stream: IO[str], message: dict):
+    stream.write(json.dumps(message) + '\n')
+    stream.flush()
+
+
+def _serve(pages: Dict[str, Callable[..., None]], stdin: IO[str], stdout: IO[str]):
+    """Worker side of the pipe protocol, one JSON message per line:
+    worker -> {"status": "ready"} once GUI modules are imported
+    runner -> {"page": <PAGE value>, "args": [...]}
+    worker -> {"status": "closed"} when the page window is closed or {"status": "error", "error": <traceback>}
+    End of input before a request means the worker is not needed anymore.
+    """
+    _send(stdout, {'status': 'ready'})
+    line = stdin.readline()
+    if not line:
+        return
+    request = json.loads(line)
+    try:
+        pages[request['page']](*request['args'])
+    except Exception:
+        _send(stdout, {'status': 'error', 'error': traceback.format_exc()})
+    else:
+        _send(stdout, {'status': 'closed'})
+
+
+class _Worker:
+    """GUI process with toga and `gui` package already imported, waiting for a page to show.
+    Toga application main loop can be run only once per process, so a worker shows single page and exits.
+    """
+    STDERR_TAIL = 20
+
+    def __init__(self, process):
+        import asyncio
+        self._process = process
+        self._stderr_tail: 'deque[str]' = deque(maxlen=self.STDERR_TAIL)
+        self._stderr_task = asyncio.ensure_future(self._log_stderr())
+
+    @classmethod
+    async def spawn(cls) -> '_Worker':
+        import asyncio
+        process = await asyncio.create_subprocess_exec(
+            *_worker_command(),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        worker = cls(process)
+        try:
+            await worker._receive()
+        except BaseException:
+            worker.terminate()
+            await process.wait()
+            raise
+        return worker
+
+    @property
+    def alive(self) -> bool:
+        return self._process.returncode is None
+
+    async def _log_stderr(self):
+        logger = logging.getLogger(__name__)
+        async for raw in self._process.stderr:
+            line = raw.decode('utf-8', errors='replace').rstrip()
+            self._stderr_tail.append(line)
+            logger.info(f'GUI worker {self._process.pid}: {line}')
+
+    async def _receive(self) -> dict:
+        while True:
+            line = await self._process.stdout.readline()
+            if not line:
+                code = await self._process.wait()
+                await self._stderr_task
+                stderr = '\n'.join(self._stderr_tail)
+                raise GUIError(f'GUI worker exited with code {code}' + (f': {stderr}' if stderr else ''))
+            with suppress(ValueError):
+                message = json.loads(line)
+                if isinstance(message, dict) and 'status' in message:
+                    return message
+            # anything else is output of native libraries written directly to stdout
+
+    async def show(self, gui: PAGE, args: list):
+        request = {'page': gui.value, 'args': args}
+        self._process.stdin.write(json.dumps(request).encode() + b'\n')
+        await self._process.stdin.drain()
+        try:
+            message = await self._receive()
+        finally:
+            self._process.stdin.close()
+        await self._process.wait()
+        if message['status'] == 'error':
+            raise GUIError(f'Error on running [{gui}]: {message["error"]}')
+
+    def terminate(self):
+        self._process.stdin.close()
+        if self.alive:
+            self._process.terminate()
+
+    async def close(self):
+        """Lets unused worker exit on its own"""
+        if self.alive:
+            self._process.stdin.close()
+            await self._process.wait()
+
+
+_spare = None  # Optional[asyncio.Future[_Worker]], the warm worker for the next page
+_spare_idle_timer = None  # Optional[asyncio.TimerHandle], lets the spare go when not taken in time
+
+
+def _retrieve_exception(future):
+    if not future.cancelled() and future.exception() is not None:
+        logging.getLogger(__name__).warning(f'Failed to prepare GUI worker: {future.exception()!r}')
+
+
+def prepare():
+    """Starts a spare worker, if there is none, for a page that is likely to be requested soon.
+    The spare is closed when not used within SPARE_IDLE_TIMEOUT seconds since it is ready (or since this call).
+    """
+    import asyncio
+    global _spare
+
+    if _spare is None:
+        _spare = asyncio.ensure_future(_Worker.spawn())
+        _spare.add_done_callback(_retrieve_exception)
+        _spare.add_done_callback(_arm_idle_timer)
+    elif _spare.done():
+        _arm_idle_timer(_spare)
+
+
+def _arm_idle_timer(spare):
+    """Idle time is counted from worker readiness, so slow start does not make the spare closed before use"""
+    import asyncio
+    global _spare_idle_timer
+
+    if spare is not _spare or spare.cancelled() or spare.exception() is not None:
+        return
+    _cancel_idle_timer()
+    _spare_idle_timer = asyncio.get_event_loop().call_later(SPARE_IDLE_TIMEOUT, lambda: asyncio.ensure_future(close()))
+
+
+def _cancel_idle_timer():
+    global _spare_idle_timer
+    if _spare_idle_timer is not None:
+        _spare_idle_timer.cancel()
+        _spare_idle_timer = None
+
+
+async def _take_worker() -> _Worker:
+    """Hands out the warm spare worker (spawning one if there is none) and starts preparing the next spare"""
+    global _spare
+
+    _cancel_idle_timer()
+    spare, _spare = _spare, None
+    worker = None
+    if spare is not None:
+        with suppress(GUIError):
+            worker = await spare
+        if worker is not None and not worker.alive:
+            worker = None
+    if worker is None:
+        worker = await _Worker.spawn()
+    prepare()
+    return worker
+
+
 async def _open(gui: PAGE, *args, sensitive_args: Optional[Iterable]=None):
     import asyncio
     logger = logging.getLogger(__name__)
 
     logger.info(f'Running [{gui}] with args: {args}')
 
-    all_args = [gui.value] + list(args)
+    all_args = list(args)
     if sensitive_args is not None:
         all_args += list(sensitive_args)
 
-    process = await asyncio.create_subprocess_exec(
-        sys.executable,
-        __file__,  # the code under __name__; the same file for convenience
-        *all_args,
-        stderr=asyncio.subprocess.PIPE
-    )
+    worker = await _take_worker()
     try:
-        _, stderr_data = await process.communicate()
+        await worker.show(gui, all_args)
     except asyncio.CancelledError:
         logger.info('GUI process cancelled. Closing.')
-        process.terminate()
-    else:
-        if stderr_data:
-            if type(stderr_data) == bytes:
-                with suppress(UnicodeDecodeError):
-                    stderr_data = stderr_data.decode('utf-8')
-            raise GUIError(f'Error on running [{gui}]: {stderr_data}')
+        worker.terminate()
+
+
+async def close():
+    """Stops the spare GUI worker"""
+    import asyncio
+    global _spare
+    _cancel_idle_timer()
+    spare, _spare = _spare, None
+    if spare is None:
+        return
+    spare.cancel()
+    await asyncio.wait([spare])
+    if not spare.cancelled() and spare.exception() is None:
+        await spare.result().close()
 
 
 async def show_key(game: 'LocalGame'):
@@ -84,14 +266,25 @@ if __name__ == '__main__':
     sys.path.insert(0, str(parent_dir / 'modules'))  # third party
 
     from gui.keys import ShowKey
-    from gui.options import Options, OPTIONS_MODE
+    from gui.options import Options
+    from consts import OPTIONS_MODE
+
+    def show_options_page(mode: str):
+        changelog_path = parent_dir / 'CHANGELOG.md'
+        Options(OPTIONS_MODE(mode), changelog_path).main_loop()
+
+    def show_key_page(human_name: str, key_type: str, key_val: Optional[str] = None):
+        ShowKey(human_name, key_type, key_val).main_loop()
+
+    # stdout is reserved for messages to the runner
+    protocol_out, sys.stdout = sys.stdout, sys.stderr
 
     # new root logger
     logger = logging.getLogger()
     logger.setLevel(logging.DEBUG)
 
-    # print also to stdout for better debugging
-    handler = logging.StreamHandler(sys.stdout)
+    # print also to stderr for better debugging
+    handler = logging.StreamHandler(sys.stderr)
     handler.setLevel(logging.DEBUG)
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     handler.setFormatter(formatter)
@@ -100,6 +293,8 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     subparsers = parser.add_subparsers(dest='page')
 
+    subparsers.add_parser('worker')
+
     options_parser = subparsers.add_parser(PAGE.OPTIONS.value)
     options_parser.add_argument('mode', choices=[m.value for m in OPTIONS_MODE])
 
@@ -109,11 +304,12 @@ if __name__ == '__main__':
     keys_parser.add_argument('key_val', nargs='?', default=None)
 
     args = parser.parse_args()
-    option = PAGE(args.page)
 
+    if args.page == 'worker':
+        pages: Dict[str, Callable[..., None]] = {PAGE.OPTIONS.value: show_options_page, PAGE.KEYS.value: show_key_page}
+        _serve(pages, sys.stdin, protocol_out)
     # for debugging: `python src/guirunner.py options news
-    if option == PAGE.OPTIONS:
-        changelog_path = parent_dir / 'CHANGELOG.md'
-        Options(OPTIONS_MODE(args.mode), changelog_path).main_loop()
-    elif option == PAGE.KEYS:
-        ShowKey(args.human_name, args.key_type, args.key_val).main_loop()
+    elif PAGE(args.page) == PAGE.OPTIONS:
+        show_options_page(args.mode)
+    elif PAGE(args.page) == PAGE.KEYS:
+        show_key_page(args.human_name, args.key_type, args.key_val)
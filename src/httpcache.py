@@ -0,0 +1,268 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import pathlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Optional, Pattern, Sequence, Tuple
+
+from multidict import CIMultiDict, CIMultiDictProxy
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachePolicy:
+    """How responses of an endpoint are cached. Only GET responses with ETag or Last-Modified are stored."""
+    store: bool = True
+    max_entry_bytes: int = 4 * 1024 * 1024
+    content_types: Tuple[str, ...] = ('application/json',)  # other responses are passed through, not buffered
+
+
+NO_STORE = CachePolicy(store=False)
+
+
+@dataclass
+class CacheStats:
+    requests: int = 0
+    hits: int = 0  # 304 served from cache
+    stored: int = 0
+    evicted: int = 0
+    bytes_saved: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        if not self.requests:
+            return 0.0
+        return self.hits / self.requests
+
+    def __str__(self):
+        return (
+            f'{self.hits}/{self.requests} hits ({self.hit_rate:.0%}), {self.stored} stored, '
+            f'{self.evicted} evicted, {self.bytes_saved / 1024:.1f} KB saved'
+        )
+
+
+class _CachedContent:
+    def __init__(self, body: bytes):
+        self._body = body
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def iter_chunked(self, n: int) -> AsyncGenerator[bytes, None]:
+        for i in range(0, len(self._body), n):
+            yield self._body[i:i + n]
+
+
+class CachedResponse:
+    """Minimal `aiohttp.ClientResponse` replacement for responses served from HttpCache"""
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes, from_cache: bool):
+        self.status = status
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self.content = _CachedContent(body)
+        self.from_cache = from_cache
+        self._body = body
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self, encoding: str = 'utf-8') -> str:
+        return self._body.decode(encoding)
+
+    async def json(self, **_) -> Any:
+        return json.loads(self._body)
+
+    def release(self):
+        pass
+
+
+class HttpCache:
+    """On-disk cache of GET responses revalidated with `If-None-Match` / `If-Modified-Since`.
+    Each entry is a single file: JSON metadata line followed by the body. Entries are evicted
+    in LRU order when total size exceeds `max_bytes`; file mtime keeps the order between sessions.
+    Entries belong to a single account (see `set_owner`).
+    """
+    _STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+    _OWNER_FILE = 'owner'
+
+    def __init__(
+        self,
+        directory: pathlib.Path,
+        policies: Sequence[Tuple[str, CachePolicy]] = (),
+        max_bytes: int = 32 * 1024 * 1024
+    ):
+        """
+        :param policies:  (path regex, policy) pairs; the first matching one is used, NO_STORE if none
+        """
+        self._directory = pathlib.Path(directory)
+        self._policies: Sequence[Tuple[Pattern, CachePolicy]] = [(re.compile(p), policy) for p, policy in policies]
+        self._max_bytes = max_bytes
+        self._entries: Optional['OrderedDict[str, int]'] = None  # key: size, least recently used first
+        self._size = 0
+        self.stats = CacheStats()
+
+    def policy(self, method: str, path: str) -> CachePolicy:
+        if method.upper() != 'GET':
+            return NO_STORE
+        for pattern, policy in self._policies:
+            if pattern.match(path):
+                return policy
+        return NO_STORE
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict[str, str]] = None, scope: str = '') -> str:
+        """:param scope:  e.g. user id, so the same url requested by different accounts gives different keys"""
+        query = json.dumps(params or {}, sort_keys=True)
+        return hashlib.sha1(f'{scope}:{url}?{query}'.encode()).hexdigest()
+
+    def set_owner(self, owner: str):
+        """Removes all entries if they were stored for another account (or unknown one) than `owner`"""
+        marker = hashlib.sha1(owner.encode()).hexdigest()
+        path = self._directory / self._OWNER_FILE
+        try:
+            if path.read_text() == marker:
+                return
+        except OSError:
+            pass
+        self.clear()
+        try:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            path.write_text(marker)
+        except OSError as e:
+            logger.warning(f'Cannot write http cache owner: {repr(e)}')
+
+    def clear(self):
+        for key in list(self._load_entries()):
+            self._remove(key)
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self._directory / f'{key}.cache'
+
+    def _load_entries(self) -> 'OrderedDict[str, int]':
+        if self._entries is None:
+            self._entries = OrderedDict()
+            try:
+                files = [(f.stat().st_mtime, f) for f in self._directory.glob('*.cache')]
+            except OSError as e:
+                logger.warning(f'Cannot read http cache directory: {repr(e)}')
+                files = []
+            for _, f in sorted(files):
+                size = f.stat().st_size
+                self._entries[f.stem] = size
+                self._size += size
+        return self._entries
+
+    def _read(self, key: str, with_body: bool = True) -> Optional[Tuple[Dict[str, str], bytes]]:
+        if key not in self._load_entries():
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                meta = json.loads(f.readline())
+                return meta['headers'], f.read() if with_body else b''
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f'Corrupted http cache entry {key}: {repr(e)}')
+            self._remove(key)
+            return None
+
+    def _remove(self, key: str):
+        entries = self._load_entries()
+        size = entries.pop(key, None)
+        if size is not None:
+            self._size -= size
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def validators(self, key: str) -> Dict[str, str]:
+        """Conditional request headers for cached entry; empty if not cached"""
+        entry = self._read(key, with_body=False)
+        if entry is None:
+            return {}
+        headers, _ = entry
+        result = {}
+        if 'ETag' in headers:
+            result['If-None-Match'] = headers['ETag']
+        if 'Last-Modified' in headers:
+            result['If-Modified-Since'] = headers['Last-Modified']
+        return result
+
+    def hit(self, key: str) -> Optional[CachedResponse]:
+        """Response for 304 Not Modified. None if entry vanished in the meantime."""
+        entry = self._read(key)
+        if entry is None:
+            return None
+        headers, body = entry
+        self._load_entries().move_to_end(key)
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        self.stats.hits += 1
+        self.stats.bytes_saved += len(body)
+        return CachedResponse(200, headers, body, from_cache=True)
+
+    async def request(
+        self,
+        key: str,
+        policy: CachePolicy,
+        send: Callable[[Dict[str, str]], Awaitable[Any]]
+    ) -> Any:
+        """Makes conditional request using `send(extra_headers)`.
+        Returns CachedResponse when served from cache or stored, original response otherwise.
+        """
+        self.stats.requests += 1
+        validators = self.validators(key)
+        response = await send(validators)
+        if response.status == HTTPStatus.NOT_MODIFIED:
+            cached = self.hit(key)
+            if cached is not None:
+                response.release()
+                return cached
+            logger.warning('Not modified response for evicted http cache entry; requesting again')
+            response.release()
+            response = await send({})
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+        if response.status != HTTPStatus.OK \
+                or content_type not in policy.content_types \
+                or ('ETag' not in response.headers and 'Last-Modified' not in response.headers):
+            return response
+        body = await response.read()
+        self.store(key, policy, response.status, response.headers, body)
+        return CachedResponse(response.status, dict(response.headers), body, from_cache=False)
+
+    def store(self, key: str, policy: CachePolicy, status: int, headers: Dict[str, str], body: bytes) -> bool:
+        if not policy.store or status != 200 or len(body) > policy.max_entry_bytes:
+            return False
+        stored_headers = {h: headers[h] for h in self._STORED_HEADERS if h in headers}
+        if 'ETag' not in stored_headers and 'Last-Modified' not in stored_headers:
+            return False
+        entries = self._load_entries()
+        self._remove(key)
+        data = json.dumps({'headers': stored_headers}).encode() + b'\n' + body
+        try:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            tmp = self._path(key).with_suffix('.tmp')
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+        except OSError as e:
+            logger.warning(f'Cannot store http cache entry: {repr(e)}')
+            return False
+        entries[key] = len(data)
+        self._size += len(data)
+        self.stats.stored += 1
+        self._evict()
+        return True
+
+    def _evict(self):
+        entries = self._load_entries()
+        while self._size > self._max_bytes and entries:
+            key = next(iter(entries))
+            self._remove(key)
+            self.stats.evicted += 1
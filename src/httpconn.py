@@ -0,0 +1,70 @@
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+import aiohttp
+from galaxy.http import create_tcp_connector
+
+
+@dataclass
+class ConnectionStats:
+    """Connection pool usage gathered with aiohttp tracing"""
+    created: int = 0
+    reused: int = 0
+    queued: int = 0  # waited for a free connection due to pool limits
+    queue_time: float = 0.0
+    connect_time: float = 0.0  # spent on TCP and TLS handshakes
+
+    @property
+    def acquired(self) -> int:
+        return self.created + self.reused
+
+    @property
+    def reuse_ratio(self) -> float:
+        if not self.acquired:
+            return 0.0
+        return self.reused / self.acquired
+
+    def __str__(self):
+        return (
+            f'{self.reused}/{self.acquired} connections reused ({self.reuse_ratio:.0%}), '
+            f'{self.created} created in {self.connect_time:.2f}s; '
+            f'{self.queued} queued for {self.queue_time:.2f}s'
+        )
+
+
+def create_connector(limit_per_host: int, keepalive_timeout: float, dns_ttl: int) -> aiohttp.TCPConnector:
+    return create_tcp_connector(
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        use_dns_cache=True,
+        ttl_dns_cache=dns_ttl,
+    )
+
+
+def create_trace_config(stats: ConnectionStats) -> aiohttp.TraceConfig:
+    """Trace config counting created and reused connections and time spent waiting for them"""
+    async def on_queued_start(session, ctx: SimpleNamespace, params):
+        ctx.queued_at = time.monotonic()
+
+    async def on_queued_end(session, ctx: SimpleNamespace, params):
+        stats.queued += 1
+        stats.queue_time += time.monotonic() - ctx.queued_at
+
+    async def on_create_start(session, ctx: SimpleNamespace, params):
+        ctx.connecting_at = time.monotonic()
+
+    async def on_create_end(session, ctx: SimpleNamespace, params):
+        stats.created += 1
+        stats.connect_time += time.monotonic() - ctx.connecting_at
+
+    async def on_reuse(session, ctx, params):
+        stats.reused += 1
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_connection_queued_start.append(on_queued_start)
+    trace_config.on_connection_queued_end.append(on_queued_end)
+    trace_config.on_connection_create_start.append(on_create_start)
+    trace_config.on_connection_create_end.append(on_create_end)
+    trace_config.on_connection_reuseconn.append(on_reuse)
+    return trace_config
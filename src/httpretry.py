@@ -0,0 +1,152 @@
+import re
+import asyncio
+import logging
+import email.utils
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, FrozenSet, Mapping, Optional, Pattern, Sequence, Tuple
+
+import aiohttp
+
+from utils.fetcher import backoff_delay
+
+
+logger = logging.getLogger(__name__)
+
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How failed requests of an endpoint are retried.
+    Timeouts, dropped connections and `statuses` are retried only for idempotent methods,
+    unless `retry_non_idempotent` is set. Failure to connect is always safe to retry as nothing was sent.
+    """
+    retries: int = 2
+    backoff: float = 0.5
+    max_backoff: float = 8.0
+    statuses: FrozenSet[int] = frozenset({
+        HTTPStatus.TOO_MANY_REQUESTS,
+        HTTPStatus.INTERNAL_SERVER_ERROR,
+        HTTPStatus.BAD_GATEWAY,
+        HTTPStatus.SERVICE_UNAVAILABLE,
+        HTTPStatus.GATEWAY_TIMEOUT,
+    })
+    max_retry_after: float = 30.0  # longer `Retry-After` is not waited for; the error is raised instead
+    retry_non_idempotent: bool = False
+
+
+NO_RETRY = RetryPolicy(retries=0)
+
+
+@dataclass
+class RetryStats:
+    requests: int = 0
+    retries: int = 0
+    recovered: int = 0  # succeeded after at least one retry
+    gave_up: int = 0  # failed after at least one retry
+    added_latency: float = 0.0  # total time spent waiting between attempts
+    reasons: Counter = field(default_factory=Counter)
+
+    def __str__(self):
+        return (
+            f'{self.retries} retries in {self.requests} requests, {self.recovered} recovered, {self.gave_up} gave up, '
+            f'{self.added_latency:.2f}s added; reasons: {dict(self.reasons)}'
+        )
+
+
+def parse_retry_after(value: Optional[str], now: Optional[datetime] = None) -> Optional[float]:
+    """Seconds to wait from `Retry-After` header given either as delay in seconds or HTTP date"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - (now or datetime.now(timezone.utc))).total_seconds())
+
+
+class RetryEngine:
+    """Retries transient failures of requests with jittered exponential backoff honouring `Retry-After`.
+    Policies are chosen per endpoint class by path regex.
+    """
+    def __init__(
+        self,
+        policies: Sequence[Tuple[str, RetryPolicy]] = (),
+        default: RetryPolicy = RetryPolicy(),
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep
+    ):
+        """
+        :param policies:  (path regex, policy) pairs; the first matching one is used, `default` if none.
+            Path is matched without leading slash.
+        """
+        self._policies: Sequence[Tuple[Pattern, RetryPolicy]] = [(re.compile(p), policy) for p, policy in policies]
+        self._default = default
+        self._sleep = sleep
+        self.stats = RetryStats()
+
+    def policy(self, path: str) -> RetryPolicy:
+        path = path.lstrip('/')  # patterns are relative to the site root as most of the request paths
+        for pattern, policy in self._policies:
+            if pattern.match(path):
+                return policy
+        return self._default
+
+    @staticmethod
+    def _failure(error: Exception, idempotent: bool, policy: RetryPolicy) -> Optional[str]:
+        """Returns reason if `error` may be retried, None otherwise"""
+        if isinstance(error, aiohttp.ClientConnectorError):
+            return 'connect'
+        if not (idempotent or policy.retry_non_idempotent):
+            return None
+        if isinstance(error, aiohttp.ClientResponseError):
+            return str(error.status) if error.status in policy.statuses else None
+        if isinstance(error, asyncio.TimeoutError):
+            return 'timeout'
+        if isinstance(error, aiohttp.ClientConnectionError):  # e.g. connection reset
+            return 'connection'
+        return None
+
+    def _delay(self, attempt: int, policy: RetryPolicy, error: Exception) -> Optional[float]:
+        """Delay before the next attempt; None if server asks to wait longer than allowed"""
+        headers: Mapping[str, str] = getattr(error, 'headers', None) or {}
+        retry_after = parse_retry_after(headers.get('Retry-After'))
+        if retry_after is None:
+            return backoff_delay(attempt, policy.backoff, policy.max_backoff)
+        if retry_after > policy.max_retry_after:
+            return None
+        return retry_after
+
+    async def run(self, method: str, policy: RetryPolicy, send: Callable[[], Awaitable[Any]]) -> Any:
+        """Calls `send()` until it succeeds, the error is not transient or retries are exhausted"""
+        self.stats.requests += 1
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            try:
+                response = await send()
+            except Exception as e:
+                reason = self._failure(e, idempotent, policy)
+                delay = self._delay(attempt, policy, e) if reason is not None else None
+                if attempt >= policy.retries or delay is None:
+                    if attempt:
+                        self.stats.gave_up += 1
+                    raise
+                attempt += 1
+                logger.info(f'{method} request failed with {repr(e)}; retry #{attempt} in {delay:.2f}s')
+                self.stats.retries += 1
+                self.stats.reasons[reason] += 1
+                self.stats.added_latency += delay
+                await self._sleep(delay)
+            else:
+                if attempt:
+                    self.stats.recovered += 1
+                return response
@@ -1,98 +1,255 @@
 import time
+import json
+import random
+import hashlib
 import logging
-import asyncio
-from typing import Callable, Dict, List, Set, Iterable, Any, Coroutine
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Set, Iterable, Optional, Union
 
-from consts import SOURCE, NON_GAME_BUNDLE_TYPES
+from consts import SOURCE, NON_GAME_BUNDLE_TYPES, ORDERS_FETCH_CONCURRENCY
 from model.product import Product
 from model.game import HumbleGame, Subproduct, Key, KeyGame
 from model.types import GAME_PLATFORMS
 from settings import LibrarySettings
+import tracing
+from utils.fetcher import FetchScheduler
 
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class OrderMeta:
+    """Bookkeeping of a single cached order"""
+    fetched_at: float
+    ttl: float
+    hash: str
+
+    @property
+    def is_stale(self) -> bool:
+        return time.time() >= self.fetched_at + self.ttl
+
+
 class LibraryResolver:
     NEXT_FETCH_IN = 3600 * 24 * 14
+    NEXT_FETCH_SPREAD = 0.25  # randomizes orders TTL to spread refreshes over time
+    ORDER_PROJECTION_VERSION = 1
+    FETCH_CONCURRENCY = ORDERS_FETCH_CONCURRENCY
+    FETCH_RATE = 10.0  # requests per second
 
-    def __init__(self, api, settings: LibrarySettings, save_cache_callback: Callable, cache: Dict[str, list]):
+    def __init__(
+        self,
+        api,
+        settings: LibrarySettings,
+        save_cache_callback: Callable,
+        cache: Union[Dict[str, Any], Callable[[], Dict[str, Any]]],
+        fetcher: Optional[FetchScheduler] = None
+    ):
+        """
+        :param save_cache_callback:  called with (cache, gamekeys of changed orders, gamekeys of changed metadata)
+        :param cache:  cache content or function loading it; the latter is called when cache is needed for the first time
+        """
         self._api = api
         self._save_cache = save_cache_callback
         self._settings = settings
-        self._cache = cache
+        self._cache_loader = cache if callable(cache) else lambda: cache
+        self.__cache: Optional[Dict[str, Any]] = None
+        self._dirty_orders: Set[str] = set()
+        self._dirty_metas: Set[str] = set()
+        self._fetcher = fetcher or FetchScheduler(
+            concurrency=self.FETCH_CONCURRENCY,
+            rate=self.FETCH_RATE,
+            retries=0  # transient failures are already retried per request by AuthorizedHumbleAPI
+        )
+
+    @property
+    def _cache(self) -> Dict[str, Any]:
+        if self.__cache is None:
+            self.__cache = self._cache_loader()
+            if self.__cache.get('orders_projection') != self.ORDER_PROJECTION_VERSION:
+                self._migrate_orders_projection()
+        return self.__cache
 
     async def __call__(self, only_cache: bool = False) -> Dict[str, HumbleGame]:
 
         if not only_cache:
             await self._fetch_and_update_cache()
 
-        # get all games in predefined order
-        orders = list(self._cache.get('orders', {}).values())  # type: ignore[union-attr] - orders is always a dict
-        all_games: List[HumbleGame] = []
-        for source in self._settings.sources:
-            if source == SOURCE.DRM_FREE:
-                all_games.extend(self._get_subproducts(orders))
-            elif source == SOURCE.KEYS:
-                all_games.extend(self._get_keys(orders, self._settings.show_revealed_keys))
-
-        logger.info(f'all_games: {all_games}')
-
-        # deduplication of the games with the same title
-        deduplicated: Dict[str, HumbleGame] = {}
-        titles: Set[str] = set()
-        for game in all_games:
-            if game.human_name not in titles:
-                titles.add(game.human_name)
-                deduplicated[game.machine_name] = game
+        with tracing.span('build') as span:
+            # get all games in predefined order
+            orders = list(self._cache.get('orders', {}).values())
+            all_games: List[HumbleGame] = []
+            for source in self._settings.sources:
+                if source == SOURCE.DRM_FREE:
+                    all_games.extend(self._get_subproducts(orders))
+                elif source == SOURCE.KEYS:
+                    all_games.extend(self._get_keys(orders, self._settings.show_revealed_keys))
+
+            logger.info(f'all_games: {all_games}')
+
+            # deduplication of the games with the same title
+            deduplicated: Dict[str, HumbleGame] = {}
+            titles: Set[str] = set()
+            for game in all_games:
+                if game.human_name not in titles:
+                    titles.add(game.human_name)
+                    deduplicated[game.machine_name] = game
+            span.set(orders=len(orders), games=len(deduplicated))
         return deduplicated
 
     async def _fetch_and_update_cache(self):
         sources = self._settings.sources
 
         if SOURCE.DRM_FREE in sources or SOURCE.KEYS in sources:
-            next_fetch_orders = self._cache.get('next_fetch_orders')
-            if next_fetch_orders is None or time.time() > next_fetch_orders:
-                logger.info('Refreshing all orders')
-                self._cache['orders'] = await self._fetch_orders([])
-                self._cache['next_fetch_orders'] = time.time() + self.NEXT_FETCH_IN
-            else:
-                const_orders = {
-                    gamekey: order
-                    for gamekey, order in self._cache.get('orders', {}).items()
-                    if self.__is_const(order)
-                }
-                self._cache.setdefault('orders', {}).update(await self._fetch_orders(const_orders))
+            if await self._refresh_orders() or self._dirty_orders or self._dirty_metas:
+                self._save_cache(self._cache, self._dirty_orders, self._dirty_metas)
+                self._dirty_orders = set()
+                self._dirty_metas = set()
 
-        self._save_cache(self._cache)
+    def _migrate_orders_projection(self):
+        logger.info(f'Migrating cached orders to projection v{self.ORDER_PROJECTION_VERSION}')
+        orders = self._cache.get('orders', {})
+        metas = self._cache.get('orders_meta', {})
+        for gamekey, order in orders.items():
+            orders[gamekey] = self._project_order(order)
+            if gamekey in metas:
+                metas[gamekey]['hash'] = self._content_hash(orders[gamekey])
+                self._dirty_metas.add(gamekey)
+            self._dirty_orders.add(gamekey)
+        self._cache['orders_projection'] = self.ORDER_PROJECTION_VERSION
 
-    async def _fetch_orders(self, cached_gamekeys: Iterable[str]) -> Dict[str, dict]:
-        gamekeys = await self._api.get_gamekeys()
-        order_tasks = [self._api.get_order_details(x) for x in gamekeys if x not in cached_gamekeys]
-        orders = await self.__gather_no_exceptions(order_tasks)
-        orders = self.__filter_out_not_game_bundles(orders)
-        return {order['gamekey']: order for order in orders}
+    @staticmethod
+    def _project_order(order: dict) -> dict:
+        """Strips `get_order_details` response to fields read by the library.
+        Only game platforms downloads and subproducts having any of them are left.
+        Projection of already projected order gives the same result.
+        Bump ORDER_PROJECTION_VERSION when changing the output.
+        """
+        def pick(data: dict, fields: Iterable[str]) -> dict:
+            return {f: data[f] for f in fields if f in data}
+
+        game_platforms = {hp.value for hp in GAME_PLATFORMS}
+        subproducts = []
+        for sub in order.get('subproducts', []):
+            downloads = [
+                dict(
+                    pick(dw, ('machine_name', 'platform')),
+                    download_struct=[
+                        pick(ds, ('name', 'url', 'human_size'))
+                        for ds in dw.get('download_struct', [])
+                    ]
+                )
+                for dw in sub.get('downloads', [])
+                if dw.get('platform') in game_platforms
+            ]
+            if downloads:
+                subproducts.append(dict(pick(sub, ('machine_name', 'human_name')), downloads=downloads))
+
+        projected = pick(order, ('gamekey', 'choices_remaining'))
+        projected['product'] = pick(order['product'], ('machine_name', 'human_name', 'category'))
+        projected['subproducts'] = subproducts
+        if 'tpkd_dict' in order:
+            projected['tpkd_dict'] = {'all_tpks': [
+                pick(tpk, ('machine_name', 'human_name', 'key_type', 'key_type_human_name', 'redeemed_key_val'))
+                for tpk in order['tpkd_dict']['all_tpks']
+            ]}
+        return projected
+
+    def _orders_meta(self) -> Dict[str, OrderMeta]:
+        """Per order metadata stored in cache as dicts. Migrates caches from before per-order TTL."""
+        if 'orders_meta' not in self._cache:
+            next_fetch_orders = self._cache.pop('next_fetch_orders', None)
+            fetched_at = next_fetch_orders - self.NEXT_FETCH_IN if next_fetch_orders else 0
+            self._cache['orders_meta'] = {
+                gamekey: asdict(OrderMeta(fetched_at, self._order_ttl(), self._content_hash(order)))
+                for gamekey, order in self._cache.get('orders', {}).items()
+            }
+            self._dirty_metas |= set(self._cache['orders_meta'])
+        return {
+            gamekey: OrderMeta(**meta)
+            for gamekey, meta in self._cache['orders_meta'].items()
+        }
+
+    def _order_ttl(self) -> float:
+        return self.NEXT_FETCH_IN * random.uniform(1 - self.NEXT_FETCH_SPREAD, 1 + self.NEXT_FETCH_SPREAD)
 
     @staticmethod
-    async def __gather_no_exceptions(tasks: Iterable[Coroutine]):
-        """Wrapper around asyncio.gather(*args, return_exception=True)
-        Returns list of non-exception items. If every item is exception, raise first of them, else logs them.
-        Use case: https://github.com/UncleGoogle/galaxy-integration-humblebundle/issues/59
+    def _content_hash(order: dict) -> str:
+        return hashlib.sha1(json.dumps(order, sort_keys=True).encode()).hexdigest()
+
+    def expected_fetches(self) -> int:
+        """Number of connections the next orders refresh will use; all of them if orders were never fetched.
+        Loads the cache.
+        """
+        sources = self._settings.sources
+        if SOURCE.DRM_FREE not in sources and SOURCE.KEYS not in sources:
+            return 0
+        metas = self._orders_meta()
+        if not metas:
+            return self.FETCH_CONCURRENCY
+        to_fetch = sum(self._needs_refresh(gamekey, meta) for gamekey, meta in metas.items())
+        return min(self.FETCH_CONCURRENCY, max(1, to_fetch))  # order list request needs one anyway
+
+    def _needs_refresh(self, gamekey: str, meta: Optional[OrderMeta]) -> bool:
+        if meta is None or meta.is_stale:
+            return True
+        order = self._cache['orders'].get(gamekey)
+        # orders that are not cached in spite of fresh meta are not game bundles
+        return order is not None and not self.__is_const(order)
+
+    async def _refresh_orders(self) -> bool:
+        """Fetches only new, stale or mutable orders.
+        Orders that are not game bundles are remembered only in metadata.
+        Gamekeys of changed or removed orders are collected in `self._dirty_orders`,
+        of orders with changed or removed metadata in `self._dirty_metas`.
+        Returns True if the cache was modified.
         """
-        items = await asyncio.gather(*tasks, return_exceptions=True)
-        if len(items) == 0:
-            return []
+        orders: Dict[str, dict] = self._cache.setdefault('orders', {})
+        metas = self._orders_meta()
+        cached_meta = self._cache['orders_meta']
+
+        gamekeys = await self._api.get_gamekeys()
+        removed = set(metas) - set(gamekeys)
+        to_fetch = [gk for gk in gamekeys if self._needs_refresh(gk, metas.get(gk))]
+        logger.info(f'Refreshing {len(to_fetch)} of {len(gamekeys)} orders')
+        fetched = await self._fetch_order_details(to_fetch)
+
+        # cache is changed only when fetching succeeded, so it is never left half updated
+        for gamekey in removed:
+            logger.info(f'Order {gamekey} not found in order list. Removing from cache')
+            orders.pop(gamekey, None)
+            del cached_meta[gamekey]
+        self._dirty_orders |= removed
+        self._dirty_metas |= removed
 
-        err: List[Exception] = []
-        ok: List[Any] = []
-        for it in items:
-            (err if isinstance(it, Exception) else ok).append(it)
+        for raw_order in fetched:
+            order = self._project_order(raw_order)
+            gamekey = order['gamekey']
+            content_hash = self._content_hash(order)
+            old_meta = metas.get(gamekey)
+            cached_meta[gamekey] = asdict(OrderMeta(time.time(), self._order_ttl(), content_hash))
+            self._dirty_metas.add(gamekey)
+            if old_meta is not None and old_meta.hash == content_hash:
+                continue  # only metadata refreshed
+            self._dirty_orders.add(gamekey)
+            if self.__is_game_bundle(order):
+                orders[gamekey] = order
+            else:
+                orders.pop(gamekey, None)
+        return bool(removed or to_fetch)
 
-        if len(ok) == 0:
-            raise err[0]
-        if err and len(err) != len(items):
-            logger.error(f'Exception(s) occured: [{err}].\nSkipping and going forward')
-        return ok
+    async def _fetch_order_details(self, gamekeys: List[str]) -> List[dict]:
+        """Fetches orders details with bounded concurrency and rate limit (see FetchScheduler).
+        Returns list of fetched orders. If every order has failed, raise first error, else logs them.
+        Use case: https://github.com/UncleGoogle/galaxy-integration-humblebundle/issues/59
+        """
+        fetched, errors = await self._fetcher.run(self._api.get_order_details, gamekeys)
+        if errors:
+            if not fetched:
+                raise next(iter(errors.values()))
+            logger.error(f'Exception(s) occured: [{list(errors.values())}].\nSkipping and going forward')
+        logger.info(f'Orders fetch stats: {self._fetcher.last_stats}')
+        return [fetched[gamekey] for gamekey in gamekeys if gamekey in fetched]
 
     @staticmethod
     def __is_const(order):
@@ -105,28 +262,25 @@ class LibraryResolver:
         return True
 
     @staticmethod
-    def __filter_out_not_game_bundles(orders: list) -> list:
-        filtered = []
-        for details in orders:
-            product = Product(details['product'])
-            if product.bundle_type in NON_GAME_BUNDLE_TYPES:
-                logger.info(f'Ignoring {details["product"]["machine_name"]} due bundle type: {product.bundle_type}')
-                continue
-            filtered.append(details)
-        return filtered
+    def __is_game_bundle(details: dict) -> bool:
+        product = Product(details['product'])
+        if product.bundle_type in NON_GAME_BUNDLE_TYPES:
+            logger.info(f'Ignoring {details["product"]["machine_name"]} due bundle type: {product.bundle_type}')
+            return False
+        return True
 
     @staticmethod
     def _get_subproducts(orders: list) -> List[Subproduct]:
         subproducts = []
         for details in orders:
             for sub_data in details['subproducts']:
-                sub = Subproduct(sub_data)
                 try:
+                    sub = Subproduct(sub_data)
                     sub.in_galaxy_format()  # minimal validation
                 except Exception as e:
                     logger.warning(f"Error while parsing subproduct {repr(e)}: {sub_data}",  extra={'data': sub_data})
                     continue
-                if not set(sub.downloads).isdisjoint(GAME_PLATFORMS):
+                if not sub.platforms.isdisjoint(GAME_PLATFORMS):
                     # at least one download exists for supported OS
                     subproducts.append(sub)
         return subproducts
@@ -136,8 +290,8 @@ class LibraryResolver:
         keys = []
         for details in orders:
             for tpks in details['tpkd_dict']['all_tpks']:
-                key = Key(tpks)
                 try:
+                    key = Key(tpks)
                     key.in_galaxy_format()  # minimal validation
                 except Exception as e:
                     logger.warning(f"Error while parsing tpks {repr(e)}: {tpks}", extra={'tpks': tpks})
@@ -1,24 +1,39 @@
 import logging
 import asyncio
-import difflib
 import time
 import os
 import pathlib
 import abc
-from typing import Dict, Set, Iterable, Union, List, AsyncGenerator, Tuple
-from typing import cast
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Set, Iterable, Union, List, AsyncGenerator, Tuple, Callable, TypeVar
 
 from consts import IS_WINDOWS
 from local.pathfinder import PathFinder
 from local.localgame import LocalHumbleGame
+from local.titleindex import TitleIndex
+from local.scancache import ScanCache
+
+
+T = TypeVar('T')
 
 
 class BaseAppFinder(abc.ABC):
+    SCAN_WORKERS = 4
+
     def __init__(self, get_close_matches=None, find_best_exe=None):
         self._pathfinder = PathFinder(IS_WINDOWS)
+        self._executor = ThreadPoolExecutor(max_workers=self.SCAN_WORKERS, thread_name_prefix='appfinder')
+        self._title_index = TitleIndex()
+        self._scan_cache = ScanCache()
+        self._save_scan_cache: Callable[[dict], None] = lambda _: None
         self.get_close_matches = get_close_matches or self._get_close_matches
         self.find_best_exe = find_best_exe or self._find_best_exe
 
+    def set_scan_cache(self, cache: dict, save_cache_callback: Callable[[dict], None]):
+        """Restores results of previous folders scan, e.g. from plugin persistent cache"""
+        self._scan_cache = ScanCache(cache)
+        self._save_scan_cache = save_cache_callback
+
     async def __call__(self, owned_title_id: Dict[str, str], paths: Set[pathlib.Path]) -> Dict[str, LocalHumbleGame]:
         """
         :param owned_title_id: human_name: machine_name dictionary
@@ -38,47 +53,84 @@ class BaseAppFinder(abc.ABC):
         :param app_names:  app names to be matched with folder names
         :returns:      mapping of app names to found executables
         """
+        roots = [os.fspath(path) for path in paths]
+        cached = await self._run_off_loop(self._scan_cache.lookup, roots, app_names, self.find_best_exe)
+        if cached is not None:
+            logging.debug('Folders scan result taken from cache')
+            self.__persist_scan_cache()
+            return cached
+
+        self._title_index.update(app_names)
+        listings = await asyncio.gather(*[self._run_off_loop(self._list_dirs, root) for root in roots])
         not_yet_found: Set[str] = app_names.copy()
-        result: Dict[str, pathlib.Path] = {}
-        close_matches: Dict[str, pathlib.Path] = {}
+        descended: List[str] = []
+        result: Dict[str, Tuple[pathlib.PurePath, pathlib.Path]] = {}
+        close_matches: Dict[str, Tuple[pathlib.PurePath, pathlib.Path]] = {}
         # exact matches
-        for path in paths:
-            async for app_name, exe in self.__scan(path, not_yet_found, similarity=1):
-                result[app_name] = exe
+        for root, dirs in listings:
+            async for app_name, dir_path, exe in self.__scan(root, dirs, not_yet_found, descended, similarity=1):
+                result[app_name] = dir_path, exe
         # close matches
-        for path in paths:
-            async for app_name, exe in self.__scan(path, not_yet_found, similarity=0.8):
-                close_matches[app_name] = exe
+        for root, dirs in listings:
+            async for app_name, dir_path, exe in self.__scan(root, dirs, not_yet_found, descended, similarity=0.8):
+                close_matches[app_name] = dir_path, exe
         # overwrite close matches with exact results
         close_matches.update(result)
-        return close_matches
 
-    async def __scan(self, path: Union[str, os.PathLike], candidates: Set[str], similarity: float) -> AsyncGenerator[Tuple[str, pathlib.Path], None]:
+        await self._run_off_loop(self._scan_cache.store, roots, app_names, descended, close_matches)
+        self.__persist_scan_cache()
+        return {app_name: exe for app_name, (_, exe) in close_matches.items()}
+
+    def __persist_scan_cache(self):
+        if self._scan_cache.changed:
+            self._save_scan_cache(self._scan_cache.data)
+            self._scan_cache.changed = False
+
+    async def _run_off_loop(self, fn: Callable[..., T], *args) -> T:
+        """Runs blocking filesystem operation in the finder's thread pool"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    @staticmethod
+    def _list_dirs(path: Union[str, os.PathLike]) -> Tuple[str, List[str]]:
+        """Lists subdirectories names of `path`. Unreadable paths are treated as empty."""
+        root = os.fspath(path)
+        try:
+            with os.scandir(root) as it:
+                return root, [entry.name for entry in it if entry.is_dir()]
+        except OSError as e:
+            logging.warning(f'Cannot scan {root}: {repr(e)}')
+            return root, []
+
+    async def __scan(
+        self, root: str, dirs: List[str], candidates: Set[str], descended: List[str], similarity: float
+    ) -> AsyncGenerator[Tuple[str, pathlib.PurePath, pathlib.Path], None]:
         """One level depth search generator for application execs based on similarity with candidate names.
-        :param path:        root dir of which subdirectories will be scanned
+        :param root:        root dir of which subdirectories will be scanned
+        :param dirs:        names of subdirectories of `root`
         :param candidates:  set of app names used for exact and close matching with directory names
+        :param descended:   list extended with directories searched for executables
         :param similarity:  cutoff level for difflib.get_close_matches; set 1 for exact matching only
-        :yields:            2-el. tuple of app_name and executable
+        :yields:            3-el. tuple of app_name, its directory and executable
         """
-        root, dirs, _ = next(os.walk(path))
         logging.debug(f'New scan - similarity: {similarity}, candidates: {list(candidates)}')
         for dir_name in dirs:
             await asyncio.sleep(0)
             matches = self.get_close_matches(dir_name, candidates, similarity)
             for app_name in matches:
                 dir_path = pathlib.PurePath(root) / dir_name
-                best_exe = self.find_best_exe(dir_path, app_name)
+                descended.append(str(dir_path))
+                best_exe = await self._run_off_loop(self.find_best_exe, dir_path, app_name)
                 if best_exe is None:
                     logging.warning('No executable found, moving to next best matched app')
                     continue
                 candidates.remove(app_name)
-                yield app_name, pathlib.Path(best_exe)
+                yield app_name, dir_path, pathlib.Path(best_exe)
                 break
 
     def _get_close_matches(self, dir_name: str, candidates: Set[str], similarity: float) -> List[str]:
-        """Wrapper around difflib.get_close_matches"""
-        matches_ = difflib.get_close_matches(dir_name, candidates, cutoff=similarity)
-        matches = cast(List[str], matches_)  # as str is Sequence[str] - mypy/issues/5090
+        """Equivalent of difflib.get_close_matches using prebuilt index of owned titles"""
+        matches = self._title_index.get_close_matches(dir_name, candidates, similarity)
         if matches:
             logging.info(f'found close ({similarity}) matches for {dir_name}: {matches}')
         return matches
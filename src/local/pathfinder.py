@@ -16,12 +16,10 @@ class PathFinder:
         if not folder.exists():
             raise FileNotFoundError(f'Pathfinder: {path} does not exist')
         execs: List[str] = []
-        for root, _, files in os.walk(folder):
-            for path in files:
-                whole_path = os.path.join(root, path)
-                if self.is_exe(whole_path):
-                    execs.append(whole_path)
-            break
+        with os.scandir(folder) as it:
+            for entry in it:
+                if not entry.is_dir() and self.is_exe(entry.path):
+                    execs.append(entry.path)
         return execs
 
     def is_exe(self, path: str) -> bool:
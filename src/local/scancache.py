@@ -0,0 +1,95 @@
+import os
+import hashlib
+import logging
+import pathlib
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+
+class ScanCache:
+    """Result of the last folders scan together with mtimes of every directory it depends on:
+    search roots (subfolders added, removed or renamed) and each subfolder descended for executables.
+    Stored as plain dict to be kept in plugin's persistent cache; `changed` flags it needs saving.
+    Methods touching filesystem are blocking and meant to be run outside of event loop.
+    """
+    VERSION = 1
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        if not data or data.get('version') != self.VERSION:
+            data = {}
+        self._data = data
+        self.changed = False
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        return self._data
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    @staticmethod
+    def _titles_digest(titles: Iterable[str]) -> str:
+        return hashlib.sha1('\n'.join(sorted(titles)).encode()).hexdigest()
+
+    def lookup(
+        self,
+        roots: Iterable[str],
+        titles: Iterable[str],
+        find_best_exe: Callable[[pathlib.PurePath, str], Any]
+    ) -> Optional[Dict[str, pathlib.Path]]:
+        """Returns cached mapping of titles to executables or None if full rescan is needed.
+        Matched directories that changed or lost their executable are descended again.
+        """
+        data = self._data
+        if not data or data['titles'] != self._titles_digest(titles):
+            return None
+        if data['roots'] != {root: self._mtime(root) for root in roots}:
+            return None
+
+        matched_dirs = {match['dir']: title for title, match in data['matches'].items()}
+        result = {}
+        for dir_path, mtime in data['dirs'].items():
+            title = matched_dirs.get(dir_path)
+            changed = self._mtime(dir_path) != mtime
+            if title is None:
+                if changed:  # executable may have appeared in previously rejected directory
+                    return None
+                continue
+            exe = data['matches'][title]['exe']
+            if changed or not os.path.exists(exe):
+                logging.debug(f'Scan cache: descending again into {dir_path}')
+                best_exe = find_best_exe(pathlib.PurePath(dir_path), title)
+                if best_exe is None:
+                    return None
+                exe = str(best_exe)
+                data['dirs'][dir_path] = self._mtime(dir_path)
+                data['matches'][title]['exe'] = exe
+                self.changed = True
+            result[title] = pathlib.Path(exe)
+        return result
+
+    def store(
+        self,
+        roots: Iterable[str],
+        titles: Iterable[str],
+        descended: Iterable[str],
+        matches: Dict[str, Tuple[pathlib.PurePath, pathlib.Path]]
+    ):
+        """
+        :param descended:  all directories searched for executables during the scan
+        :param matches:    mapping of found titles to their directories and executables
+        """
+        self._data = {
+            'version': self.VERSION,
+            'titles': self._titles_digest(titles),
+            'roots': {root: self._mtime(root) for root in roots},
+            'dirs': {dir_path: self._mtime(dir_path) for dir_path in descended},
+            'matches': {
+                title: {'dir': str(dir_path), 'exe': str(exe)}
+                for title, (dir_path, exe) in matches.items()
+            },
+        }
+        self.changed = True
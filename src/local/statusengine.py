@@ -0,0 +1,158 @@
+import time
+import asyncio
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import psutil
+from galaxy.api.types import LocalGameState
+
+from local.localgame import LocalHumbleGame
+
+
+@dataclass
+class SamplerStats:
+    """Syscall counters of LocalStatusEngine; `last_tick` is the number of syscalls made by the latest poll"""
+    ticks: int = 0
+    pids_calls: int = 0
+    status_calls: int = 0
+    exists_calls: int = 0
+    last_tick: int = 0
+
+    @property
+    def syscalls(self) -> int:
+        return self.pids_calls + self.status_calls + self.exists_calls
+
+    @property
+    def syscalls_per_tick(self) -> float:
+        if not self.ticks:
+            return 0.0
+        return self.syscalls / self.ticks
+
+    def __str__(self):
+        return (
+            f'ticks: {self.ticks}, syscalls: {self.syscalls} ({self.syscalls_per_tick:.2f}/tick, last: {self.last_tick}); '
+            f'pids: {self.pids_calls}, status: {self.status_calls}, exists: {self.exists_calls}'
+        )
+
+
+class LocalStatusEngine:
+    """Batched local games state sampler.
+
+    Running processes are checked against a single `psutil.pids()` snapshot taken per poll.
+    Executables existence is checked on adaptive cadence: the interval doubles up to
+    EXISTS_INTERVAL_MAX while nothing changes and is reset on any change or when a change is expected.
+    Newly seen games are always checked immediately.
+    Polling is fast only when some game process is tracked, otherwise it waits for the next existence check
+    or explicit `wake`.
+    """
+    POLL_INTERVAL = 0.5
+    EXISTS_INTERVAL_MIN = 2.0
+    EXISTS_INTERVAL_MAX = 30.0
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._states: Dict[str, LocalGameState] = {}
+        self._installed: Dict[str, bool] = {}
+        self._exists_interval = self.EXISTS_INTERVAL_MIN
+        self._next_exists_check = 0.0
+        self._any_running = False
+        self._wake_event: Optional[asyncio.Event] = None
+        self.stats = SamplerStats()
+
+    def poll(self, games: Iterable[LocalHumbleGame]) -> List[Tuple[str, LocalGameState]]:
+        """Samples state of all `games`. Returns only real transitions as (game_id, new_state) pairs."""
+        games = list(games)
+        syscalls_before = self.stats.syscalls
+        now = self._clock()
+        check_all = now >= self._next_exists_check
+
+        tracked = [game for game in games if game.process is not None]
+        pids: Set[int] = set()
+        if tracked:
+            pids = set(psutil.pids())
+            self.stats.pids_calls += 1
+
+        changes = []
+        installation_changed = False
+        for game in games:
+            if check_all or game.id not in self._installed:
+                installed = game.executable.exists()
+                self.stats.exists_calls += 1
+                if self._installed.get(game.id, installed) != installed:
+                    installation_changed = True
+                self._installed[game.id] = installed
+
+            state = LocalGameState.Installed if self._installed[game.id] else LocalGameState.None_
+            if game.process is not None and self._is_running(game, pids):
+                state |= LocalGameState.Running
+            if state != self._states.get(game.id):
+                self._states[game.id] = state
+                changes.append((game.id, state))
+
+        if len(self._installed) > len(games):  # forget games removed from the list
+            ids = {game.id for game in games}
+            for game_id in self._installed.keys() - ids:
+                del self._installed[game_id]
+                self._states.pop(game_id, None)
+
+        if check_all:
+            if installation_changed:
+                self._exists_interval = self.EXISTS_INTERVAL_MIN
+            else:
+                self._exists_interval = min(2 * self._exists_interval, self.EXISTS_INTERVAL_MAX)
+            self._next_exists_check = now + self._exists_interval
+        self._any_running = any(game.process is not None for game in tracked)
+
+        self.stats.ticks += 1
+        self.stats.last_tick = self.stats.syscalls - syscalls_before
+        return changes
+
+    def _is_running(self, game: LocalHumbleGame, pids: Set[int]) -> bool:
+        process = game.process
+        if process is None or process.pid not in pids:
+            game.process = None
+            return False
+        self.stats.status_calls += 2
+        try:
+            # is_running compares process creation time, so pid reused by another process is not taken for the game
+            if not process.is_running():
+                game.process = None
+                return False
+            status = process.status()
+        except psutil.NoSuchProcess:
+            game.process = None
+            return False
+        if status == psutil.STATUS_ZOMBIE:
+            process.wait()
+            game.process = None
+            return False
+        return True
+
+    @property
+    def next_poll_in(self) -> float:
+        if self._any_running:
+            return self.POLL_INTERVAL
+        return max(self.POLL_INTERVAL, self._next_exists_check - self._clock())
+
+    def _get_wake_event(self) -> asyncio.Event:
+        if self._wake_event is None:  # created lazily to bind with running loop
+            self._wake_event = asyncio.Event()
+        return self._wake_event
+
+    async def sleep(self):
+        """Waits until next poll is due or `wake` is called"""
+        event = self._get_wake_event()
+        try:
+            await asyncio.wait_for(event.wait(), self.next_poll_in)
+        except asyncio.TimeoutError:
+            pass
+        event.clear()
+
+    def wake(self, expect_change: bool = False):
+        """Triggers poll without waiting, e.g. after game launch.
+        :param expect_change:  reset existence check cadence as installation state is about to change
+        """
+        if expect_change:
+            self._exists_interval = self.EXISTS_INTERVAL_MIN
+            self._next_exists_check = self._clock()
+        self._get_wake_event().set()
@@ -0,0 +1,90 @@
+import math
+import heapq
+import difflib
+from collections import Counter
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+Token = Tuple[str, int]
+
+
+def _tokens(text: str) -> List[Token]:
+    """Characters multiset as set of (char, occurence number) pairs"""
+    return [(char, i) for char, count in Counter(text).items() for i in range(count)]
+
+
+class TitleIndex:
+    """Candidates index for `difflib.get_close_matches` that gives exactly the same results.
+
+    difflib scores only strings passing `quick_ratio`, that is having at least
+    `t = cutoff * (len(a) + len(b)) / 2` common characters (as multisets).
+    Titles are indexed by their characters multisets. If title shares at least `t` characters
+    with a word, it has to contain one of any `len(word) - t + 1` characters of the word
+    (prefix filtering). The rarest characters of the word are used to get the candidates.
+    """
+    def __init__(self, titles: Iterable[str] = ()):
+        self._titles: Set[str] = set()
+        self._postings: Dict[Token, Set[str]] = {}
+        self._lengths: Counter = Counter()
+        self.update(titles)
+
+    def __contains__(self, title: str) -> bool:
+        return title in self._titles
+
+    def update(self, titles: Iterable[str]):
+        """Incrementally makes index content equal to `titles`"""
+        titles = set(titles)
+        for title in self._titles - titles:
+            for token in _tokens(title):
+                self._postings[token].discard(title)
+            self._lengths[len(title)] -= 1
+        for title in titles - self._titles:
+            for token in _tokens(title):
+                self._postings.setdefault(token, set()).add(title)
+            self._lengths[len(title)] += 1
+        self._titles = titles
+
+    @staticmethod
+    def _length_ratio(la: int, lb: int) -> float:
+        """Mirrors SequenceMatcher.real_quick_ratio computation"""
+        length = la + lb
+        if length:
+            return 2.0 * min(la, lb) / length
+        return 1.0
+
+    def _prune(self, word: str, candidates: Set[str], cutoff: float) -> Set[str]:
+        """Returns candidates that may pass difflib's `real_quick_ratio` and `quick_ratio` checks"""
+        not_indexed = {c for c in candidates if c not in self._titles}
+        lw = len(word)
+        lengths = [l for l, cnt in self._lengths.items() if cnt > 0 and self._length_ratio(l, lw) >= cutoff]
+        if not lengths:
+            return not_indexed
+        if lw == 0 or cutoff <= 0:
+            return set(candidates)
+
+        # minimal number of common characters for the shortest allowed title; floor to stay on the safe side
+        min_common = math.floor(cutoff * (lw + min(lengths)) / 2)
+        prefix_size = lw - min_common + 1
+        if prefix_size > lw:
+            return set(candidates)
+        word_tokens = sorted(_tokens(word), key=lambda tok: len(self._postings.get(tok, ())))
+        pruned = not_indexed
+        allowed_lengths = set(lengths)
+        for token in word_tokens[:prefix_size]:
+            for title in self._postings.get(token, ()):
+                if len(title) in allowed_lengths and title in candidates:
+                    pruned.add(title)
+        return pruned
+
+    def get_close_matches(self, word: str, candidates: Set[str], cutoff: float, n: int = 3) -> List[str]:
+        """The same as `difflib.get_close_matches(word, candidates, n, cutoff)`"""
+        if cutoff == 1.0:
+            return [word] if word in candidates else []
+        result = []
+        s = difflib.SequenceMatcher()
+        s.set_seq2(word)
+        for x in self._prune(word, candidates, cutoff):
+            s.set_seq1(x)
+            if s.real_quick_ratio() >= cutoff and s.quick_ratio() >= cutoff and s.ratio() >= cutoff:
+                result.append((s.ratio(), x))
+        return [x for _, x in heapq.nlargest(n, result)]
@@ -9,9 +9,14 @@ class DownloadStructItem():
     name: str: Optional[str]  # asmjs downloads have no 'name'
     uploaded_at: Optional[str]  # ex.: 2019-07-10T21:48:11.976780
     """
+    __slots__ = ('_data', 'url', 'name', 'web', 'bittorrent')
+
     def __init__(self, data: dict):
         self._data = data
-        self.url = data.get('url')
+        self.url: Optional[dict] = data.get('url')
+        self.name: Optional[str] = data.get('name')
+        self.web: Optional[str] = None if self.url is None else self.url['web']
+        self.bittorrent: Optional[str] = None if self.url is None else self.url.get('bittorrent')
 
     def __str__(self):
         return f"<{self.__class__.__name__}> '{self.name}'"
@@ -19,22 +24,6 @@ class DownloadStructItem():
     def __repr__(self):
         return f"{self}: {self._data}"
 
-    @property
-    def name(self) -> Optional[str]:
-        return self._data.get('name')
-
-    @property
-    def web(self) -> Optional[str]:
-        if self.url is None:
-            return None
-        return self.url['web']
-
-    @property
-    def bittorrent(self) -> Optional[str]:
-        if self.url is None:
-            return None
-        return self.url.get('bittorrent')
-
     @property
     def human_size(self) -> str:
         return self._data['human_size']
@@ -47,27 +36,24 @@ class TroveDownload(DownloadStructItem):
     machine_name: str
     size: str
     """
+    __slots__ = ('machine_name',)
+
+    def __init__(self, data: dict):
+        super().__init__(data)
+        self.machine_name: str = data['machine_name']
+
     @property
     def human_size(self) -> str:
         return self._data['size']
 
-    @property
-    def machine_name(self) -> str:
-        return self._data['machine_name']
-
 
 class SubproductDownload():
+    __slots__ = ('_data', 'machine_name', 'download_struct')
+
     def __init__(self, data: dict):
         self._data = data
-        self._download_struct = [
+        self.machine_name: str = data['machine_name']
+        self.download_struct: List[DownloadStructItem] = [
             DownloadStructItem(x)
             for x in data['download_struct']
         ]
-
-    @property
-    def machine_name(self) -> str:
-        return self._data['machine_name']
-
-    @property
-    def download_struct(self) -> List[DownloadStructItem]:
-        return self._download_struct
@@ -1,6 +1,6 @@
 import abc
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, FrozenSet, Tuple
 
 from galaxy.api.types import Game, LicenseType, LicenseInfo, SubscriptionGame
 
@@ -9,23 +9,46 @@ from model.download import TroveDownload, SubproductDownload
 
 
 class HumbleGame(abc.ABC):
+    """Game data is parsed once on init. Raw data is kept only in `_data`."""
+    __slots__ = ('_data', '_human_name', '_machine_name', '_downloads', '_platforms')
+    _HUMAN_NAME_KEY = 'human_name'
+
     def __init__(self, data: dict):
         self._data = data
+        self._human_name: str = data[self._HUMAN_NAME_KEY]
+        self._machine_name: str = data['machine_name']
+        self._downloads: Dict[HP, Any] = self._parse_downloads()
+        self._platforms: FrozenSet[HP] = frozenset(self._downloads)
 
-    @abc.abstractproperty
-    def downloads(self) -> Dict[HP, Any]:
+    @abc.abstractmethod
+    def _parse_downloads(self) -> Dict[HP, Any]:
         pass
 
+    def _parse_platform(self, platform: str) -> Optional[HP]:
+        try:
+            return HP(platform)
+        except (TypeError, ValueError) as e:
+            logging.warning(e, extra={'game': self._data})
+            return None
+
+    @property
+    def downloads(self) -> Dict[HP, Any]:
+        return self._downloads
+
+    @property
+    def platforms(self) -> FrozenSet[HP]:
+        return self._platforms
+
     def os_compatibile(self, os: HP) -> bool:
-        return os in self.downloads
+        return os in self._platforms
 
     @property
     def human_name(self) -> str:
-        return self._data['human_name']
+        return self._human_name
 
     @property
     def machine_name(self) -> str:
-        return self._data['machine_name']
+        return self._machine_name
 
     def in_galaxy_format(self):
         dlcs = []  # not supported for now
@@ -38,50 +61,49 @@ class HumbleGame(abc.ABC):
     def __str__(self):
         return f"<{self.__class__.__name__}> {self.human_name} : {self.machine_name}"
 
+    def _identity(self) -> Tuple:
+        return (self.machine_name, self.human_name, self._platforms)
+
     def __eq__(self, other):
         if not isinstance(other, self.__class__):
             return False
-        return self._data == other._data
+        return self._identity() == other._identity()
+
+    def __hash__(self):
+        return hash(self._identity())
 
 
 class TroveGame(HumbleGame):
-    @property
-    def downloads(self) -> Dict[HP, TroveDownload]:
+    __slots__ = ()
+    _HUMAN_NAME_KEY = 'human-name'
+
+    def _parse_downloads(self) -> Dict[HP, TroveDownload]:
         result = {}
-        for k, v in self._data['downloads'].items():
-            try:
-                os_ = HP(k)
-            except TypeError as e:
-                logging.warning(e, extra={'game': self._data})
-            else:
+        for k, v in self._data.get('downloads', {}).items():
+            os_ = self._parse_platform(k)
+            if os_ is not None:
                 result[os_] = TroveDownload(v)
         return result
 
-    @property
-    def human_name(self):
-        return self._data['human-name']
-
     def in_galaxy_format(self):
         return SubscriptionGame(game_title=self.human_name, game_id=self.machine_name)
 
     def serialize(self):
         return {
             'human-name': self._data['human-name'],
-            'machine_name': self.data['machine_name'],
-            'downloads': self._data['downloads']
+            'machine_name': self._data['machine_name'],
+            'downloads': self._data.get('downloads', {})
         }
 
 
 class Subproduct(HumbleGame):
-    @property
-    def downloads(self) -> Dict[HP, SubproductDownload]:
+    __slots__ = ()
+
+    def _parse_downloads(self) -> Dict[HP, SubproductDownload]:
         result = {}
         for dw in self._data['downloads']:
-            try:
-                os_ = HP(dw['platform'])
-            except TypeError as e:
-                logging.warning(e, extra={'game': self._data})
-            else:
+            os_ = self._parse_platform(dw['platform'])
+            if os_ is not None:
                 result[os_] = SubproductDownload(dw)
         return result
 
@@ -92,8 +114,13 @@ class Subproduct(HumbleGame):
 
 
 class Key(HumbleGame):
-    @property
-    def downloads(self):
+    __slots__ = ('_key_val',)
+
+    def __init__(self, data: dict):
+        super().__init__(data)
+        self._key_val: Optional[str] = data.get('redeemed_key_val')
+
+    def _parse_downloads(self):
         """No downloads for keys"""
         return {}
 
@@ -117,7 +144,10 @@ class Key(HumbleGame):
     @property
     def key_val(self) -> Optional[str]:
         """If returned value is None - the key was not revealed yet"""
-        return self._data.get('redeemed_key_val')
+        return self._key_val
+
+    def _identity(self) -> Tuple:
+        return (self.machine_name, self.human_name, self._key_val)
 
     @property
     def key_games(self) -> List['KeyGame']:
@@ -136,22 +166,19 @@ class Key(HumbleGame):
 
 class KeyGame(Key):
     """One key can represent multiple games listed in key.human_name"""
+    __slots__ = ()
+
     def __init__(self, key: Key, game_id: str, game_name: str):
-        self._game_name = game_name
-        self._game_id = game_id
         super().__init__(key._data)
+        self._machine_name = game_id
+        self._human_name = self._add_key_identity(game_name, self.key_type_human_name)
 
-    @property
-    def human_name(self):
+    @staticmethod
+    def _add_key_identity(game_name: str, key_type: str) -> str:
         """Uses heuristics to add key identity if not already present.
         The heuristics may be wrong but it is not very harmfull."""
-        key_type = super().key_type_human_name
         keywords = [" Key", key_type]
         for keyword in keywords:
-            if keyword in self._game_name:
-                return self._game_name
-        return f'{self._game_name} ({key_type})'
-
-    @property
-    def machine_name(self):
-        return self._game_id
+            if keyword in game_name:
+                return game_name
+        return f'{game_name} ({key_type})'
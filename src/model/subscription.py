@@ -1,5 +1,6 @@
 import typing as t
 import datetime
+from dataclasses import dataclass
 
 from model.game import Key
 from model.types import HP, DeliveryMethod
@@ -169,7 +170,7 @@ class ContentChoiceOptions:
     def remained_choices(self) -> int:
         if self._content_choices_made is None:
             return self.MAX_CHOICES
-        return self.MAX_CHOICES - len(self._content_choices_made)
+        return self.MAX_CHOICES - len(self.content_choices_made)
 
 
 class MontlyContentData:
@@ -246,3 +247,13 @@ class ChoiceContentData:
         except KeyError:
             return None
         return datetime.datetime.fromisoformat(iso)
+
+
+@dataclass
+class ChoiceMonthContext:
+    """Subscription games context of a single Choice month with its content prefetched if available.
+    `closed_month` is cached content of past month, if no more choices can be made in it.
+    """
+    month: ChoiceMonth
+    content: t.Optional[ChoiceContentData] = None
+    closed_month: t.Optional[dict] = None
@@ -0,0 +1,149 @@
+import json
+import zlib
+import base64
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, MutableMapping, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class JsonCodec:
+    """Plain JSON; format of cache entries written by plugin versions before CompactCodec"""
+    def encode(self, value: Any) -> str:
+        return json.dumps(value)
+
+    def decode(self, text: str) -> Any:
+        return json.loads(text)
+
+
+class CompactCodec(JsonCodec):
+    """Compact JSON deflated with a preset dictionary, as base64 text with a versioned prefix: `z<version>:`.
+
+    The preset dictionary works as a string table shared by all entries: keys and values repeated
+    in every order and trove game (field names, platforms, download urls) cost a few bits
+    even in small, separately stored entries. Values shorter than MIN_SIZE are kept as plain JSON.
+    Any entry without the prefix is decoded as JSON, so caches of previous versions are read as they are.
+    Add new dictionary under the next version instead of changing existing one.
+
+    Decoding an entry costs more than `json.loads` (inflate comes on top of parsing), so big entries should be
+    decoded on first use rather than in handshake. What is paid in handshake is parsing of the Galaxy message
+    carrying the whole cache, which is much faster for short base64 strings than for escaped JSON ones.
+    See benchmarks/bench_cache_codec.py.
+    """
+    MIN_SIZE = 128
+    _DICTIONARIES = {
+        1: (
+            b'"key_type":"steam","key_type_human_name":"Steam","redeemed_key_val":"'
+            b'"choices_remaining":0,"category":"subscriptioncontent","category":"bundle","category":"storefront",'
+            b'{"tpkd_dict":{"all_tpks":[{"machine_name":"","human_name":"","key_type":"'
+            b'{"human-name":"","machine_name":"","downloads":{"windows":{"machine_name":"_windows","name":"Download",'
+            b'"url":{"web":".zip"},"file_size":,"small":0,"md5":""},"mac":{"machine_name":"_mac","name":"Download",'
+            b'"url":{"web":".dmg"},"file_size":,"small":0,"md5":""},"linux":{"machine_name":"_linux","name":"Download",'
+            b'"url":{"web":".tar.gz"},"file_size":,"small":0,"md5":""}}}'
+            b'{"gamekey":"","product":{"machine_name":"","human_name":"","category":"bundle"},"subproducts":[{'
+            b'"machine_name":"","human_name":"","downloads":[{"machine_name":"_linux","platform":"linux","download_struct":'
+            b'[{"name":"Download","url":{"web":"https://dl.humble.com/","bittorrent":"https://dl.humble.com/torrents/'
+            b'.torrent?gamekey=&ttl=&t="},"human_size":" MB"}]},{"machine_name":"_mac","platform":"mac","download_struct":'
+            b'[{"name":"Download","url":{"web":"https://dl.humble.com/","bittorrent":"https://dl.humble.com/torrents/'
+            b'.torrent?gamekey=&ttl=&t="},"human_size":" MB"}]},{"machine_name":"_windows","platform":"windows",'
+            b'"download_struct":[{"name":"Download","url":{"web":"https://dl.humble.com/",'
+            b'"bittorrent":"https://dl.humble.com/torrents/.torrent?gamekey=&ttl=&t="},"human_size":" GB"}]}]}]}'
+        ),
+    }
+    VERSION = max(_DICTIONARIES)
+
+    def encode(self, value: Any) -> str:
+        text = json.dumps(value, separators=(',', ':'))
+        if len(text) < self.MIN_SIZE:
+            return text
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zdict=self._DICTIONARIES[self.VERSION])
+        data = compressor.compress(text.encode()) + compressor.flush()
+        return f'z{self.VERSION}:' + base64.b64encode(data).decode('ascii')
+
+    def decode(self, text: str) -> Any:
+        if not text.startswith('z'):  # JSON value never starts with "z"
+            return json.loads(text)
+        version, _, payload = text.partition(':')
+        try:
+            zdict = self._DICTIONARIES[int(version[1:])]
+        except (KeyError, ValueError):
+            raise ValueError(f'Unknown cache entry format: {version}')
+        decompressor = zlib.decompressobj(zdict=zdict)
+        data = decompressor.decompress(base64.b64decode(payload)) + decompressor.flush()
+        return json.loads(data.decode())  # str is parsed faster than bytes
+
+
+class DeltaCache:
+    """Write-back layer over Galaxy `persistent_cache` (mapping of str to str).
+    Saved values are kept in memory and marked dirty. Only dirty entries are serialized
+    on flush, which is debounced, so bursts of updates end with a single `push`.
+    """
+    _DELETED = object()
+
+    def __init__(
+        self,
+        storage: MutableMapping[str, str],
+        push: Callable[[], None],
+        debounce: float = 2.0,
+        codec: Optional[JsonCodec] = None
+    ):
+        self._storage = storage
+        self._codec = codec or JsonCodec()
+        self._push = push
+        self._debounce = debounce
+        self._dirty: Dict[str, Any] = {}
+        self._flush_handle: Optional[asyncio.Handle] = None
+
+    @property
+    def dirty_keys(self) -> List[str]:
+        return list(self._dirty)
+
+    def load(self, key: str, default: Any = None) -> Any:
+        if key in self._dirty:
+            value = self._dirty[key]
+            return default if value is self._DELETED else value
+        if key in self._storage:
+            return self._codec.decode(self._storage[key])
+        return default
+
+    def keys(self, prefix: str = '') -> List[str]:
+        """Keys of existing entries including not flushed yet, in stable order: stored ones first, then new ones"""
+        keys = dict.fromkeys(k for k in self._storage if k.startswith(prefix))
+        for k, v in self._dirty.items():
+            if not k.startswith(prefix):
+                continue
+            if v is self._DELETED:
+                keys.pop(k, None)
+            else:
+                keys[k] = None
+        return list(keys)
+
+    def save(self, key: str, value: Any):
+        self._dirty[key] = value
+        self._schedule_flush()
+
+    def delete(self, key: str):
+        self._dirty[key] = self._DELETED
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_event_loop().call_later(self._debounce, self.flush)
+
+    def flush(self):
+        """Serializes dirty entries and pushes them at once"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._dirty:
+            return
+        logger.debug(f'Flushing cache entries: {list(self._dirty)}')
+        for key, value in self._dirty.items():
+            if value is self._DELETED:
+                self._storage.pop(key, None)
+            else:
+                self._storage[key] = self._codec.encode(value)
+        self._dirty.clear()
+        self._push()
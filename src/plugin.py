@@ -1,37 +1,40 @@
 import sys
+import time
 import platform
 import asyncio
 import logging
 import re
 import datetime
-import webbrowser
+import functools
+import itertools
 import pathlib
 import json
 import typing as t
-from functools import partial
-from distutils.version import LooseVersion  # pylint: disable=no-name-in-module,import-error
 
 sys.path.insert(0, str(pathlib.PurePath(__file__).parent / 'modules'))
 
-import sentry_sdk
-from sentry_sdk.integrations.logging import LoggingIntegration
+import psutil
 from galaxy.api.plugin import Plugin, create_and_run_plugin
 from galaxy.api.consts import Platform, OSCompatibility
 from galaxy.api.types import Authentication, NextStep, LocalGame, GameLibrarySettings, Subscription, SubscriptionGame
 from galaxy.api.errors import AuthenticationRequired, UnknownError
 
-from consts import IS_WINDOWS
+from consts import IS_WINDOWS, OPTIONS_MODE
 from settings import Settings
 from webservice import AuthorizedHumbleAPI
 from model.game import TroveGame, Key, Subproduct, HumbleGame
 from model.types import HP
-from model.subscription import ChoiceMonth
+from model.subscription import ChoiceMonth, ChoiceMonthContext, ChoiceContentData
 from humbledownloader import HumbleDownloadResolver
 from library import LibraryResolver
+from registry import GameRegistry
+from persistence import DeltaCache, CompactCodec
 from local import AppFinder
+from local.statusengine import LocalStatusEngine
 from privacy import SensitiveFilter
+import tracing
+from utils.fetcher import FetchScheduler
 from utils.decorators import double_click_effect
-from gui.options import OPTIONS_MODE
 import guirunner as gui
 
 
@@ -41,33 +44,72 @@ with open(pathlib.Path(__file__).parent / 'manifest.json') as f:
 logger = logging.getLogger()
 logger.addFilter(SensitiveFilter())
 
-sentry_logging = LoggingIntegration(
-    level=logging.INFO,
-    event_level=logging.ERROR
-)
-sentry_sdk.init(
-    dsn="https://76abb44bffbe45998dd304898327b718@sentry.io/1764525",
-    integrations=[sentry_logging],
-    release=f"hb-galaxy@{__version__}"
-)
+SENTRY_DSN: t.Optional[str] = "https://76abb44bffbe45998dd304898327b718@sentry.io/1764525"
+_sentry_initialized = False
+
+
+def init_sentry():
+    """Error reporting is set up after the handshake, as importing sentry_sdk is a noticeable part of startup"""
+    global _sentry_initialized
+    if _sentry_initialized:
+        return
+    _sentry_initialized = True
+    import sentry_sdk
+    from sentry_sdk.integrations.logging import LoggingIntegration
+    sentry_logging = LoggingIntegration(
+        level=logging.INFO,
+        event_level=logging.ERROR
+    )
+    sentry_sdk.init(
+        dsn=SENTRY_DSN,
+        integrations=[sentry_logging],
+        release=f"hb-galaxy@{__version__}"
+    )
+
+
+def first_response(fn):
+    """Records `first_response` startup metric when any of the decorated request handlers returns (or raises)
+    for the first time. Decorate handlers of requests Galaxy may send first after handshake:
+    `get_local_games` (usually the first one), `authenticate` and the following ones.
+    """
+    @functools.wraps(fn)
+    async def wrap(self, *args, **kwargs):
+        try:
+            return await fn(self, *args, **kwargs)
+        finally:
+            self._record_first_response()
+    return wrap
 
 
 class HumbleBundlePlugin(Plugin):
+    SUBSCRIPTION_FETCH_CONCURRENCY = 5
+    SUBSCRIPTION_FETCH_RATE = 5.0  # requests per second
+    TRACES_FILE_NAME = 'galaxy-hb-traces.jsonl'
+    TRACE_HISTOGRAMS_INTERVAL = 300  # seconds
+
     def __init__(self, reader, writer, token):
         super().__init__(Platform.HumbleBundle, __version__, reader, writer, token)
         self._api = AuthorizedHumbleAPI()
         self._download_resolver = HumbleDownloadResolver()
         self._app_finder = AppFinder()
         self._settings = Settings()
+        self._update_tracing()
         self._library_resolver = None
+        self._cache_store: t.Optional[DeltaCache] = None
         self._subscription_months: List[ChoiceMonth] = []
+        self._closed_choice_months: t.Dict[str, dict] = {}  # immutable content of past months by machine_name
+        self._month_fetcher = FetchScheduler(
+            concurrency=self.SUBSCRIPTION_FETCH_CONCURRENCY,
+            rate=self.SUBSCRIPTION_FETCH_RATE,
+            retries=0  # transient failures are already retried per request by AuthorizedHumbleAPI
+        )
 
-        self._owned_games: Dict[str, HumbleGame] = {}
-        self._trove_games: Dict[str, TroveGame] = {}
+        self._games = GameRegistry(sources=['owned', 'trove'])  # trove games take precedence
+        self._installable_titles: t.Tuple[int, t.Dict[str, str]] = (-1, {})
         self._choice_games = {}  # for now model.subscription.ChoiceContet or Extras TODO consider adding to model.game
 
         self._local_games = {}
-        self._cached_game_states = {}
+        self._status_engine = LocalStatusEngine()
 
         self._getting_owned_games = asyncio.Lock()
         self._owned_check: asyncio.Task = asyncio.create_task(asyncio.sleep(8))
@@ -77,33 +119,138 @@ class HumbleBundlePlugin(Plugin):
         self._rescan_needed = True
         self._under_installation = set()
 
+        self.startup_metrics: t.Dict[str, float] = {}  # in seconds; `first_response` is counted from process start
+
     @property
-    def _humble_games(self) -> t.Dict[str, HumbleGame]:
-        """Alias for cached owned and subscription games mapped by id"""
-        return {
-            **self._owned_games,
-            **self._trove_games
-        }
+    def _humble_games(self) -> GameRegistry:
+        """Owned and subscription games mapped by id"""
+        return self._games
+
+    @property
+    def _owned_games(self) -> t.Dict[str, HumbleGame]:
+        return self._games.source('owned')
+
+    @_owned_games.setter
+    def _owned_games(self, games: t.Dict[str, HumbleGame]):
+        self._games.set_source('owned', games)
+
+    @property
+    def _trove_games(self) -> t.Dict[str, TroveGame]:
+        return self._games.source('trove')
+
+    @_trove_games.setter
+    def _trove_games(self, games: t.Dict[str, TroveGame]):
+        self._games.set_source('trove', games)
+
+    _LIBRARY_ORDER_PREFIX = 'library_order_'
+    _LIBRARY_META_PREFIX = 'library_meta_'
+
+    @property
+    def _store(self) -> DeltaCache:
+        if self._cache_store is None:
+            raise RuntimeError('Persistent cache is not available before handshake_complete')
+        return self._cache_store
 
     def _save_cache(self, key: str, data: t.Any):
-        data = json.dumps(data)
-        self.persistent_cache[key] = data
-        self.push_cache()
+        self._store.save(key, data)
 
     def _load_cache(self, key: str, default: t.Any=None) -> t.Any:
-        if key in self.persistent_cache:
-            return json.loads(self.persistent_cache[key])
-        return default
+        return self._store.load(key, default)
+
+    def _save_shards(self, prefix: str, entries: dict, changed: t.Iterable[str]):
+        for gamekey in changed:
+            if gamekey in entries:
+                self._save_cache(prefix + gamekey, entries[gamekey])
+            else:
+                self._store.delete(prefix + gamekey)
+
+    def _save_library_cache(self, cache: dict, changed_orders: t.Iterable[str], changed_metas: t.Iterable[str] = ()):
+        """Library cache is sharded: every order and its metadata are stored as separate entries.
+        The `library` entry keeps the rest, with gamekeys in order of fetching; it is rewritten only when that changes.
+        """
+        metas = cache.get('orders_meta', {})
+        self._save_shards(self._LIBRARY_ORDER_PREFIX, cache.get('orders', {}), changed_orders)
+        self._save_shards(self._LIBRARY_META_PREFIX, metas, changed_metas)
+        header = {k: v for k, v in cache.items() if k not in ('orders', 'orders_meta')}
+        header['gamekeys'] = list(metas)
+        if header != self._load_cache('library'):
+            self._save_cache('library', header)
+
+    def _load_library_cache(self) -> dict:
+        cache = dict(self._load_cache('library', {}))
+        if 'orders' in cache:  # migration from not sharded cache
+            self._save_library_cache(cache, cache['orders'], cache.get('orders_meta', {}))
+            return cache
+        if 'orders_meta' in cache:  # migration from metadata kept in single entry
+            self._save_library_cache(cache, [], cache['orders_meta'])
+        elif 'gamekeys' in cache:
+            gamekeys = cache.pop('gamekeys')
+            metas = {gamekey: self._load_cache(self._LIBRARY_META_PREFIX + gamekey) for gamekey in gamekeys}
+            cache['orders_meta'] = {gamekey: meta for gamekey, meta in metas.items() if meta is not None}
+        shards = [key[len(self._LIBRARY_ORDER_PREFIX):] for key in self._store.keys(self._LIBRARY_ORDER_PREFIX)]
+        # keep the order of fetching as games with the same title are deduplicated by the first one
+        position = {gamekey: i for i, gamekey in enumerate(cache.get('orders_meta', {}))}
+        shards.sort(key=lambda gamekey: position.get(gamekey, len(position)))
+        cache['orders'] = {
+            gamekey: self._load_cache(self._LIBRARY_ORDER_PREFIX + gamekey)
+            for gamekey in shards
+        }
+        return cache
+
+    def _load_trove_games(self) -> t.Dict[str, TroveGame]:
+        games = {}
+        for raw in self._load_cache('trove_games', []):
+            try:
+                game = TroveGame(raw)
+            except Exception as e:
+                logging.warning(f'Skipping not parsable cached trove game: {repr(e)}')
+                continue
+            games[game.machine_name] = game
+        return games
+
+    def _update_tracing(self):
+        if not self._settings.debug.has_changed():
+            return
+        if self._settings.debug.tracing:
+            path = self._settings.LOCAL_CONFIG_FILE.parent / self.TRACES_FILE_NAME
+            try:
+                tracing.tracer.enable(tracing.FileExporter(path))
+            except OSError as e:
+                logging.error(f'Cannot enable tracing to {path}: {repr(e)}')
+            else:
+                logging.info(f'Tracing enabled; exporting to {path}')
+        else:
+            tracing.tracer.disable()
+
+    @staticmethod
+    def _since_process_start() -> float:
+        return time.time() - psutil.Process().create_time()
+
+    def _record_first_response(self):
+        if 'first_response' in self.startup_metrics:
+            return
+        self.startup_metrics['first_response'] = self._since_process_start()
+        logging.info(f'Startup metrics: {self.startup_metrics}')
 
     def handshake_complete(self):
+        """Cached library and trove games are decoded when needed for the first time, not here"""
+        start = time.perf_counter()
+        self._cache_store = DeltaCache(self.persistent_cache, self.push_cache, codec=CompactCodec())
         self._last_version = self._load_cache('last_version', default=None)
-        self._trove_games = {g.machine_name: g for g in self._load_cache('trove_games', [])}
+        self._games.set_source_loader('trove', self._load_trove_games)
+        self._closed_choice_months = self._load_cache('choice_months', {})
         self._library_resolver = LibraryResolver(
             api=self._api,
             settings=self._settings.library,
-            cache=self._load_cache('library', {}),
-            save_cache_callback=partial(self._save_cache, 'library')
+            cache=self._load_library_cache,
+            save_cache_callback=self._save_library_cache
+        )
+        self._app_finder.set_scan_cache(
+            self._load_cache('scan_cache', {}),
+            save_cache_callback=lambda data: self._save_cache('scan_cache', data)
         )
+        self.startup_metrics['handshake_complete'] = time.perf_counter() - start
+        asyncio.get_event_loop().call_soon(init_sentry)
 
     async def _fetch_marketing_data(self) -> t.Optional[str]:
         try:
@@ -113,6 +260,7 @@ class HumbleBundlePlugin(Plugin):
         except KeyError:  # extra safety as this data is not crucial
             return None
 
+    @first_response
     async def authenticate(self, stored_credentials=None):
         show_news = self.__is_after_minor_update()
         self._save_cache('last_version', __version__)
@@ -134,6 +282,7 @@ class HumbleBundlePlugin(Plugin):
             self._open_config(OPTIONS_MODE.NEWS)
         return Authentication(user_id, user_email or user_id)
 
+    @first_response
     async def pass_login_credentials(self, step, credentials, cookies):
         auth_cookie = next(filter(lambda c: c['name'] == '_simpleauth_sess', cookies))
         user_id = await self._api.authenticate(auth_cookie)
@@ -143,18 +292,22 @@ class HumbleBundlePlugin(Plugin):
         return Authentication(user_id, user_email or user_id)
 
     def __is_after_minor_update(self) -> bool:
-        def cut_to_minor(ver: str) -> LooseVersion:
-            """3 part version assumed"""
-            return LooseVersion(ver.rsplit('.', 1)[0])
+        def cut_to_minor(ver: str) -> t.Tuple[int, ...]:
+            """3 part version assumed; numeric prefix of each part is compared"""
+            return tuple(int(''.join(itertools.takewhile(str.isdigit, part)) or 0) for part in ver.split('.')[:2])
         return self._last_version is None \
             or cut_to_minor(__version__) > cut_to_minor(self._last_version)
 
+    @first_response
+    @tracing.traced()
     async def get_owned_games(self):
         if not self._api.is_authenticated:
             raise AuthenticationRequired()
 
         async with self._getting_owned_games:
             logging.debug('getting owned games')
+            # library cache is loaded here anyway; connections are warmed up while order list is requested
+            self._api.start_warm_up(self._library_resolver.expected_fetches())
             self._owned_games = await self._library_resolver()
             return [g.in_galaxy_format() for g in self._owned_games.values()]
 
@@ -181,6 +334,7 @@ class HumbleBundlePlugin(Plugin):
         active_month_content = await self._api.get_choice_content_data(active_month_path)
         return active_month_content.user_subscription_plan
 
+    @tracing.traced()
     async def get_subscriptions(self):
         subscriptions: List[Subscription] = []
         active_content_unlocked = False
@@ -222,13 +376,16 @@ class HumbleBundlePlugin(Plugin):
     async def _get_trove_games(self):
         def parse_and_cache(troves):
             games: List[SubscriptionGame] = []
-            for trove in troves:
-                try:
-                    trove_game = TroveGame(trove)
-                    games.append(trove_game.in_galaxy_format())
-                    self._trove_games[trove_game.machine_name] = trove_game
-                except Exception as e:
-                    logging.warning(f"Error while parsing trove {repr(e)}: {trove}", extra={'data': trove})
+            parsed: t.Dict[str, TroveGame] = {}
+            with tracing.span('build', games=len(troves)):
+                for trove in troves:
+                    try:
+                        trove_game = TroveGame(trove)
+                        games.append(trove_game.in_galaxy_format())
+                        parsed[trove_game.machine_name] = trove_game
+                    except Exception as e:
+                        logging.warning(f"Error while parsing trove {repr(e)}: {trove}", extra={'data': trove})
+                self._games.update_source('trove', parsed)
             return games
 
         newly_added = (await self._api.get_montly_trove_data()).get('newlyAdded', [])
@@ -237,24 +394,49 @@ class HumbleBundlePlugin(Plugin):
         async for troves in self._api.get_trove_details():
             yield parse_and_cache(troves)
 
-    async def prepare_subscription_games_context(self, subscription_names) -> t.Dict[str, ChoiceMonth]:
-        name_url = {}
+    @tracing.traced()
+    async def prepare_subscription_games_context(self, subscription_names) -> t.Dict[str, ChoiceMonthContext]:
+        """Prefetches content of all requested Choice months concurrently. Closed months are taken from cache."""
+        context = {}
         for month in self._subscription_months:
-            name_url[self._normalize_subscription_name(month.machine_name)] = month
-        return name_url
+            closed_month = None if month.is_active else self._closed_choice_months.get(month.machine_name)
+            context[self._normalize_subscription_name(month.machine_name)] = ChoiceMonthContext(month, closed_month=closed_month)
 
-    async def get_subscription_games(self, subscription_name, context: t.Dict[str, ChoiceMonth]):
+        to_fetch = [
+            name for name in subscription_names
+            if name in context and context[name].closed_month is None
+        ]
+        results, errors = await self._month_fetcher.run(
+            lambda name: self._api.get_choice_content_data(context[name].month.last_url_part),
+            to_fetch
+        )
+        for name, content in results.items():
+            context[name].content = content
+        if errors:
+            logging.warning(f'Prefetching of choice months failed: {errors}; will be fetched again on demand')
+        logging.info(f'Prefetching choice months: {self._month_fetcher.last_stats}')
+        return context
+
+    @tracing.traced()
+    async def get_subscription_games(self, subscription_name, context: t.Dict[str, ChoiceMonthContext]):
         if subscription_name == "Humble Trove":
             async for troves in self._get_trove_games():
                 yield troves
             return
 
-        month: ChoiceMonth = context[subscription_name]
-        choice_data = await self._api.get_choice_content_data(month.last_url_part)
+        month_context = context[subscription_name]
+        month = month_context.month
+        if month_context.closed_month is not None:
+            yield self._closed_month_games(month_context.closed_month)
+            return
+
+        choice_data: ChoiceContentData = month_context.content \
+            or await self._api.get_choice_content_data(month.last_url_part)
         cco = choice_data.content_choice_options
         show_all = cco.remained_choices > 0
-        if month.is_active:
-            start_time = choice_data.active_content_start.timestamp()
+        active_content_start = choice_data.active_content_start
+        if month.is_active and active_content_start is not None:
+            start_time = active_content_start.timestamp()
         else:
             start_time = None  # TODO assume first friday of month
 
@@ -268,12 +450,29 @@ class HumbleBundlePlugin(Plugin):
             for extr in cco.extrases
         ]
         month_choice_games = content_choices + extrases
+        if not month.is_active and cco.remained_choices <= 0:
+            self._closed_choice_months[month.machine_name] = {
+                'content_choices': [[g.game_title, g.game_id] for g in content_choices],
+                'extras': [[g.game_title, g.game_id] for g in extrases],
+            }
+            self._save_cache('choice_months', self._closed_choice_months)
+        elif self._closed_choice_months.pop(month.machine_name, None) is not None:  # choices left - not closed
+            self._save_cache('choice_months', self._closed_choice_months)
         yield month_choice_games
 
-    async def subscription_games_import_complete(self):
-        sub_games_raw_data = [game.serialize() for game in self._trove_games.values]
+    @staticmethod
+    def _closed_month_games(closed_month: dict) -> t.List[SubscriptionGame]:
+        """Past months have no start time"""
+        return [
+            SubscriptionGame(title, game_id)
+            for title, game_id in closed_month['content_choices'] + closed_month['extras']
+        ]
+
+    def subscription_games_import_complete(self):
+        sub_games_raw_data = [game.serialize() for game in self._trove_games.values()]
         self._save_cache('trove_games', sub_games_raw_data)
 
+    @first_response
     async def get_local_games(self):
         self._rescan_needed = True
         return [g.in_galaxy_format() for g in self._local_games.values()]
@@ -290,8 +489,16 @@ class HumbleBundlePlugin(Plugin):
             self._settings.save_config()
             self._settings.open_config_file()
 
-    @double_click_effect(timeout=0.5, effect='_open_config')
     async def install_game(self, game_id):
+        if isinstance(self._humble_games.get(game_id), Key):
+            gui.prepare()  # key page is shown after double click delay; worker starts in the meantime
+        await self._install_game(game_id)
+
+    @double_click_effect(timeout=0.5, effect='_open_config')
+    @tracing.traced('install_game')
+    async def _install_game(self, game_id):
+        import webbrowser
+
         if game_id in self._under_installation:
             return
 
@@ -354,6 +561,7 @@ class HumbleBundlePlugin(Plugin):
             logging.error(e, extra={'local_games': self._local_games})
         else:
             game.run()
+            self._status_engine.wake()
 
     async def uninstall_game(self, game_id):
         try:
@@ -362,6 +570,7 @@ class HumbleBundlePlugin(Plugin):
             logging.error(e, extra={'local_games': self._local_games})
         else:
             game.uninstall()
+            self._status_engine.wake(expect_change=True)
 
     async def get_os_compatibility(self, game_id: str, context: t.Any) -> t.Optional[OSCompatibility]:
         try:
@@ -384,15 +593,31 @@ class HumbleBundlePlugin(Plugin):
 
     async def _check_owned(self):
         async with self._getting_owned_games:
-            old_ids = self._owned_games.keys()
-            self._owned_games = await self._library_resolver(only_cache=True)
-            for old_id in old_ids - self._owned_games.keys():
-                self.remove_game(old_id)
-            for new_id in self._owned_games.keys() - old_ids:
-                self.add_game(self._owned_games[new_id].in_galaxy_format())
+            with tracing.span('check_owned'):
+                old_ids = self._owned_games.keys()
+                self._owned_games = await self._library_resolver(only_cache=True)
+                with tracing.span('notify'):
+                    for old_id in old_ids - self._owned_games.keys():
+                        self.remove_game(old_id)
+                    for new_id in self._owned_games.keys() - old_ids:
+                        self.add_game(self._owned_games[new_id].in_galaxy_format())
         # increased throttle to protect Galaxy from quick & heavy library changes
         await asyncio.sleep(3)
 
+    def _get_installable_titles(self) -> t.Dict[str, str]:
+        """Maps human_name to id of games downloadable for current OS; rebuilt only when games change"""
+        version, titles = self._installable_titles
+        if version != self._games.version:
+            installable = self._games.by_platform(HP.WINDOWS if IS_WINDOWS else HP.MAC)
+            # on the same title the later source wins, i.e. trove games take precedence over owned ones
+            titles = {
+                self._games[uid].human_name: uid
+                for uid in self._games.ordered()
+                if uid in installable
+            }
+            self._installable_titles = (self._games.version, titles)
+        return titles
+
     async def _check_installed(self):
         """
         Owned games are needed to local games search. Galaxy methods call order is:
@@ -403,18 +628,17 @@ class HumbleBundlePlugin(Plugin):
             logging.debug('Skipping perdiodic check for local games as owned/subscription games not found yet.')
             return
 
-        hp = HP.WINDOWS if IS_WINDOWS else HP.MAC
-        installable_title_id = {
-            game.human_name: uid for uid, game
-            in self._humble_games.items()
-            if not isinstance(game, Key) and game.os_compatibile(hp)
-        }
-        if self._rescan_needed:
-            self._rescan_needed = False
-            logging.debug(f'Checking installed games with path scanning in: {self._settings.installed.search_dirs}')
-            self._local_games = await self._app_finder(installable_title_id, self._settings.installed.search_dirs)
-        else:
-            self._local_games.update(await self._app_finder(installable_title_id, None))
+        with tracing.span('check_installed', rescan=self._rescan_needed):
+            installable_title_id = self._get_installable_titles()
+            known_ids = set(self._local_games)
+            if self._rescan_needed:
+                self._rescan_needed = False
+                logging.debug(f'Checking installed games with path scanning in: {self._settings.installed.search_dirs}')
+                self._local_games = await self._app_finder(installable_title_id, self._settings.installed.search_dirs)
+            else:
+                self._local_games.update(await self._app_finder(installable_title_id, None))
+        if self._local_games.keys() - known_ids:
+            self._status_engine.wake()
         await asyncio.sleep(4)
 
     async def _check_statuses(self):
@@ -424,17 +648,18 @@ class HumbleBundlePlugin(Plugin):
         - launched (via Galaxy - pid tracking started)
         - stopped (process no longer running/is zombie)
         """
-        freezed_locals = list(self._local_games.values())
-        for game in freezed_locals:
-            state = game.state
-            if state == self._cached_game_states.get(game.id):
-                continue
-            self.update_local_game_status(LocalGame(game.id, state))
-            self._cached_game_states[game.id] = state
-        await asyncio.sleep(0.5)
+        with tracing.span('check_statuses'):
+            changes = self._status_engine.poll(self._local_games.values())
+            if changes:
+                with tracing.span('notify'):
+                    for game_id, state in changes:
+                        self.update_local_game_status(LocalGame(game_id, state))
+        await self._status_engine.sleep()
 
     def tick(self):
         self._settings.reload_config_if_changed()
+        self._update_tracing()
+        tracing.tracer.export_histograms(self.TRACE_HISTOGRAMS_INTERVAL)
 
         if self._owned_check.done() and self._settings.library.has_changed():
             self._owned_check = self.create_task(self._check_owned(), 'check owned')
@@ -451,7 +676,11 @@ class HumbleBundlePlugin(Plugin):
     async def shutdown(self):
         self._statuses_check.cancel()
         self._installed_check.cancel()
+        if self._cache_store is not None:
+            self._cache_store.flush()
         await self._api.close_session()
+        await gui.close()
+        tracing.tracer.export_histograms()
 
 
 def main():
@@ -29,8 +29,8 @@ class SensitiveFilter(logging.Filter):
         elif isinstance(msg, Key):
             if self.KEY in msg._data:
                 data_copy = copy.deepcopy(msg._data)
+                data_copy[self.KEY] = self.SECRET
                 msg = Key(data_copy)  # key clone to not edit original data
-                msg._data[self.KEY] = self.SECRET
         elif type(msg) == str:
             reg = r'((?:[A-Z0-9?]{3,8}-){2,6}[A-Z0-9?]{3,8})(?P<end>[\s\,\"]?)'
             msg = re.sub(reg, rf'{self.SECRET}\g<end>', msg, flags=re.IGNORECASE)
@@ -0,0 +1,127 @@
+import re
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterator, List, Set, Iterable
+
+from model.game import HumbleGame
+from model.types import HP
+
+
+def normalize_title(title: str) -> str:
+    """Lowercased title with punctuation and repeated whitespaces removed"""
+    return ' '.join(re.sub(r'[^\w\s]', ' ', title.lower()).split())
+
+
+class GameRegistry(Mapping):
+    """Incrementally maintained mapping of game id to game merged from named sources.
+    On id conflicts, the game from the source listed later in `sources` wins.
+    Keeps secondary indexes by platform and by normalized title.
+    `version` is bumped on every change so derived data can be cached by consumers.
+    Source content may be given as a loader, called on the first access to the registry.
+    """
+    def __init__(self, sources: Iterable[str]):
+        self._priority: List[str] = list(sources)
+        self._sources: Dict[str, Dict[str, HumbleGame]] = {name: {} for name in self._priority}
+        self._games: Dict[str, HumbleGame] = {}
+        self._by_platform: Dict[HP, Set[str]] = {}
+        self._by_title: Dict[str, Set[str]] = {}
+        self._loaders: Dict[str, Callable[[], Dict[str, HumbleGame]]] = {}
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        self._load()
+        return self._version
+
+    def __getitem__(self, game_id: str) -> HumbleGame:
+        self._load()
+        return self._games[game_id]
+
+    def __iter__(self) -> Iterator[str]:
+        self._load()
+        return iter(self._games)
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._games)
+
+    def ordered(self) -> Iterator[str]:
+        """Game ids source after source in `sources` order, each once where it first appears.
+        Unlike iteration over the registry, the order is the same across runs.
+        """
+        self._load()
+        seen: Set[str] = set()
+        for name in self._priority:
+            for game_id in self._sources[name]:
+                if game_id not in seen:
+                    seen.add(game_id)
+                    yield game_id
+
+    def source(self, name: str) -> Dict[str, HumbleGame]:
+        """Games of given source. Returned dict should not be modified directly."""
+        self._load()
+        return self._sources[name]
+
+    def set_source_loader(self, name: str, loader: Callable[[], Dict[str, HumbleGame]]):
+        """Replaces all games of given source with result of `loader` called when the registry is accessed"""
+        self._loaders[name] = loader
+
+    def _load(self):
+        while self._loaders:
+            name, loader = self._loaders.popitem()
+            self._set_source(name, loader())
+
+    def set_source(self, name: str, games: Dict[str, HumbleGame]):
+        """Replaces all games of given source"""
+        self._loaders.pop(name, None)
+        self._load()
+        self._set_source(name, games)
+
+    def _set_source(self, name: str, games: Dict[str, HumbleGame]):
+        old = self._sources[name]
+        self._sources[name] = dict(games)
+        self._refresh(old.keys() | games.keys())
+
+    def update_source(self, name: str, games: Dict[str, HumbleGame]):
+        """Adds or replaces games in given source"""
+        self._load()
+        self._sources[name].update(games)
+        self._refresh(games.keys())
+
+    def by_platform(self, platform: HP) -> Set[str]:
+        self._load()
+        return self._by_platform.get(platform, set())
+
+    def by_title(self, title: str) -> Set[str]:
+        self._load()
+        return self._by_title.get(normalize_title(title), set())
+
+    def _resolve(self, game_id: str):
+        for name in reversed(self._priority):
+            game = self._sources[name].get(game_id)
+            if game is not None:
+                return game
+        return None
+
+    def _refresh(self, game_ids: Iterable[str]):
+        for game_id in game_ids:
+            old = self._games.get(game_id)
+            new = self._resolve(game_id)
+            if old is new:
+                continue
+            if old is not None:
+                self._unindex(game_id, old)
+                del self._games[game_id]
+            if new is not None:
+                self._games[game_id] = new
+                self._index(game_id, new)
+            self._version += 1
+
+    def _index(self, game_id: str, game: HumbleGame):
+        for platform in game.downloads:
+            self._by_platform.setdefault(platform, set()).add(game_id)
+        self._by_title.setdefault(normalize_title(game.human_name), set()).add(game_id)
+
+    def _unindex(self, game_id: str, game: HumbleGame):
+        for platform in game.downloads:
+            self._by_platform[platform].discard(game_id)
+        self._by_title[normalize_title(game.human_name)].discard(game_id)
@@ -93,6 +93,23 @@ class InstalledSettings(UpdateTracker):
         }
 
 
+@dataclass
+class DebugSettings(UpdateTracker):
+    tracing: bool = False
+
+    def _update(self, debug):
+        tracing = debug.get('tracing')
+        if tracing is not None and type(tracing) != bool:
+            raise TypeError(f'tracing should be boolean (true or false), got {tracing}')
+        if tracing is not None:
+            self.tracing = tracing
+
+    def serialize(self) -> Dict[str, Any]:
+        return {
+            "tracing": self.tracing
+        }
+
+
 class Settings:
     DEFAULT_CONFIG_FILE = pathlib.Path(__file__).parent / 'config.ini'  # deprecated
 
@@ -106,9 +123,11 @@ class Settings:
 
         self._library = LibrarySettings()
         self._installed = InstalledSettings()
+        self._debug = DebugSettings()
         if suppress_initial_change:
             self._library.has_changed()
             self._installed.has_changed()
+            self._debug.has_changed()
 
         self._config: Dict[str, Any] = self.get_config()
 
@@ -122,6 +141,10 @@ class Settings:
     def installed(self) -> InstalledSettings:
         return self._installed
 
+    @property
+    def debug(self) -> DebugSettings:
+        return self._debug
+
     def open_config_file(self):
         logger.info('Opening config file')
         if IS_WINDOWS:
@@ -168,12 +191,17 @@ class Settings:
     def _update_objects(self):
         self._library.update(self._config.get('library', {}))
         self._installed.update(self._config.get('installed', {}))
+        self._debug.update(self._config.get('debug', {}))
 
     def get_config(self):
-        return {
+        config = {
             "library": self.library.serialize(),
             "installed": self.installed.serialize()
         }
+        debug = self.debug.serialize()
+        if debug != DebugSettings().serialize():  # section is kept out of users config until set
+            config["debug"] = debug
+        return config
 
     def _get_config_file_comments(self) -> str:
         """Loads comments from old config.ini file.
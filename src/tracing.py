@@ -0,0 +1,244 @@
+import json
+import time
+import bisect
+import inspect
+import logging
+import pathlib
+import functools
+import contextvars
+from logging.handlers import RotatingFileHandler
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+# upper bounds of histogram buckets in milliseconds; the last bucket is unbounded
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+
+
+class Histogram:
+    """Latency histogram with fixed buckets; percentiles are upper bounds of the bucket they fall in"""
+    __slots__ = ('_bounds', 'counts', 'count', 'total', 'max')
+
+    def __init__(self, bounds: Sequence[float] = BUCKETS_MS):
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0  # ms
+        self.max = 0.0  # ms
+
+    def record(self, seconds: float):
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(self._bounds, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(self._bounds[i], self.max) if i < len(self._bounds) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total / self.count, 3) if self.count else 0.0,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'max_ms': round(self.max, 3),
+            'buckets_ms': dict(zip([*map(str, self._bounds), 'inf'], self.counts)),
+        }
+
+    def __str__(self):
+        return (
+            f'{self.count} calls, avg {self.total / max(self.count, 1):.1f}ms, '
+            f'p50 {self.percentile(50):.0f}ms, p95 {self.percentile(95):.0f}ms, max {self.max:.0f}ms'
+        )
+
+
+class Span:
+    __slots__ = ('name', 'attrs', 'start', 'duration', 'children')
+
+    def __init__(self, name: str, attrs: Dict[str, Any], start: float):
+        self.name = name
+        self.attrs = attrs
+        self.start = start
+        self.duration = 0.0
+        self.children: List['Span'] = []
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self, origin: Optional[float] = None) -> Dict[str, Any]:
+        """Times in ms; `offset_ms` of nested spans is counted from start of the root one"""
+        origin = self.start if origin is None else origin
+        return {
+            'name': self.name,
+            'offset_ms': round((self.start - origin) * 1000, 3),
+            'duration_ms': round(self.duration * 1000, 3),
+            **({'attrs': self.attrs} if self.attrs else {}),
+            **({'children': [c.to_dict(origin) for c in self.children]} if self.children else {}),
+        }
+
+
+class _NoopSpan:
+    """Returned when tracing is disabled, so instrumented code does nothing but a single call"""
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar('current_span', default=None)
+
+
+class _SpanScope:
+    __slots__ = ('_tracer', '_span', '_parent', '_token')
+
+    def __init__(self, tracer: 'Tracer', name: str, attrs: Dict[str, Any]):
+        self._tracer = tracer
+        self._span = Span(name, attrs, tracer.clock())
+        self._parent = _current_span.get()
+        self._token: 'contextvars.Token[Optional[Span]]'  # set on enter
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self._span.attrs['error'] = exc_type.__name__
+        self._tracer._finish(self._span, self._parent)
+        return False
+
+
+class FileExporter:
+    """Writes JSON lines to a file rotated by size"""
+    def __init__(self, path: pathlib.Path, max_bytes: int = 1024 * 1024, backup_count: int = 3):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+
+    def export(self, record: Dict[str, Any]):
+        self._handler.emit(logging.makeLogRecord({'msg': json.dumps(record)}))
+
+    def close(self):
+        self._handler.close()
+
+
+class Tracer:
+    """Nested timing spans with per-name latency histograms.
+    Disabled (no exporter) tracer hands out a no-op span, so instrumentation is practically free.
+    Finished root spans are exported with their children; histograms on `export_histograms`.
+    The current span is kept in a context variable, so spans of concurrent tasks nest correctly.
+    """
+    def __init__(self, exporter: Optional[FileExporter] = None, clock: Callable[[], float] = time.perf_counter):
+        self._exporter = exporter
+        self.clock = clock
+        self.histograms: Dict[str, Histogram] = {}
+        self._histograms_exported_at = clock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._exporter is not None
+
+    def enable(self, exporter: FileExporter):
+        self.disable()
+        self._exporter = exporter
+        self._histograms_exported_at = self.clock()
+
+    def disable(self):
+        if self._exporter is not None:
+            self.export_histograms()
+            self._exporter.close()
+            self._exporter = None
+
+    def span(self, name: str, **attrs):
+        """Context manager timing the enclosed block as a child of the current span"""
+        if self._exporter is None:
+            return _NOOP_SPAN
+        return _SpanScope(self, name, attrs)
+
+    def _finish(self, span: Span, parent: Optional[Span]):
+        span.duration = self.clock() - span.start
+        histogram = self.histograms.get(span.name)
+        if histogram is None:
+            histogram = self.histograms[span.name] = Histogram()
+        histogram.record(span.duration)
+        if parent is not None:
+            parent.children.append(span)
+        elif self._exporter is not None:
+            self._exporter.export({'span': span.to_dict()})
+
+    def export_histograms(self, interval: Optional[float] = None):
+        """Exports histograms collected so far; with `interval` only if that many seconds passed since last time"""
+        if self._exporter is None or not self.histograms:
+            return
+        now = self.clock()
+        if interval is not None and now - self._histograms_exported_at < interval:
+            return
+        self._histograms_exported_at = now
+        self._exporter.export({'histograms': {name: h.to_dict() for name, h in self.histograms.items()}})
+
+    def traced(self, name: Optional[str] = None):
+        """Decorator running whole coroutine or async generator function in a span named after it.
+
+        Tracing is switched in runtime (see `enable`), so the wrapper stays in place when disabled.
+        It then costs an extra coroutine frame per call, or an extra generator step per yielded item:
+        well under a microsecond each, so decorate request-level functions, not tight inner loops.
+        """
+        def _wrapper(fn):
+            span_name = name or fn.__name__
+            if inspect.isasyncgenfunction(fn):
+                @functools.wraps(fn)
+                async def wrap_gen(*args, **kwargs):
+                    if self._exporter is None:
+                        async for item in fn(*args, **kwargs):
+                            yield item
+                        return
+                    parent = _current_span.get()
+                    span = Span(span_name, {}, self.clock())
+                    gen = fn(*args, **kwargs)
+                    try:
+                        while True:
+                            # the span is current only while the generator runs, not while caller consumes items
+                            token = _current_span.set(span)
+                            try:
+                                item = await gen.__anext__()
+                            except StopAsyncIteration:
+                                return
+                            finally:
+                                _current_span.reset(token)
+                            yield item
+                    except Exception as e:
+                        span.attrs['error'] = type(e).__name__
+                        raise
+                    finally:
+                        await gen.aclose()
+                        self._finish(span, parent)
+                return wrap_gen
+
+            @functools.wraps(fn)
+            async def wrap(*args, **kwargs):
+                if self._exporter is None:
+                    return await fn(*args, **kwargs)
+                with self.span(span_name):
+                    return await fn(*args, **kwargs)
+            return wrap
+        return _wrapper
+
+
+tracer = Tracer()  # disabled until the plugin enables it; shared by all instrumented modules
+span = tracer.span
+traced = tracer.traced
@@ -0,0 +1,213 @@
+import time
+import random
+import asyncio
+import logging
+import collections
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Sequence, Tuple, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+def backoff_delay(attempt: int, backoff: float, max_backoff: float) -> float:
+    """Exponential backoff with "equal jitter": half of the delay is fixed, half is random"""
+    delay = min(max_backoff, backoff * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class TokenBucket:
+    """Asynchronous token bucket: allows `rate` operations per second with bursts up to `capacity`."""
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError(f'rate has to be positive, got {rate}')
+        self._rate = rate
+        self._capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self._capacity
+        self._last = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._last) * self._rate)
+        self._last = now
+
+    async def acquire(self):
+        if self._lock is None:  # created lazily to bind with running loop
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+                self._refill()
+            self._tokens -= 1
+
+
+@dataclass
+class FetchStats:
+    """Summary of a single FetchScheduler run"""
+    requested: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    retries: int = 0
+    elapsed: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def throughput(self) -> float:
+        """Successful fetches per second"""
+        if not self.elapsed:
+            return 0.0
+        return self.succeeded / self.elapsed
+
+    @property
+    def mean_latency(self) -> float:
+        if not self.latencies:
+            return 0.0
+        return sum(self.latencies) / len(self.latencies)
+
+    @property
+    def max_latency(self) -> float:
+        return max(self.latencies, default=0.0)
+
+    def percentile_latency(self, percent: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def __str__(self):
+        return (
+            f'{self.succeeded}/{self.requested} ok, {self.failed} failed, {self.retries} retries '
+            f'in {self.elapsed:.2f}s ({self.throughput:.1f}/s); '
+            f'latency mean: {self.mean_latency:.3f}s, p95: {self.percentile_latency(95):.3f}s, max: {self.max_latency:.3f}s'
+        )
+
+
+class FetchScheduler:
+    """Runs `fetch(key)` for many keys with bounded concurrency and rate limit.
+    Failed keys are requeued with jittered exponential backoff up to `retries` times.
+    """
+    def __init__(
+        self,
+        concurrency: int = 10,
+        rate: float = 10.0,
+        retries: int = 2,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        should_retry: Callable[[Exception], bool] = lambda _: True
+    ):
+        if concurrency < 1:
+            raise ValueError(f'concurrency has to be at least 1, got {concurrency}')
+        self.concurrency = concurrency
+        self._bucket = TokenBucket(rate)
+        self._retries = retries
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._should_retry = should_retry
+        self.last_stats: Optional[FetchStats] = None
+
+    def _backoff_delay(self, attempt: int) -> float:
+        return backoff_delay(attempt, self._backoff, self._max_backoff)
+
+    async def run(
+        self,
+        fetch: Callable[[Hashable], Awaitable[Any]],
+        keys: Sequence[Hashable]
+    ) -> Tuple[Dict[Hashable, Any], Dict[Hashable, Exception]]:
+        """
+        :param fetch:   coroutine function called with each key
+        :param keys:    unique keys to be fetched
+        :returns:       2-el. tuple of successful results and final errors, both mapped by key
+        """
+        stats = FetchStats(requested=len(keys))
+        self.last_stats = stats
+        results: Dict[Hashable, Any] = {}
+        errors: Dict[Hashable, Exception] = {}
+        if not keys:
+            return results, errors
+
+        loop = asyncio.get_event_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        for key in keys:
+            queue.put_nowait((key, 0))
+        remaining = len(keys)
+        all_done = asyncio.Event()
+        requeue_handles: List[asyncio.TimerHandle] = []
+
+        def finish():
+            nonlocal remaining
+            remaining -= 1
+            if remaining == 0:
+                all_done.set()
+
+        async def worker():
+            while True:
+                key, attempt = await queue.get()
+                await self._bucket.acquire()
+                start = time.monotonic()
+                try:
+                    result = await fetch(key)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    stats.latencies.append(time.monotonic() - start)
+                    if attempt < self._retries and self._should_retry(e):
+                        delay = self._backoff_delay(attempt)
+                        logger.debug(f'Fetching {key} failed with {repr(e)}. Retry #{attempt + 1} in {delay:.2f}s')
+                        stats.retries += 1
+                        requeue_handles.append(loop.call_later(delay, queue.put_nowait, (key, attempt + 1)))
+                    else:
+                        stats.failed += 1
+                        errors[key] = e
+                        finish()
+                else:
+                    stats.latencies.append(time.monotonic() - start)
+                    stats.succeeded += 1
+                    results[key] = result
+                    finish()
+
+        start_time = time.monotonic()
+        workers = [asyncio.ensure_future(worker()) for _ in range(min(self.concurrency, len(keys)))]
+        try:
+            await all_done.wait()
+        finally:
+            for handle in requeue_handles:
+                handle.cancel()
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            stats.elapsed = time.monotonic() - start_time
+        return results, errors
+
+
+async def prefetch_pages(
+    fetch: Callable[[int], Awaitable[T]],
+    is_last: Callable[[T], bool],
+    start: int = 0,
+    window: int = 4
+) -> AsyncGenerator[T, None]:
+    """Yields pages `fetch(start)`, `fetch(start + 1)`, ... in order, keeping up to `window` requests in flight.
+    Stops before the first page for which `is_last` is true; speculative requests beyond it are cancelled.
+    The first error is propagated after cancelling all pending requests.
+    """
+    if window < 1:
+        raise ValueError(f'window has to be at least 1, got {window}')
+    pending: Deque[asyncio.Future] = collections.deque()
+    next_index = start
+    try:
+        while True:
+            while len(pending) < window:
+                pending.append(asyncio.ensure_future(fetch(next_index)))
+                next_index += 1
+            page = await pending.popleft()
+            if is_last(page):
+                return
+            yield page
+    finally:
+        for future in pending:
+            future.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
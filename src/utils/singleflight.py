@@ -0,0 +1,108 @@
+import time
+import asyncio
+import functools
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+
+T = TypeVar('T')
+
+
+@dataclass
+class FlightStats:
+    calls: int = 0
+    executed: int = 0
+    coalesced: int = 0  # joined already running call
+    memo_hits: int = 0
+
+    @property
+    def saved(self) -> int:
+        return self.coalesced + self.memo_hits
+
+    def __str__(self):
+        return f'{self.executed}/{self.calls} executed; {self.coalesced} coalesced, {self.memo_hits} from memo'
+
+
+class SingleFlight:
+    """Runs concurrent calls sharing the same key only once; every caller gets the same result.
+    Successful results are memoized for `ttl` seconds, errors are not. Expired results are dropped
+    when new one is stored, so memo holds only results of the last `ttl` seconds.
+    Cancelling one caller does not cancel the shared call for the others; it is cancelled with the last one.
+    """
+    def __init__(self, ttl: float = 0.0, clock: Callable[[], float] = time.monotonic):
+        self._ttl = ttl
+        self._clock = clock
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._waiters: Dict[asyncio.Future, int] = {}
+        self._memo: Dict[Hashable, Tuple[float, Any]] = {}  # in order of expiration as ttl is the same for all
+        self.stats = FlightStats()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        self.stats.calls += 1
+        memoized = self._memo.get(key)
+        if memoized is not None:
+            expires, result = memoized
+            if self._clock() < expires:
+                self.stats.memo_hits += 1
+                return result
+            del self._memo[key]
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats.coalesced += 1
+        else:
+            self.stats.executed += 1
+            future = asyncio.ensure_future(fn())
+            self._in_flight[key] = future
+            future.add_done_callback(functools.partial(self._finished, key))
+        self._waiters[future] = self._waiters.get(future, 0) + 1
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if self._waiters[future] == 1:
+                future.cancel()  # nobody waits for the result anymore
+            raise
+        finally:
+            self._waiters[future] -= 1
+            if not self._waiters[future]:
+                del self._waiters[future]
+
+    def _finished(self, key: Hashable, future: asyncio.Future):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if future.cancelled() or future.exception() is not None:
+            return
+        if self._ttl > 0:
+            now = self._clock()
+            self._memo.pop(key, None)
+            self._memo[key] = (now + self._ttl, future.result())
+            self._prune(now)
+
+    def _prune(self, now: float):
+        expired = []
+        for key, (expires, _) in self._memo.items():
+            if expires > now:
+                break
+            expired.append(key)
+        for key in expired:
+            del self._memo[key]
+
+    def forget(self, key: Optional[Hashable] = None):
+        """Drops memoized result for `key` or all of them; calls in flight are not affected"""
+        if key is None:
+            self._memo.clear()
+        else:
+            self._memo.pop(key, None)
+
+
+def single_flight(attr: str):
+    """Decorator of asynchronious methods that coalesces calls with the same arguments
+    using `SingleFlight` instance stored in `attr` attribute of the class instance.
+    """
+    def _wrapper(fn):
+        @functools.wraps(fn)
+        async def wrap(self, *args, **kwargs):
+            key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+            return await getattr(self, attr).do(key, lambda: fn(self, *args, **kwargs))
+        return wrap
+    return _wrapper
@@ -0,0 +1,60 @@
+import json
+from typing import Any, List, Optional
+
+
+class WebpackJsonExtractor:
+    """Incrementally finds `<script id="webpack_id" type="application/json">` in HTML fed chunk by chunk
+    and decodes only JSON embedded in it. Bytes before the script are not buffered
+    (apart from the tail that may contain part of the marker) and nothing after it is needed.
+    """
+    _END = b'</script>'
+
+    def __init__(self, webpack_id: str):
+        self._webpack_id = webpack_id
+        self._start = f'<script id="{webpack_id}" type="application/json">'.encode()
+        self._tail = b''
+        self._parts: Optional[List[bytes]] = None
+        self._result: Any = None
+        self.done = False
+        self.bytes_fed = 0
+
+    def feed(self, chunk: bytes) -> bool:
+        """Returns True when JSON was found and decoded, so the rest of the stream may be ignored."""
+        if self.done:
+            return True
+        self.bytes_fed += len(chunk)
+        if self._parts is None:
+            data = self._tail + chunk
+            pos = data.find(self._start)
+            if pos == -1:
+                self._tail = data[-(len(self._start) - 1):]
+                return False
+            self._tail = b''
+            self._parts = []
+            chunk = data[pos + len(self._start):]
+
+        # end tag may be split between chunks
+        data = self._tail + chunk
+        end = data.find(self._END)
+        if end == -1:
+            keep = len(self._END) - 1
+            self._parts.append(data[:-keep])
+            self._tail = data[-keep:]
+            return False
+        self._parts.append(data[:end])
+        self._result = json.loads(b''.join(self._parts).decode())
+        self._parts = None
+        self.done = True
+        return True
+
+    def result(self) -> Any:
+        """Decoded JSON. Should be called after the whole stream was fed or `feed` returned True.
+        :raises ValueError: if the script was not found or its content is not valid JSON
+        """
+        if self.done:
+            return self._result
+        if self._parts is None:
+            raise ValueError(f'Script {self._webpack_id} not found in {self.bytes_fed} bytes')
+        # not closed script; decode as much as possible
+        parsed, _ = json.JSONDecoder().raw_decode(b''.join(self._parts + [self._tail]).decode().strip())
+        return parsed
@@ -1,17 +1,28 @@
 from http.cookies import SimpleCookie
 from http import HTTPStatus
 import typing as t
+import asyncio
 import aiohttp
 import json
 import base64
 import logging
+import pathlib
+import re
 
 import yarl
 from galaxy.http import create_client_session, handle_exception
 from galaxy.api.errors import UnknownBackendResponse, UnknownError
 
+from consts import IS_WINDOWS, ORDERS_FETCH_CONCURRENCY
+from httpcache import HttpCache, CachePolicy
+from httpconn import ConnectionStats, create_connector, create_trace_config
+from httpretry import RetryEngine, RetryPolicy, NO_RETRY
+import tracing
 from model.download import TroveDownload, DownloadStructItem, SubproductDownload
 from model.subscription import MontlyContentData, ChoiceContentData, ContentChoiceOptions, ChoiceMarketingData
+from utils.singleflight import SingleFlight, single_flight
+from utils.webpack import WebpackJsonExtractor
+from utils.fetcher import prefetch_pages
 
 
 class AuthorizedHumbleAPI:
@@ -21,6 +32,8 @@ class AuthorizedHumbleAPI:
     _ORDER_URL = "/api/v1/order/{}"
 
     TROVES_PER_CHUNK = 20
+    TROVE_CHUNKS_WINDOW = 4  # chunk requests kept in flight
+    _WEBPACK_CHUNK_SIZE = 16 * 1024
     _SUBSCRIPTION = 'subscription'
     _SUBSCRIPTION_HOME = 'subscription/home'
     _SUBSCRIPTION_TROVE = 'subscription/trove'
@@ -37,8 +50,39 @@ class AuthorizedHumbleAPI:
         "User-Agent": "Apache-HttpClient/UNAVAILABLE (java 1.4)"
     }
 
-    def __init__(self):
-        self._session = create_client_session(headers=self._DEFAULT_HEADERS)
+    if IS_WINDOWS:
+        HTTP_CACHE_DIR = pathlib.Path.home() / "AppData/Local/galaxy-hb/http-cache"
+    else:
+        HTTP_CACHE_DIR = pathlib.Path.home() / "Library/Caches/galaxy-hb/http-cache"
+    # parsed GET results are shared by concurrent callers and reused for a while, e.g. during one Galaxy import
+    MEMO_TTL = 30
+    # JSON endpoints only: HTML pages are streamed (see _get_webpack_data) and order details contain game keys
+    _HTTP_CACHE_POLICIES = [
+        (re.escape(_ORDER_LIST_URL) + '$', CachePolicy()),
+        (re.escape(_TROVE_CHUNK_URL.format('')), CachePolicy()),
+        (re.escape(_SUBSCRIPTION_PRODUCTS), CachePolicy()),
+    ]
+    _RETRY_POLICIES = [
+        ('api/v1/', RetryPolicy(retries=3)),  # small JSON responses; cheap to repeat
+        (re.escape(_HUMBLER_REDEEM_DOWNLOAD), NO_RETRY),  # its failure is ignored anyway
+    ]
+
+    CONNECTIONS_PER_HOST = ORDERS_FETCH_CONCURRENCY  # so orders burst reuses the pool
+    KEEPALIVE_TIMEOUT = 30
+    DNS_CACHE_TTL = 300
+
+    def __init__(self, http_cache: t.Optional[HttpCache] = None, retry_engine: t.Optional[RetryEngine] = None):
+        self.connection_stats = ConnectionStats()
+        self._session = create_client_session(
+            headers=self._DEFAULT_HEADERS,
+            connector=create_connector(self.CONNECTIONS_PER_HOST, self.KEEPALIVE_TIMEOUT, self.DNS_CACHE_TTL),
+            trace_configs=[create_trace_config(self.connection_stats)]
+        )
+        self._warm_up_task: t.Optional[asyncio.Task] = None
+        self._http_cache = http_cache or HttpCache(self.HTTP_CACHE_DIR, self._HTTP_CACHE_POLICIES)
+        self._user_id: t.Optional[str] = None
+        self._retry = retry_engine or RetryEngine(self._RETRY_POLICIES)
+        self._single_flight = SingleFlight(ttl=self.MEMO_TTL)
 
     @property
     def is_authenticated(self) -> bool:
@@ -49,8 +93,28 @@ class AuthorizedHumbleAPI:
         logging.debug(f'{method}, {url}, {args}, {kwargs}')
         if 'params' not in kwargs:
             kwargs['params'] = self._DEFAULT_PARAMS
-        with handle_exception():
-            return await self._session.request(method, url, *args, **kwargs)
+        retry_policy = self._retry.policy(path)
+        cache_policy = self._http_cache.policy(method, path)
+
+        def send(extra_headers: t.Dict[str, str]):
+            request_kwargs = {**kwargs, 'headers': {**kwargs.get('headers', {}), **extra_headers}}
+            return self._retry.run(
+                method, retry_policy, lambda: self._session.request(method, url, *args, **request_kwargs)
+            )
+        with tracing.span('api', method=method.upper(), path=path) as span, handle_exception():
+            if not cache_policy.store or self._user_id is None:
+                response = await send({})
+            else:
+                key = self._http_cache.key(url, kwargs['params'], scope=self._user_id)
+                response = await self._http_cache.request(key, cache_policy, send)
+            span.set(status=response.status, from_cache=getattr(response, 'from_cache', False))
+            return response
+
+    @staticmethod
+    async def _json(response) -> t.Any:
+        """Reads and decodes JSON body of the response"""
+        with tracing.span('parse'):
+            return await response.json()
 
     async def _is_session_valid(self):
         """Simply asks about order list to know if session is valid.
@@ -82,24 +146,52 @@ class AuthorizedHumbleAPI:
         cookie[auth_cookie['name']] = cookie_val
 
         self._session.cookie_jar.update_cookies(cookie)
-        return self._decode_user_id(cookie_val)
+        self._single_flight.forget()
+        user_id = self._decode_user_id(cookie_val)
+        self._user_id = str(user_id)
+        self._http_cache.set_owner(self._user_id)  # responses of previous account are not kept on disk
+        return user_id
+
+    def start_warm_up(self, connections: int):
+        """Warms up `connections` in background. Only the first call in a session does anything,
+        so later library refreshes or re-authentication do not open new connections next to already warm ones.
+        """
+        if self._warm_up_task is not None or connections <= 0:
+            return
+        self._warm_up_task = asyncio.ensure_future(self.warm_up(connections))
 
+    async def warm_up(self, connections: t.Optional[int] = None):
+        """Opens pool connections ahead of the first burst of requests, so TLS handshakes are not paid on demand.
+        Errors are ignored; requests will connect by themselves.
+        """
+        async def head():
+            try:
+                async with self._session.head(self._AUTHORITY, allow_redirects=False, raise_for_status=False):
+                    pass
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.debug(f'Connection warm-up failed: {repr(e)}')
+        await asyncio.gather(*[head() for _ in range(min(connections or self.CONNECTIONS_PER_HOST, self.CONNECTIONS_PER_HOST))])
+        logging.debug(f'Connections warmed up: {self.connection_stats}')
+
+    @single_flight('_single_flight')
     async def get_gamekeys(self) -> t.List[str]:
         res = await self._request('get', self._ORDER_LIST_URL)
-        parsed = await res.json()
+        parsed = await self._json(res)
         logging.info(f"The order list:\n{parsed}")
         gamekeys = [it["gamekey"] for it in parsed]
         return gamekeys
 
     async def get_order_details(self, gamekey) -> dict:
+        """Not coalesced: orders are fetched once per refresh and their projections are cached by the library"""
         res = await self._request('get', self._ORDER_URL.format(gamekey), params={
             'all_tpkds': 'true'
         })
-        return await res.json()
+        return await self._json(res)
 
+    @single_flight('_single_flight')
     async def _get_trove_details(self, chunk_index) -> list:
         res = await self._request('get', self._TROVE_CHUNK_URL.format(chunk_index))
-        return await res.json()
+        return await self._json(res)
 
     async def get_subscription_products_with_gamekeys(self):
         """
@@ -114,7 +206,7 @@ class AuthorizedHumbleAPI:
             res = await self._request('GET', self._SUBSCRIPTION_PRODUCTS + f"/{cursor}")
             if res.status == 404:  # Ends in November 2015
                 return
-            res_json = await res.json()
+            res_json = await self._json(res)
             for product in res_json['products']:
                 if 'isChoiceTier' in product:
                     yield ContentChoiceOptions(product)
@@ -123,6 +215,7 @@ class AuthorizedHumbleAPI:
                     return
             cursor = res_json['cursor']
 
+    @single_flight('_single_flight')
     async def had_subscription(self) -> t.Optional[bool]:
         """Based on current behavior of `humblebundle.com/subscription/home`
         that is accesable only by "current and former subscribers"
@@ -137,14 +230,23 @@ class AuthorizedHumbleAPI:
             return None
 
     async def _get_webpack_data(self, path: str, webpack_id: str) -> dict:
+        """Streams the page and decodes only JSON embedded in the webpack script"""
         res = await self._request('GET', path)
-        txt = await res.text()
-        search = f'<script id="{webpack_id}" type="application/json">'
-        json_start = txt.find(search) + len(search)
-        candidate = txt[json_start:].strip()
-        parsed, _ = json.JSONDecoder().raw_decode(candidate)
-        return parsed
+        try:
+            with tracing.span('parse', webpack_id=webpack_id):
+                extractor = WebpackJsonExtractor(webpack_id)
+                try:
+                    async for chunk in res.content.iter_chunked(self._WEBPACK_CHUNK_SIZE):
+                        if extractor.feed(chunk):
+                            break
+                    return extractor.result()
+                except ValueError as e:  # also not decodable JSON found while feeding
+                    raise UnknownBackendResponse(f'{path}: {e}')
+        finally:
+            # the rest of the page is not downloaded; connection with unread body is closed rather than reused
+            res.release()
 
+    @single_flight('_single_flight')
     async def get_montly_trove_data(self) -> dict:
         """Parses a subscription/trove page to find list of recently added games.
         Returns json containing "newlyAdded" trove games and "standardProducts" that is
@@ -154,12 +256,14 @@ class AuthorizedHumbleAPI:
         webpack_id = "webpack-monthly-trove-data"
         return await self._get_webpack_data(self._SUBSCRIPTION_TROVE, webpack_id)
 
+    @single_flight('_single_flight')
     async def get_choice_marketing_data(self) -> ChoiceMarketingData:
         """Parsing ~155K and fast response from server"""
         webpack_id = "webpack-choice-marketing-data"
         data = await self._get_webpack_data(self._SUBSCRIPTION, webpack_id)
         return ChoiceMarketingData(data)
 
+    @single_flight('_single_flight')
     async def get_choice_content_data(self, product_url_path) -> ChoiceContentData:
         """Parsing ~220K
         product_url_path: last element of subscripiton url for example 'february-2020'
@@ -169,6 +273,7 @@ class AuthorizedHumbleAPI:
         data = await self._get_webpack_data(url, webpack_id)
         return ChoiceContentData(data)
 
+    @single_flight('_single_flight')
     async def get_montly_content_data(self, product_url_path) -> MontlyContentData:
         """
         product_url_path: last element of subscripiton url for example 'august_2019_monthly'
@@ -179,24 +284,24 @@ class AuthorizedHumbleAPI:
         return MontlyContentData(data)
 
     async def get_trove_details(self, from_chunk: int=0):
-        index = from_chunk
-        while True:
-            chunk_details = await self._get_trove_details(index)
-            if type(chunk_details) != list:
-                logging.debug(f'chunk_details: {chunk_details}')
-                raise UnknownBackendResponse()
-            elif len(chunk_details) == 0:
-                logging.debug('No more chunk pages')
-                return
-            yield chunk_details
-            index += 1
+        """Yields trove chunks in order, prefetching up to TROVE_CHUNKS_WINDOW of them concurrently"""
+        chunks = prefetch_pages(self._get_trove_details, lambda chunk: chunk == [], from_chunk, self.TROVE_CHUNKS_WINDOW)
+        try:
+            async for chunk_details in chunks:
+                if type(chunk_details) != list:
+                    logging.debug(f'chunk_details: {chunk_details}')
+                    raise UnknownBackendResponse()
+                yield chunk_details
+        finally:
+            await chunks.aclose()
+        logging.debug('No more chunk pages')
 
     async def sign_download(self, machine_name: str, filename: str):
         res = await self._request('post', self._DOWNLOAD_SIGN, params={
             'machine_name': machine_name,
             'filename': filename
         })
-        return await res.json()
+        return await self._json(res)
 
     async def _reedem_download(self, download_machine_name: str, custom_data: dict):
         """Unknown purpose - humble http client do this after post for signed_url
@@ -240,4 +345,9 @@ class AuthorizedHumbleAPI:
         return urls
 
     async def close_session(self):
+        if self._warm_up_task is not None:
+            self._warm_up_task.cancel()
+        logging.info(f'HTTP cache: {self._http_cache.stats}; single flight: {self._single_flight.stats}')
+        logging.info(f'Request retries: {self._retry.stats}')
+        logging.info(f'Connection pool: {self.connection_stats}')
         await self._session.close()
@@ -164,6 +164,15 @@ def test(c, target=None):
         print('done')
 
 
+@task
+def bench(c, name=None):
+    """Runs benchmarks from `benchmarks` folder; all or the one matching `name`"""
+    for script in sorted(glob("benchmarks/bench_*.py")):
+        if name is None or name in script:
+            print(f'=== {script}')
+            c.run(f"{PYTHON} {script}")
+
+
 @task
 def archive(c, zip_name=None, target=None):
     if target is None:
@@ -1,4 +1,4 @@
-from model.game import Subproduct, Key, KeyGame
+from model.game import Subproduct, Key, KeyGame, TroveGame
 from model.types import GAME_PLATFORMS, HP
 
 
@@ -92,3 +92,41 @@ def test_key_game_human_name_not_changed():
     }
     assert KeyGame(Key(tpks), 'tor', 'Tor Steam').human_name == 'Tor Steam'
 
+
+
+def test_game_parsed_once(overgrowth):
+    sub = Subproduct(overgrowth['subproducts'][0])
+    assert sub.downloads is sub.downloads
+    assert sub.platforms == {HP.WINDOWS, HP.MAC, HP.LINUX}
+    assert sub.os_compatibile(HP.MAC)
+    assert not hasattr(sub, '__dict__')
+
+
+def test_game_eq_by_identity(overgrowth):
+    sub_data = overgrowth['subproducts'][0]
+    sub = Subproduct(sub_data)
+    same = Subproduct(dict(sub_data, icon='other_icon'))
+    renamed = Subproduct(dict(sub_data, human_name='Overgrowth 2'))
+    assert sub == same
+    assert hash(sub) == hash(same)
+    assert sub != renamed
+
+
+def test_key_eq_by_identity():
+    tpks = {'machine_name': 'tor', 'human_name': 'Tor'}
+    assert Key(tpks) == Key(dict(tpks, key_type='steam'))
+    assert Key(tpks) != Key(dict(tpks, redeemed_key_val='ABCD-EFGH'))
+    assert Key(tpks) != KeyGame(Key(tpks), 'tor', 'Tor')
+
+
+def test_trove_game_unknown_platform():
+    trove = TroveGame({
+        'human-name': 'A',
+        'machine_name': 'a',
+        'downloads': {
+            'windows': {'machine_name': 'a_windows', 'url': {'web': 'a.zip'}},
+            'not_a_platform': {'machine_name': 'a_x', 'url': {'web': 'a_x.zip'}}
+        }
+    })
+    assert list(trove.downloads) == [HP.WINDOWS]
+    assert trove.downloads[HP.WINDOWS].web == 'a.zip'
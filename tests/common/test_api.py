@@ -1,3 +1,9 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from httpcache import HttpCache
 from webservice import AuthorizedHumbleAPI
 
 
@@ -5,3 +11,26 @@ def test_filename_from_web_link():
     web_link = 'https://dl.humble.com/Almost_There_Windows.zip?gamekey=AbR9TcsD4ecueNGw&ttl=1587335864&t=a04a9b4f6512b7958f6357cb7b628452'
     expected = 'Almost_There_Windows.zip'
     assert expected == AuthorizedHumbleAPI._filename_from_web_link(web_link)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_coalesced(create_server, tmp_path):
+    requests = []
+
+    async def handler(request):
+        requests.append(request.path)
+        await asyncio.sleep(0.01)
+        return web.Response(text='<script id="webpack-monthly-trove-data" type="application/json">{"newlyAdded": []}</script>')
+
+    api = AuthorizedHumbleAPI(http_cache=HttpCache(tmp_path / 'http-cache'))
+    api._AUTHORITY = await create_server([('GET', '/subscription/trove', handler)])
+    try:
+        results = await asyncio.gather(*[api.get_montly_trove_data() for _ in range(3)])
+        assert results == [{'newlyAdded': []}] * 3
+        assert await api.get_montly_trove_data() is results[0]  # memoized
+        assert len(requests) == 1
+        api._single_flight.forget()
+        await api.get_montly_trove_data()
+        assert len(requests) == 2
+    finally:
+        await api.close_session()
@@ -1,3 +1,7 @@
+import json
+import threading
+from unittest.mock import Mock
+
 import pytest
 from pathlib import Path
 
@@ -73,3 +77,121 @@ async def test_scan_folder_windows(create_tmp_tree, tmp_path):
         'Samorost 2': Path(root) / 'Samorost2' / 'Samorost2.exe',
         'Shelter': Path(root) / 'Shelter' / 'Shelter.exe'
     } == await AppFinder()._scan_folders([root], owned_games)
+
+
+@pytest.fixture
+def synthetic_tree(tmp_path):
+    """Root with many unrelated folders and few game folders having an executable"""
+    def fn(games, noise=500):
+        for i in range(noise):
+            (tmp_path / f'folder_{i}').mkdir()
+        for dir_name in games:
+            (tmp_path / dir_name).mkdir()
+            exe = tmp_path / dir_name / f'{dir_name}.exe'
+            exe.touch()
+            exe.chmod(0o755)
+        return tmp_path
+    return fn
+
+
+@pytest.mark.asyncio
+async def test_scan_folders_lists_each_root_once(synthetic_tree, mocker):
+    root = synthetic_tree(['Shank 2', 'Trine 2 Complete Story'])
+    finder = AppFinder()
+    list_dirs = mocker.spy(finder, '_list_dirs')
+    result = await finder._scan_folders([root], {'Shank 2', 'Trine 2: Complete Story', 'Dummy'})
+    assert list_dirs.call_count == 1
+    assert result == {
+        'Shank 2': root / 'Shank 2' / 'Shank 2.exe',
+        'Trine 2: Complete Story': root / 'Trine 2 Complete Story' / 'Trine 2 Complete Story.exe',
+    }
+
+
+@pytest.mark.asyncio
+async def test_scan_folders_fs_access_off_loop(synthetic_tree):
+    root = synthetic_tree(['Shank 2'], noise=10)
+    threads = []
+    finder = AppFinder()
+    orig_find_best_exe = finder.find_best_exe
+
+    def find_best_exe(*args):
+        threads.append(threading.current_thread())
+        return orig_find_best_exe(*args)
+
+    finder.find_best_exe = find_best_exe
+    assert 'Shank 2' in await finder._scan_folders([root], {'Shank 2'})
+    assert threads and threading.main_thread() not in threads
+
+
+@pytest.mark.asyncio
+async def test_scan_folders_not_existing_root(tmp_path):
+    assert await AppFinder()._scan_folders([tmp_path / 'not_existing'], {'Shank 2'}) == {}
+
+
+# scan cache
+
+@pytest.fixture
+def cached_finder():
+    def fn(cache=None):
+        saved = []
+        finder = AppFinder()
+        finder.set_scan_cache(cache or {}, saved.append)
+        finder.get_close_matches = Mock(wraps=finder.get_close_matches)
+        return finder, saved
+    return fn
+
+
+@pytest.mark.asyncio
+async def test_scan_cache_hit(synthetic_tree, cached_finder):
+    root = synthetic_tree(['Shank 2', 'Trine 2 Complete Story'], noise=20)
+    owned = {'Shank 2', 'Trine 2: Complete Story'}
+    finder, saved = cached_finder()
+    expected = await finder._scan_folders([root], owned)
+    assert len(saved) == 1
+
+    finder, saved = cached_finder(json.loads(json.dumps(saved[0])))
+    assert await finder._scan_folders([root], owned) == expected
+    finder.get_close_matches.assert_not_called()
+    assert saved == []
+
+
+@pytest.mark.asyncio
+async def test_scan_cache_redescend_changed_dir(synthetic_tree, cached_finder):
+    root = synthetic_tree(['Shank 2'], noise=5)
+    finder, saved = cached_finder()
+    await finder._scan_folders([root], {'Shank 2'})
+    finder.get_close_matches.reset_mock()
+
+    (root / 'Shank 2' / 'Shank 2.exe').unlink()
+    new_exe = root / 'Shank 2' / 'shank.exe'
+    new_exe.touch()
+    new_exe.chmod(0o755)
+    assert await finder._scan_folders([root], {'Shank 2'}) == {'Shank 2': new_exe}
+    finder.get_close_matches.assert_not_called()
+    assert saved[-1]['matches']['Shank 2']['exe'] == str(new_exe)
+
+
+@pytest.mark.asyncio
+async def test_scan_cache_invalidated(synthetic_tree, cached_finder):
+    root = synthetic_tree(['Shank 2'], noise=5)
+    (root / 'Haven Moon').mkdir()  # no executable yet
+    finder, _ = cached_finder()
+    owned = {'Shank 2', 'Haven Moon'}
+    assert await finder._scan_folders([root], owned) == {'Shank 2': root / 'Shank 2' / 'Shank 2.exe'}
+    finder.get_close_matches.reset_mock()
+
+    exe = root / 'Haven Moon' / 'haven.exe'
+    exe.touch()
+    exe.chmod(0o755)
+    result = await finder._scan_folders([root], owned)
+    finder.get_close_matches.assert_called()
+    assert result['Haven Moon'] == exe
+
+    finder.get_close_matches.reset_mock()
+    (root / 'Samorost 2').mkdir()
+    await finder._scan_folders([root], owned)
+    finder.get_close_matches.assert_called()
+
+    finder.get_close_matches.reset_mock()
+    await finder._scan_folders([root], owned | {'Samorost 2'})
+    finder.get_close_matches.assert_called()
@@ -0,0 +1,117 @@
+"""HumbleBundlePlugin with real AuthorizedHumbleAPI talking to local stand-in server"""
+import json
+from unittest.mock import Mock
+
+import pytest
+
+import standin
+import tracing
+from httpretry import RetryEngine, RetryPolicy
+from plugin import HumbleBundlePlugin, __version__
+from library import LibraryResolver
+from settings import Settings
+from webservice import AuthorizedHumbleAPI
+
+
+@pytest.fixture
+def account():
+    return standin.Account.from_fixtures()
+
+
+@pytest.fixture
+async def create_plugin(tmp_path, monkeypatch):
+    monkeypatch.setattr(Settings, 'LOCAL_CONFIG_FILE', tmp_path / 'config.cfg')
+    monkeypatch.setattr(AuthorizedHumbleAPI, 'HTTP_CACHE_DIR', tmp_path / 'http-cache')
+    monkeypatch.setattr(LibraryResolver, 'FETCH_RATE', 1000)  # the client side rate limit is not tested here
+    plugins = []
+
+    def fn(server, persistent_cache=None):
+        monkeypatch.setattr(AuthorizedHumbleAPI, '_AUTHORITY', server.url)
+        plugin = HumbleBundlePlugin(Mock(), Mock(), 'handshake_token')
+        plugin.push_cache = Mock(spec=())
+        plugin._installed_check.cancel()
+        plugin._statuses_check.cancel()
+        plugin._persistent_cache = persistent_cache if persistent_cache is not None else {'last_version': f'"{__version__}"'}
+        plugin.handshake_complete()
+        plugins.append(plugin)
+        return plugin
+    yield fn
+    for plugin in plugins:
+        await plugin.shutdown()
+
+
+def mutable_orders(account):
+    return [
+        gamekey for gamekey, order in account.orders.items()
+        if order.get('choices_remaining', 0) != 0
+        or any('redeemed_key_val' not in tpk for tpk in order['tpkd_dict']['all_tpks'])
+    ]
+
+
+@pytest.mark.asyncio
+async def test_galaxy_import(create_plugin, account):
+    async with standin.HumbleStandIn(account) as server:
+        result = await standin.galaxy_import(create_plugin(server))
+
+    assert len(result['owned']) > 0
+    assert server.requests['api/v1/order/{gamekey}'] == len(account.orders)
+    names = {sub.subscription_name for sub in result['subscriptions'] if sub.owned}
+    assert names == {
+        'Humble Choice 2020-05', 'Humble Choice 2020-04', 'Humble Choice 2020-03', 'Humble Choice 2020-02',
+        'Humble Trove'
+    }
+    trove_ids = {g.game_id for g in result['subscription_games']['Humble Trove']}
+    assert trove_ids == {t['machine_name'] for chunk in account.trove_chunks for t in chunk}
+    assert len(result['subscription_games']['Humble Choice 2020-05']) == 10
+    assert len(result['subscription_games']['Humble Choice 2020-04']) == 5  # only chosen games
+
+
+@pytest.mark.asyncio
+async def test_second_start_uses_caches(create_plugin, account):
+    async with standin.HumbleStandIn(account, etags=True) as server:
+        plugin = create_plugin(server)
+        first = await standin.galaxy_import(plugin)
+        plugin._cache_store.flush()
+        await plugin.shutdown()
+        requests_before = server.total_requests
+
+        second = await standin.galaxy_import(create_plugin(server, plugin.persistent_cache))
+
+    assert {g.game_id for g in second['owned']} == {g.game_id for g in first['owned']}
+    second_requests = server.total_requests - requests_before
+    assert second_requests < requests_before / 2
+    # only orders that may still change (unrevealed keys, choices left) are fetched again
+    assert server.requests['api/v1/order/{gamekey}'] - len(account.orders) == len(mutable_orders(account))
+
+
+@pytest.mark.asyncio
+async def test_import_survives_server_errors(create_plugin, account):
+    async with standin.HumbleStandIn(account, error_rate=0.2, seed=1) as server:
+        plugin = create_plugin(server)
+        plugin._api._retry = RetryEngine(default=RetryPolicy(retries=5, backoff=0.01))
+        result = await standin.galaxy_import(plugin)
+
+    assert server.errors[503] > 0
+    assert len(result['owned']) > 0
+    assert plugin._api._retry.stats.recovered > 0
+
+
+@pytest.mark.asyncio
+async def test_tracing_enabled_in_config(create_plugin, account, tmp_path):
+    Settings.LOCAL_CONFIG_FILE.write_text('[debug]\ntracing = true\n')
+    try:
+        async with standin.HumbleStandIn(account) as server:
+            plugin = create_plugin(server)
+            await standin.galaxy_import(plugin)
+            await plugin.shutdown()
+    finally:
+        tracing.tracer.disable()
+
+    records = [json.loads(line) for line in (tmp_path / plugin.TRACES_FILE_NAME).read_text().splitlines()]
+    roots = {r['span']['name']: r['span'] for r in records if 'span' in r}
+    assert {'get_owned_games', 'get_subscriptions', 'get_subscription_games'} <= roots.keys()
+    owned_children = {c['name'] for c in roots['get_owned_games']['children']}
+    assert {'api', 'parse', 'build'} <= owned_children
+    histograms = [r['histograms'] for r in records if 'histograms' in r][-1]
+    assert histograms['get_subscription_games']['count'] == 5
+    assert histograms['api']['count'] == server.total_requests - server.requests['/']  # warm-up HEADs are not traced
@@ -0,0 +1,163 @@
+import io
+import sys
+import json
+import asyncio
+import pathlib
+from unittest.mock import Mock
+
+import pytest
+
+from conftest import AsyncMock
+import guirunner
+from guirunner import GUIError, PAGE
+
+
+SRC = pathlib.Path(__file__).parent.parent.parent / 'src'
+
+# worker serving pages that record their arguments instead of opening toga windows
+FAKE_WORKER = f'''
+import os, sys, json
+sys.path.insert(0, {str(SRC)!r})
+import guirunner
+
+def record(*args):
+    with open(sys.argv[1], 'a') as f:
+        f.write(json.dumps([os.getpid(), *args]) + '\\n')
+
+def options(mode):
+    if mode == 'news':
+        raise RuntimeError('no changelog')
+    if mode == 'welcome':
+        sys.stderr.write('fatal: cannot open display\\n')
+        sys.stderr.flush()
+        os._exit(3)
+    record(mode)
+
+def keys(*args):
+    os.write(1, b'native library noise\\n')
+    record(*args)
+
+guirunner._serve({{'options': options, 'keys': keys}}, sys.stdin, sys.stdout)
+'''
+
+
+@pytest.fixture
+def shown(tmp_path, mocker):
+    """Pages shown by fake workers as [worker pid, *args]"""
+    path = tmp_path / 'shown.jsonl'
+    mocker.patch('guirunner._worker_command', return_value=[sys.executable, '-c', FAKE_WORKER, str(path)])
+
+    def read():
+        return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+    return read
+
+
+@pytest.fixture(autouse=True)
+async def close_spare():
+    yield
+    await guirunner.close()
+
+
+def key_game(key_val):
+    return Mock(human_name='Game', key_type_human_name='Steam', key_val=key_val)
+
+
+@pytest.mark.asyncio
+async def test_show_key(shown):
+    await guirunner.show_key(key_game('AAA-BBB'))
+    await guirunner.show_key(key_game(None))
+    assert [args for _, *args in shown()] == [['Game', 'Steam', 'AAA-BBB'], ['Game', 'Steam']]
+
+
+@pytest.mark.asyncio
+async def test_next_page_shown_by_warm_spare(shown):
+    await guirunner.show_key(key_game('AAA-BBB'))
+    spare = await guirunner._spare
+    assert spare.alive
+
+    await guirunner.show_options(Mock(value='normal'))
+    assert shown()[1] == [spare._process.pid, 'normal']
+    assert shown()[0][0] != spare._process.pid
+
+
+@pytest.mark.asyncio
+async def test_page_error_reported(shown):
+    with pytest.raises(GUIError, match='RuntimeError: no changelog'):
+        await guirunner.show_options(Mock(value='news'))
+
+
+@pytest.mark.asyncio
+async def test_worker_crash(shown, caplog):
+    caplog.set_level('INFO')
+    with pytest.raises(GUIError, match='exited with code 3: fatal: cannot open display'):
+        await guirunner.show_options(Mock(value='welcome'))
+    assert 'fatal: cannot open display' in caplog.text
+    await guirunner.show_options(Mock(value='normal'))
+    assert [args for _, *args in shown()] == [['normal']]
+
+
+@pytest.mark.asyncio
+async def test_prepare_starts_spare(shown):
+    guirunner.prepare()
+    spare = await guirunner._spare
+    guirunner.prepare()
+    assert await guirunner._spare is spare
+
+    await guirunner.show_options(Mock(value='normal'))
+    assert shown() == [[spare._process.pid, 'normal']]
+
+
+@pytest.mark.asyncio
+async def test_spare_closed_when_idle(shown, mocker):
+    mocker.patch('guirunner.SPARE_IDLE_TIMEOUT', 0.01)  # shorter than worker start
+    guirunner.prepare()
+    spare = await guirunner._spare
+    assert spare.alive  # idle time is counted since worker is ready
+    await asyncio.wait_for(spare._process.wait(), 5)
+    assert spare._process.returncode == 0
+    assert guirunner._spare is None
+
+
+@pytest.mark.asyncio
+async def test_dead_spare_replaced(shown):
+    await guirunner.show_options(Mock(value='normal'))
+    spare = await guirunner._spare
+    spare.terminate()
+    await spare._process.wait()
+
+    await guirunner.show_options(Mock(value='normal'))
+    assert shown()[1][0] != spare._process.pid
+
+
+@pytest.mark.asyncio
+async def test_cancel_terminates_worker(mocker):
+    worker = Mock(show=AsyncMock(side_effect=asyncio.CancelledError))
+    mocker.patch('guirunner._take_worker', AsyncMock(return_value=worker))
+    await guirunner._open(PAGE.OPTIONS, 'normal')
+    worker.terminate.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_close_lets_spare_exit(shown):
+    await guirunner.show_options(Mock(value='normal'))
+    spare = await guirunner._spare
+    await guirunner.close()
+    assert spare._process.returncode == 0
+    assert guirunner._spare is None
+
+
+def test_serve_request():
+    stdin = io.StringIO(json.dumps({'page': 'keys', 'args': ['Game', 'Steam']}) + '\n')
+    stdout = io.StringIO()
+    page = Mock()
+    guirunner._serve({'keys': page}, stdin, stdout)
+    page.assert_called_once_with('Game', 'Steam')
+    assert [json.loads(line) for line in stdout.getvalue().splitlines()] == [{'status': 'ready'}, {'status': 'closed'}]
+
+
+def test_serve_released_without_request():
+    stdout = io.StringIO()
+    page = Mock()
+    guirunner._serve({'keys': page}, io.StringIO(), stdout)
+    page.assert_not_called()
+    assert [json.loads(line) for line in stdout.getvalue().splitlines()] == [{'status': 'ready'}]
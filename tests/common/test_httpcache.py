@@ -0,0 +1,160 @@
+import json
+
+import pytest
+from aiohttp import web
+
+import standin
+from httpcache import HttpCache, CachePolicy, CachedResponse
+from utils.singleflight import SingleFlight
+from webservice import AuthorizedHumbleAPI
+
+
+@pytest.fixture
+def server_stats():
+    return {'requests': 0, 'conditional': 0, 'not_modified': 0, 'bytes_sent': 0}
+
+
+@pytest.fixture
+def resources():
+    return {
+        'api/v1/user/order': {'body': [{'gamekey': 'a'}, {'gamekey': 'b'}], 'etag': '"v1"'},
+        'api/v1/trove/chunk': {'body': [{'machine_name': 'x' * 500}], 'last_modified': 'Wed, 21 Oct 2020 07:28:00 GMT'},
+        'api/v1/no_validators': {'body': {'a': 1}},
+        'api/v1/html': {'body': '<html></html>', 'etag': '"h1"', 'content_type': 'text/html'},
+    }
+
+
+@pytest.fixture
+async def server(create_server, resources, server_stats):
+    async def handler(request):
+        resource = resources.get(request.path.lstrip('/'))
+        if resource is None:  # e.g. connections warm-up
+            return web.Response(status=404)
+        server_stats['requests'] += 1
+        etag, last_modified = resource.get('etag'), resource.get('last_modified')
+        if 'If-None-Match' in request.headers or 'If-Modified-Since' in request.headers:
+            server_stats['conditional'] += 1
+            if (etag and request.headers.get('If-None-Match') == etag) \
+                    or (last_modified and request.headers.get('If-Modified-Since') == last_modified):
+                server_stats['not_modified'] += 1
+                return web.Response(status=304)
+        headers = {}
+        if etag:
+            headers['ETag'] = etag
+        if last_modified:
+            headers['Last-Modified'] = last_modified
+        body = json.dumps(resource['body']).encode()
+        server_stats['bytes_sent'] += len(body)
+        return web.Response(body=body, headers=headers, content_type=resource.get('content_type', 'application/json'))
+
+    return await create_server([('*', '/{path:.*}', handler)])
+
+
+@pytest.fixture
+async def create_api(server, tmp_path):
+    apis = []
+
+    async def fn(user_id=1, **cache_kwargs):
+        cache_kwargs.setdefault('policies', AuthorizedHumbleAPI._HTTP_CACHE_POLICIES + [('api/v1/no_validators|api/v1/html', CachePolicy())])
+        api = AuthorizedHumbleAPI(http_cache=HttpCache(tmp_path / 'cache', **cache_kwargs))
+        api._AUTHORITY = server
+        apis.append(api)
+        await api.authenticate(standin.auth_cookie(user_id))
+        api._single_flight = SingleFlight()  # no memo to hit the server every time
+        return api
+    yield fn
+    for api in apis:
+        await api.close_session()
+
+
+@pytest.mark.asyncio
+async def test_etag_revalidation(create_api, server_stats):
+    api = await create_api()
+    assert await api.get_gamekeys() == ['a', 'b']
+    assert await api.get_gamekeys() == ['a', 'b']
+    assert server_stats['conditional'] == 1
+    assert server_stats['not_modified'] == 1
+    stats = api._http_cache.stats
+    assert (stats.requests, stats.hits, stats.stored) == (2, 1, 1)
+    assert stats.bytes_saved == len(json.dumps([{'gamekey': 'a'}, {'gamekey': 'b'}]))
+
+
+@pytest.mark.asyncio
+async def test_last_modified_revalidation(create_api, server_stats):
+    api = await create_api()
+    first = await api._get_trove_details(0)
+    assert await api._get_trove_details(0) == first
+    assert server_stats['not_modified'] == 1
+
+
+@pytest.mark.asyncio
+async def test_changed_resource_refetched(create_api, resources, server_stats):
+    api = await create_api()
+    await api.get_gamekeys()
+    resources['api/v1/user/order'] = {'body': [{'gamekey': 'c'}], 'etag': '"v2"'}
+    assert await api.get_gamekeys() == ['c']
+    assert server_stats['not_modified'] == 0
+    assert await api.get_gamekeys() == ['c']
+    assert server_stats['not_modified'] == 1
+
+
+@pytest.mark.asyncio
+async def test_persisted_between_sessions(create_api, server_stats):
+    await (await create_api()).get_gamekeys()
+    api = await create_api()
+    assert await api.get_gamekeys() == ['a', 'b']
+    assert api._http_cache.stats.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_not_stored_without_validators(create_api, server_stats):
+    api = await create_api()
+    for _ in range(2):
+        res = await api._request('get', 'api/v1/no_validators')
+        assert await res.json() == {'a': 1}
+    assert server_stats['conditional'] == 0
+    assert api._http_cache.stats.stored == 0
+
+
+@pytest.mark.asyncio
+async def test_html_not_buffered(create_api, server_stats):
+    api = await create_api()
+    res = await api._request('get', 'api/v1/html')
+    assert not isinstance(res, CachedResponse)  # original streamed response
+    res.release()
+    assert api._http_cache.stats.stored == 0
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction(create_api, server_stats):
+    api = await create_api(max_bytes=700)
+    await api.get_gamekeys()
+    await api._get_trove_details(0)  # over the limit together; order list evicted
+    assert api._http_cache.stats.evicted == 1
+    await api._get_trove_details(0)
+    await api.get_gamekeys()
+    assert server_stats['not_modified'] == 1
+
+
+@pytest.mark.asyncio
+async def test_entries_private_to_account(create_api, server_stats):
+    await (await create_api(user_id=1)).get_gamekeys()
+    other = await create_api(user_id=2)
+    await other.get_gamekeys()
+    assert server_stats['conditional'] == 0  # not revalidated against entry of another account
+    assert len(list(other._http_cache._directory.glob('*.cache'))) == 1  # previous account entries removed
+
+    await other.get_gamekeys()
+    assert server_stats['not_modified'] == 1
+
+
+def test_policies(tmp_path):
+    cache = HttpCache(tmp_path / 'cache', AuthorizedHumbleAPI._HTTP_CACHE_POLICIES)
+    assert cache.policy('get', 'api/v1/user/order').store
+    assert not cache.policy('get', AuthorizedHumbleAPI._ORDER_URL.format('key')).store  # contains game keys
+    assert cache.policy('get', AuthorizedHumbleAPI._TROVE_CHUNK_URL.format(1)).store
+    assert not cache.policy('get', 'subscription/may-2020').store
+    assert not cache.policy('get', 'subscription/home').store
+    assert not cache.policy('post', 'subscription/may-2020').store
+    assert not cache.policy('post', AuthorizedHumbleAPI._DOWNLOAD_SIGN).store
+    assert not cache.policy('get', 'processlogin').store
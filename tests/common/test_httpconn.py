@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from httpcache import HttpCache
+from utils.singleflight import SingleFlight
+from webservice import AuthorizedHumbleAPI
+
+
+@pytest.fixture
+async def create_api(create_server, tmp_path):
+    apis = []
+
+    async def handler(request):
+        await asyncio.sleep(0.01)
+        return web.json_response({'gamekey': request.path.rsplit('/', 1)[-1]})
+
+    async def root(request):
+        return web.Response(text='home')  # HEAD response without Content-Length would not keep connection alive
+
+    url = await create_server([('GET', '/{path:.+}', handler), ('GET', '/', root)])
+
+    def fn():
+        api = AuthorizedHumbleAPI(http_cache=HttpCache(tmp_path / 'http-cache'))
+        api._AUTHORITY = url
+        api._single_flight = SingleFlight()
+        apis.append(api)
+        return api
+    yield fn
+    for api in apis:
+        await api.close_session()
+
+
+@pytest.mark.asyncio
+async def test_burst_reuses_connections(create_api):
+    api = create_api()
+    for _ in range(3):
+        await asyncio.gather(*[api.get_order_details(f'key{i}') for i in range(10)])
+    stats = api.connection_stats
+    assert stats.acquired == 30
+    assert stats.created <= api.CONNECTIONS_PER_HOST
+    assert stats.reuse_ratio >= 2 / 3
+
+
+@pytest.mark.asyncio
+async def test_requests_over_limit_queued(create_api):
+    api = create_api()
+    await asyncio.gather(*[api.get_order_details(f'key{i}') for i in range(api.CONNECTIONS_PER_HOST + 5)])
+    stats = api.connection_stats
+    assert stats.created == api.CONNECTIONS_PER_HOST
+    assert stats.queued == 5
+    assert stats.queue_time > 0
+
+
+@pytest.mark.asyncio
+async def test_warm_up(create_api):
+    api = create_api()
+    await api.warm_up(4)
+    assert api.connection_stats.created == 4
+    await asyncio.gather(*[api.get_order_details(f'key{i}') for i in range(4)])
+    assert api.connection_stats.created == 4
+    assert api.connection_stats.reused == 4
+
+
+@pytest.mark.asyncio
+async def test_warm_up_once_per_session(create_api):
+    api = create_api()
+    api.start_warm_up(3)
+    await api._warm_up_task
+    api.start_warm_up(3)  # e.g. re-authentication
+    await api._warm_up_task
+    assert api.connection_stats.created == 3
+    assert api.connection_stats.acquired == 3
+
+
+@pytest.mark.asyncio
+async def test_warm_up_limited_to_pool_size(create_api):
+    api = create_api()
+    await api.warm_up(api.CONNECTIONS_PER_HOST + 5)
+    assert api.connection_stats.acquired == api.CONNECTIONS_PER_HOST
+
+
+@pytest.mark.asyncio
+async def test_warm_up_errors_ignored(create_api):
+    api = create_api()
+    api._AUTHORITY = 'http://127.0.0.1:1/'
+    await api.warm_up(2)
+    assert api.connection_stats.created == 0
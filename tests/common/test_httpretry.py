@@ -0,0 +1,166 @@
+import asyncio
+from datetime import datetime, timezone
+
+import aiohttp
+import pytest
+from aiohttp import web
+from galaxy.api.errors import BackendNotAvailable, BackendError, AccessDenied
+
+from httpcache import HttpCache
+from httpretry import RetryEngine, RetryPolicy, parse_retry_after
+from utils.singleflight import SingleFlight
+from webservice import AuthorizedHumbleAPI
+
+
+@pytest.fixture
+def sleeps():
+    return []
+
+
+@pytest.fixture
+def engine(sleeps):
+    async def sleep(delay):
+        sleeps.append(delay)
+    return RetryEngine(AuthorizedHumbleAPI._RETRY_POLICIES, default=RetryPolicy(retries=2), sleep=sleep)
+
+
+@pytest.fixture
+def faults():
+    """Path to list of faults injected into consecutive requests: status code, 'reset' or (status, headers)"""
+    return {}
+
+
+@pytest.fixture
+def hits():
+    return []
+
+
+@pytest.fixture
+async def api(create_server, engine, faults, hits, tmp_path):
+    async def handler(request):
+        path = request.path.lstrip('/')
+        hits.append((request.method, path))
+        queue = faults.get(path, [])
+        if queue:
+            fault = queue.pop(0)
+            if fault == 'reset':
+                request.transport.close()
+                return web.Response()
+            status, headers = fault if isinstance(fault, tuple) else (fault, {})
+            return web.Response(status=status, headers=headers)
+        return web.json_response([{'gamekey': 'a'}] if path == 'api/v1/user/order' else {'ok': True})
+
+    api = AuthorizedHumbleAPI(http_cache=HttpCache(tmp_path / 'http-cache'), retry_engine=engine)
+    api._AUTHORITY = await create_server([('*', '/{path:.*}', handler)])
+    api._single_flight = SingleFlight()
+    yield api
+    await api.close_session()
+
+
+@pytest.mark.asyncio
+async def test_recovers_from_transient_errors(api, faults, hits, sleeps):
+    # aiohttp itself repeats idempotent request once when connection is dropped
+    faults['api/v1/user/order'] = ['reset', 'reset', 503, 502]
+    assert await api.get_gamekeys() == ['a']
+    assert len(hits) == 5
+    assert len(sleeps) == 3
+    stats = api._retry.stats
+    assert (stats.retries, stats.recovered, stats.gave_up) == (3, 1, 0)
+    assert stats.reasons == {'connection': 1, '503': 1, '502': 1}
+    assert stats.added_latency == pytest.approx(sum(sleeps))
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_retries(api, faults, hits):
+    faults['subscription/trove'] = [503] * 5
+    with pytest.raises(BackendNotAvailable):
+        await api.get_montly_trove_data()
+    assert len(hits) == 3  # default policy: 2 retries
+    assert api._retry.stats.gave_up == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_after_honoured(api, faults, sleeps):
+    faults['api/v1/user/order'] = [(429, {'Retry-After': '3'})]
+    await api.get_gamekeys()
+    assert sleeps == [3]
+
+
+@pytest.mark.asyncio
+async def test_retry_after_too_long(api, faults, hits):
+    faults['api/v1/user/order'] = [(503, {'Retry-After': '3600'})]
+    with pytest.raises(BackendNotAvailable):
+        await api.get_gamekeys()
+    assert len(hits) == 1
+
+
+@pytest.mark.asyncio
+async def test_client_errors_not_retried(api, faults, hits):
+    faults['api/v1/user/order'] = [403]
+    with pytest.raises(AccessDenied):
+        await api.get_gamekeys()
+    assert len(hits) == 1
+
+
+@pytest.mark.asyncio
+async def test_post_not_retried(api, faults, hits):
+    faults[AuthorizedHumbleAPI._DOWNLOAD_SIGN] = [500]
+    with pytest.raises(BackendError):
+        await api.sign_download('machine_name', 'file.zip')
+    assert hits == [('POST', AuthorizedHumbleAPI._DOWNLOAD_SIGN)]
+
+
+@pytest.mark.asyncio
+async def test_post_retried_when_not_connected(engine, sleeps):
+    calls = []
+
+    async def send():
+        calls.append(1)
+        if len(calls) == 1:
+            raise aiohttp.ClientConnectorError(None, OSError('refused'))
+        return 'ok'
+
+    assert await engine.run('post', RetryPolicy(retries=1), send) == 'ok'
+    assert engine.stats.reasons == {'connect': 1}
+
+
+@pytest.mark.asyncio
+async def test_timeout_retried(engine):
+    calls = []
+
+    async def send():
+        calls.append(1)
+        if len(calls) < 3:
+            raise asyncio.TimeoutError()
+        return 'ok'
+
+    assert await engine.run('get', RetryPolicy(retries=2), send) == 'ok'
+    assert engine.stats.reasons == {'timeout': 2}
+
+
+def test_backoff_grows_with_jitter(engine):
+    policy = RetryPolicy(backoff=1, max_backoff=4)
+    error = asyncio.TimeoutError()
+    for attempt, (low, high) in enumerate([(0.5, 1), (1, 2), (2, 4), (2, 4)]):
+        assert low <= engine._delay(attempt, policy, error) <= high
+
+
+def test_policies():
+    engine = RetryEngine(AuthorizedHumbleAPI._RETRY_POLICIES)
+    assert engine.policy('api/v1/user/order').retries == 3
+    assert engine.policy(AuthorizedHumbleAPI._ORDER_URL.format('x')).retries == 3
+    assert engine.policy(AuthorizedHumbleAPI._HUMBLER_REDEEM_DOWNLOAD).retries == 0
+    assert engine.policy('subscription/may-2020').retries == 2
+
+
+@pytest.mark.parametrize('value, expected', [
+    (None, None),
+    ('', None),
+    ('120', 120),
+    ('Wed, 21 Oct 2020 07:28:10 GMT', 10),
+    ('Wed, 21 Oct 2020 07:27:00 GMT', 0),
+    ('soon', None),
+])
+def test_parse_retry_after(value, expected):
+    now = datetime(2020, 10, 21, 7, 28, tzinfo=timezone.utc)
+    assert parse_retry_after(value, now) == expected
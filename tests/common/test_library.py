@@ -1,14 +1,18 @@
 import pytest
 import time
-from functools import partial
+import json
 from unittest.mock import Mock
 
-from galaxy.api.errors import UnknownError
+from galaxy.api.errors import UnknownError, BackendError
 
-from consts import SOURCE
+import synthetic
+from consts import SOURCE, NON_GAME_BUNDLE_TYPES
 from settings import LibrarySettings
 from library import LibraryResolver
-from model.game import Subproduct, Key
+from model.game import Subproduct, Key, KeyGame
+from model.product import Product
+from model.types import GAME_PLATFORMS
+from utils.fetcher import FetchScheduler
 
 
 @pytest.fixture
@@ -18,7 +22,7 @@ def create_resolver(plugin):
             api=plugin._api,
             settings=settings,
             cache=cache,
-            save_cache_callback=partial(plugin._save_cache, 'library')
+            save_cache_callback=plugin._save_library_cache
         )
     return fn
 
@@ -35,8 +39,9 @@ def get_torchlight(orders_keys):
     for i in orders_keys:
         if i['product']['machine_name'] == 'torchlight_storefront':
             torchlight_order = i
-    drm_free = Subproduct(torchlight_order['subproducts'][0])
-    key = Key(torchlight_order['tpkd_dict']['all_tpks'][0])
+    projected = LibraryResolver._project_order(torchlight_order)
+    drm_free = Subproduct(projected['subproducts'][0])
+    key = Key(projected['tpkd_dict']['all_tpks'][0])
     key_game = key.key_games[0]
     return torchlight_order, drm_free, key_game
 
@@ -91,24 +96,26 @@ async def test_library_fetch_with_cache_orders(plugin, get_torchlight, change_se
     change_settings(plugin, {'sources': ['keys'], 'show_revealed_keys': False})
     result = await plugin._library_resolver()
 
+    # Get orders that has at least one unrevealed key
+    unrevealed_order_keys = []
+    for i in plugin._api.orders:
+        if any(('redeemed_key_val' not in x for x in i['tpkd_dict']['all_tpks'])):
+            unrevealed_order_keys.append(i['gamekey'])
+    assert torchlight['gamekey'] in unrevealed_order_keys
+
     # reveal all keys in torchlight order
     for i in plugin._api.orders:
         if i == torchlight:
             for tpk in i['tpkd_dict']['all_tpks']:
                 tpk['redeemed_key_val'] = 'redeemed mock code'
             break
-    # Get orders that has at least one unrevealed key
-    unrevealed_order_keys = []
-    for i in plugin._api.orders:
-        if any(('redeemed_key_val' not in x for x in i['tpkd_dict']['all_tpks'])):
-            unrevealed_order_keys.append(i['gamekey'])
 
     # reset mocks
     plugin._api.get_gamekeys.reset_mock()
     plugin._api.get_order_details.reset_mock()
 
     # cache "fetch_in" time has not passed:
-    # refresh only orders that may change - those with any unrevealed key
+    # refresh only orders that may change - those with any unrevealed key in cache
     change_settings(plugin, {'sources': ['keys'], 'show_revealed_keys': False})
     result = await plugin._library_resolver()
     assert key.machine_name not in result  # revealed -> removed
@@ -118,11 +125,16 @@ async def test_library_fetch_with_cache_orders(plugin, get_torchlight, change_se
 
 @pytest.mark.asyncio
 async def test_library_cache_period(plugin, change_settings, orders_keys):
-    """Refresh reveals keys only if needed"""
+    """Refresh all orders when their time to live has passed"""
     change_settings(plugin, {'sources': ['keys'], 'show_revealed_keys': False})
+    await plugin._library_resolver()
 
-    # set expired next fetch
-    plugin._library_resolver._cache['next_fetch_orders'] = time.time() - 10
+    # set expired orders
+    for meta in plugin._library_resolver._cache['orders_meta'].values():
+        meta['fetched_at'] = time.time() - 2 * LibraryResolver.NEXT_FETCH_IN
+
+    plugin._api.get_gamekeys.reset_mock()
+    plugin._api.get_order_details.reset_mock()
 
     # cache "fetch_in" time has passed: refresh all
     await plugin._library_resolver()
@@ -130,19 +142,127 @@ async def test_library_cache_period(plugin, change_settings, orders_keys):
     assert plugin._api.get_order_details.call_count == len(orders_keys)
 
 
+@pytest.mark.asyncio
+async def test_library_refresh_only_stale_orders(plugin, change_settings, orders_keys):
+    change_settings(plugin, {'sources': ['keys'], 'show_revealed_keys': True})
+    for order in plugin._api.orders:  # make all orders immutable
+        order.pop('choices_remaining', None)
+        for tpk in order['tpkd_dict']['all_tpks']:
+            tpk['redeemed_key_val'] = 'redeemed mock code'
+    await plugin._library_resolver()
+
+    metas = plugin._library_resolver._cache['orders_meta']
+    stale_gamekey = orders_keys[0]['gamekey']
+    metas[stale_gamekey]['fetched_at'] = time.time() - 2 * LibraryResolver.NEXT_FETCH_IN
+
+    plugin._api.get_order_details.reset_mock()
+    plugin.push_cache.reset_mock()
+
+    await plugin._library_resolver()
+    plugin._api.get_order_details.assert_called_once_with(stale_gamekey)
+    assert metas[stale_gamekey]['fetched_at'] > time.time() - 10
+
+
+@pytest.mark.asyncio
+async def test_library_expected_fetches(plugin, change_settings, orders_keys):
+    resolver = plugin._library_resolver
+    assert resolver.expected_fetches() == LibraryResolver.FETCH_CONCURRENCY  # never fetched
+
+    for order in plugin._api.orders:  # make all orders immutable
+        order.pop('choices_remaining', None)
+        for tpk in order['tpkd_dict']['all_tpks']:
+            tpk['redeemed_key_val'] = 'redeemed mock code'
+    await resolver()
+    assert resolver.expected_fetches() == 1  # order list only
+
+    resolver._cache['orders_meta'][orders_keys[0]['gamekey']]['fetched_at'] = 0
+    resolver._cache['orders_meta'][orders_keys[1]['gamekey']]['fetched_at'] = 0
+    assert resolver.expected_fetches() == 2
+
+    change_settings(plugin, {'sources': []})
+    assert resolver.expected_fetches() == 0
+
+
+@pytest.mark.asyncio
+async def test_owned_games_warm_up_connections(plugin, orders_keys):
+    await plugin.authenticate({'name': '_simpleauth_sess', 'value': 'x'})
+    plugin._api.start_warm_up.assert_not_called()
+    assert plugin._library_resolver._LibraryResolver__cache is None  # not decoded in authentication
+
+    plugin._api.is_authenticated = True
+    await plugin.get_owned_games()
+    plugin._api.start_warm_up.assert_called_once_with(LibraryResolver.FETCH_CONCURRENCY)
+
+
+@pytest.mark.asyncio
+async def test_library_no_save_if_nothing_fetched(plugin, orders_keys):
+    order = orders_keys[0]
+    order.pop('choices_remaining', None)
+    for tpk in order['tpkd_dict']['all_tpks']:
+        tpk['redeemed_key_val'] = 'redeemed mock code'
+    plugin._api.get_gamekeys.return_value = [order['gamekey']]
+    save_cache = Mock()
+    resolver = LibraryResolver(plugin._api, LibrarySettings(), save_cache, {})
+
+    await resolver()
+    assert save_cache.call_count == 1
+    await resolver()
+    assert save_cache.call_count == 1
+    assert plugin._api.get_order_details.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_library_removed_order(plugin, orders_keys):
+    await plugin._library_resolver()
+    removed_gamekey = orders_keys[0]['gamekey']
+    plugin._api.get_gamekeys.return_value = [o['gamekey'] for o in orders_keys[1:]]
+
+    await plugin._library_resolver()
+    assert removed_gamekey not in plugin._library_resolver._cache['orders']
+    assert removed_gamekey not in plugin._library_resolver._cache['orders_meta']
+
+
+@pytest.mark.asyncio
+async def test_library_cache_unchanged_when_fetch_fails(plugin, orders_keys):
+    await plugin._library_resolver()
+    cache = plugin._library_resolver._cache
+    orders, metas = dict(cache['orders']), dict(cache['orders_meta'])
+    plugin._api.get_gamekeys.return_value = [o['gamekey'] for o in orders_keys[1:]] + ['new_order']
+    plugin._api.get_order_details.side_effect = UnknownError()
+
+    with pytest.raises(UnknownError):
+        await plugin._library_resolver()
+    assert cache['orders'] == orders
+    assert cache['orders_meta'] == metas
+    assert plugin._library_resolver._dirty_orders == set()
+
+
+@pytest.mark.asyncio
+async def test_library_migrate_cache_with_next_fetch(plugin, get_torchlight):
+    order, _, _ = get_torchlight
+    cache = {
+        'orders': {order['gamekey']: order},
+        'next_fetch_orders': time.time() + LibraryResolver.NEXT_FETCH_IN / 2
+    }
+    resolver = LibraryResolver(plugin._api, LibrarySettings(), Mock(), cache)
+    metas = resolver._orders_meta()
+    assert 'next_fetch_orders' not in cache
+    assert not metas[order['gamekey']].is_stale
+    assert metas[order['gamekey']].hash == LibraryResolver._content_hash(LibraryResolver._project_order(order))
+
+
 # --------test fetching orders-------------------
 
 @pytest.mark.asyncio
 async def test_fetch_orders_filter_errors_ok(plugin, create_resolver):
     resolver = create_resolver(Mock())
-    await resolver._fetch_orders([])
+    await resolver._fetch_order_details(await plugin._api.get_gamekeys())
 
 @pytest.mark.asyncio
 async def test_fetch_orders_filter_errors_all_bad(plugin, create_resolver):
     resolver = create_resolver(Mock())
-    plugin._api.get_gamekeys.return_value = ['this_will_give_UnknownError', 'this_too']
     with pytest.raises(UnknownError):
-        await resolver._fetch_orders([])
+        await resolver._fetch_order_details(['this_will_give_UnknownError', 'this_too'])
 
 @pytest.mark.asyncio
 async def test_fetch_orders_filter_errors_one_404(plugin, create_resolver, caplog):
@@ -150,9 +270,82 @@ async def test_fetch_orders_filter_errors_one_404(plugin, create_resolver, caplo
     resolver = create_resolver(Mock())
     resolver = create_resolver(Mock())
     real_gamekeys = await plugin._api.get_gamekeys()
-    plugin._api.get_gamekeys.return_value = [real_gamekeys[0], 'this_will_give_UnknownError']
     caplog.clear()
-    orders = await resolver._fetch_orders([])
+    orders = await resolver._fetch_order_details([real_gamekeys[0], 'this_will_give_UnknownError'])
     assert len(orders) == 1
     assert 'UnknownError' in caplog.text
     assert caplog.records[0].levelname == 'ERROR'
+
+
+@pytest.mark.asyncio
+async def test_fetch_orders_not_requeued(plugin, create_resolver):
+    """Transient failures are retried by AuthorizedHumbleAPI per request; the fetcher does not repeat them"""
+    plugin._api.get_order_details.side_effect = BackendError()
+    resolver = create_resolver(Mock())
+    with pytest.raises(BackendError):
+        await resolver._fetch_order_details(['a', 'b'])
+    assert plugin._api.get_order_details.call_count == 2
+
+
+# --------order projection-------------------
+
+def test_project_order(orders_keys):
+    for order in orders_keys:
+        projected = LibraryResolver._project_order(order)
+        assert LibraryResolver._project_order(projected) == projected
+        assert len(json.dumps(projected)) < len(json.dumps(order))
+        assert projected['gamekey'] == order['gamekey']
+        def keys_info(order):
+            return [(k.machine_name, k.human_name, k.key_type_human_name, k.key_val)
+                    for k in LibraryResolver._get_keys([order], show_revealed_keys=True)]
+        assert keys_info(projected) == keys_info(order)
+
+
+@pytest.mark.asyncio
+async def test_project_order_same_games(orders):
+    """Projection cannot change games resolved from orders"""
+    projected = [LibraryResolver._project_order(o) for o in orders]
+    assert [s.machine_name for s in LibraryResolver._get_subproducts(projected)] \
+        == [s.machine_name for s in LibraryResolver._get_subproducts(orders)]
+    assert [set(s.downloads) for s in LibraryResolver._get_subproducts(projected)] \
+        == [set(s.downloads) & GAME_PLATFORMS for s in LibraryResolver._get_subproducts(orders)]
+
+
+@pytest.mark.asyncio
+async def test_library_migrate_cache_projection(plugin, get_torchlight):
+    order, drm_free, _ = get_torchlight
+    cache = {'orders': {order['gamekey']: order}}
+    resolver = LibraryResolver(plugin._api, LibrarySettings({SOURCE.DRM_FREE}), Mock(), cache)
+    assert 'orders_projection' not in cache  # migrated when used for the first time
+    assert {drm_free.machine_name: drm_free} == await resolver(only_cache=True)
+    assert cache['orders_projection'] == LibraryResolver.ORDER_PROJECTION_VERSION
+    assert cache['orders'][order['gamekey']] == LibraryResolver._project_order(order)
+
+
+@pytest.mark.asyncio
+async def test_library_cache_loaded_lazily(plugin, get_torchlight):
+    order, drm_free, _ = get_torchlight
+    load_cache = Mock(return_value={'orders': {order['gamekey']: order}})
+    resolver = LibraryResolver(plugin._api, LibrarySettings({SOURCE.DRM_FREE}), Mock(), load_cache)
+    load_cache.assert_not_called()
+    assert {drm_free.machine_name: drm_free} == await resolver(only_cache=True)
+    assert {drm_free.machine_name: drm_free} == await resolver(only_cache=True)
+    load_cache.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_library_synthetic_account(plugin, caplog):
+    orders = synthetic.generate_orders(300, seed=3)
+    assert orders == synthetic.generate_orders(300, seed=3)
+    by_gamekey = {o['gamekey']: o for o in orders}
+    plugin._api.get_gamekeys.return_value = list(by_gamekey)
+    plugin._api.get_order_details.side_effect = lambda gamekey: by_gamekey[gamekey]
+    plugin._library_resolver._settings.show_revealed_keys = True
+    plugin._library_resolver._fetcher = FetchScheduler(rate=1e6)
+    games = await plugin._library_resolver()
+
+    assert 'Error while parsing' not in caplog.text
+    non_game = {gk for gk, o in by_gamekey.items() if Product(o['product']).bundle_type in NON_GAME_BUNDLE_TYPES}
+    assert non_game and non_game.isdisjoint(plugin._library_resolver._cache['orders'])
+    assert any(isinstance(g, KeyGame) and g.machine_name.endswith('_1') for g in games.values())  # multi-game key
+    assert len({g.human_name for g in games.values()}) == len(games)
@@ -2,7 +2,11 @@ import pytest
 import asyncio
 from unittest.mock import MagicMock
 
-from gui.options import OPTIONS_MODE
+from conftest import AsyncMock
+
+import guirunner as gui
+from consts import OPTIONS_MODE
+from model.game import Key
 
 
 @pytest.fixture
@@ -42,7 +46,21 @@ async def test_open_welcome_on_authenticate(plugin, auth_cookie):
 async def test_open_options_on_clicking_install(plugin, delayed_fn):
     plugin._open_config = MagicMock(spec=())
     await asyncio.gather(
-        delayed_fn(0.1, plugin.install_game),
-        delayed_fn(0.2, plugin.install_game)
+        delayed_fn(0.1, plugin.install_game, 'game_id'),
+        delayed_fn(0.2, plugin.install_game, 'game_id')
     )
     plugin._open_config.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_gui_prepared_only_for_keys(plugin, mocker):
+    show_key = mocker.patch('guirunner.show_key', AsyncMock())
+    key = Key({'machine_name': 'ww', 'human_name': 'The Witcher', 'key_type_human_name': 'Steam Key'})
+    plugin._owned_games = {'ww': key}
+
+    await plugin.install_game('game_id')
+    gui.prepare.assert_not_called()
+
+    await plugin.install_game('ww')
+    gui.prepare.assert_called_once()
+    show_key.assert_called_once_with(key)
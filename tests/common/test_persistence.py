@@ -0,0 +1,258 @@
+import asyncio
+import json
+from unittest.mock import Mock
+
+import pytest
+from galaxy.api.errors import AuthenticationRequired
+
+from persistence import DeltaCache, CompactCodec
+from model.game import TroveGame
+
+
+@pytest.fixture
+def storage():
+    return {'old': json.dumps({'a': 1})}
+
+
+@pytest.fixture
+def create_cache(storage):
+    def fn(debounce=0.05):
+        push = Mock()
+        return DeltaCache(storage, push, debounce), push
+    return fn
+
+
+@pytest.mark.asyncio
+async def test_load(create_cache):
+    cache, _ = create_cache()
+    assert cache.load('old') == {'a': 1}
+    assert cache.load('not_existing', default=[]) == []
+
+
+@pytest.mark.asyncio
+async def test_debounced_push(create_cache, storage):
+    cache, push = create_cache()
+    cache.save('a', 1)
+    cache.save('b', [1, 2])
+    cache.save('a', 3)
+    assert cache.load('a') == 3
+    assert 'a' not in storage
+    await asyncio.sleep(0.1)
+    push.assert_called_once()
+    assert storage['a'] == '3'
+    assert storage['b'] == '[1, 2]'
+    assert cache.dirty_keys == []
+
+
+@pytest.mark.asyncio
+async def test_flush_only_dirty(create_cache, storage):
+    cache, push = create_cache()
+    storage['old'] = 'not reserialized'
+    cache.save('new', 'x')
+    cache.flush()
+    assert storage == {'old': 'not reserialized', 'new': '"x"'}
+    push.assert_called_once()
+
+    cache.flush()
+    push.assert_called_once()  # nothing dirty, nothing pushed
+
+
+@pytest.mark.asyncio
+async def test_delete(create_cache, storage):
+    cache, _ = create_cache()
+    cache.save('prefix_1', 1)
+    cache.save('prefix_2', 2)
+    cache.delete('old')
+    assert cache.load('old') is None
+    assert sorted(cache.keys('prefix_')) == ['prefix_1', 'prefix_2']
+    cache.flush()
+    assert 'old' not in storage
+
+
+@pytest.mark.asyncio
+async def test_keys_order_stable(storage):
+    storage.update({f'prefix_{i}': '1' for i in [3, 1, 2]})
+    cache = DeltaCache(storage, Mock())
+    cache.save('prefix_0', 0)
+    cache.save('prefix_1', 1)
+    cache.delete('prefix_2')
+    assert cache.keys('prefix_') == ['prefix_3', 'prefix_1', 'prefix_0']
+
+
+# ---------- compact codec -------------
+
+@pytest.fixture
+def codec():
+    return CompactCodec()
+
+
+def test_codec_roundtrip(codec, orders):
+    encoded = [codec.encode(order) for order in orders]
+    assert all(e.startswith('z1:') for e in encoded)
+    assert [codec.decode(e) for e in encoded] == orders
+    assert sum(map(len, encoded)) < sum(len(json.dumps(order)) for order in orders) / 3
+
+
+@pytest.mark.parametrize('value', ['0.9.2', 1, None, {'a': [1, 2]}, []])
+def test_codec_small_values_as_json(codec, value):
+    encoded = codec.encode(value)
+    assert json.loads(encoded) == value
+    assert codec.decode(encoded) == value
+
+
+def test_codec_reads_json_entries(codec, orders):
+    assert codec.decode(json.dumps(orders[0])) == orders[0]
+    assert codec.decode('"zebra"') == 'zebra'
+
+
+def test_codec_unknown_version(codec):
+    with pytest.raises(ValueError):
+        codec.decode('z999:eJwDAAAAAAE=')
+
+
+@pytest.mark.asyncio
+async def test_delta_cache_codec(storage):
+    cache = DeltaCache(storage, Mock(), codec=CompactCodec())
+    value = {'machine_name': 'x' * 200}
+    assert cache.load('old') == {'a': 1}
+    cache.save('new', value)
+    cache.flush()
+    assert storage['new'].startswith('z1:')
+    assert DeltaCache(storage, Mock(), codec=CompactCodec()).load('new') == value
+
+
+# ---------- plugin library cache -------------
+
+@pytest.mark.asyncio
+async def test_library_cache_sharded(plugin, orders_keys):
+    await plugin._library_resolver()
+    plugin._cache_store.flush()
+    library = CompactCodec().decode(plugin.persistent_cache['library'])
+    assert 'orders' not in library
+    assert 'orders_meta' not in library
+    order_entries = [k for k in plugin.persistent_cache if k.startswith('library_order_')]
+    fetched = list(plugin._library_resolver._cache['orders'])
+    assert len(order_entries) == len(fetched)
+
+    # reload; order of fetching is kept regardless of entries order
+    for key in reversed(order_entries):
+        plugin.persistent_cache[key] = plugin.persistent_cache.pop(key)
+    plugin.handshake_complete()
+    assert list(plugin._library_resolver._cache['orders']) == fetched
+
+
+@pytest.mark.asyncio
+async def test_library_cache_only_changed_orders_saved(plugin, orders_keys):
+    await plugin._library_resolver()
+    plugin._cache_store.flush()
+    plugin.push_cache.reset_mock()
+
+    for meta in plugin._library_resolver._cache['orders_meta'].values():  # refetch all
+        meta['fetched_at'] = 0
+    changed = orders_keys[0]
+    plugin._api.orders[0] = dict(changed, product=dict(changed['product'], human_name='Changed'))
+    await plugin._library_resolver()
+
+    dirty = plugin._cache_store.dirty_keys
+    assert 'library_order_' + changed['gamekey'] in dirty
+    assert sum(k.startswith('library_order_') for k in dirty) == 1
+    assert sum(k.startswith('library_meta_') for k in dirty) == len(orders_keys)
+    assert 'library' not in dirty  # set of orders has not changed
+    plugin._cache_store.flush()
+    plugin.push_cache.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_library_cache_migration_from_single_entry(plugin, get_data):
+    order = get_data('overgrowth.json')
+    plugin.persistent_cache['library'] = json.dumps({'orders': {order['gamekey']: order}})
+    plugin.handshake_complete()
+    assert order['gamekey'] in plugin._library_resolver._cache['orders']
+    plugin._cache_store.flush()
+    decode = CompactCodec().decode
+    assert 'orders' not in decode(plugin.persistent_cache['library'])
+    assert decode(plugin.persistent_cache['library_order_' + order['gamekey']]) == order
+
+
+@pytest.mark.asyncio
+async def test_library_cache_only_refetched_metas_saved(plugin, orders_keys):
+    for order in plugin._api.orders:  # make all orders immutable
+        order.pop('choices_remaining', None)
+        for tpk in order['tpkd_dict']['all_tpks']:
+            tpk['redeemed_key_val'] = 'redeemed mock code'
+    await plugin._library_resolver()
+    plugin._cache_store.flush()
+    refetched = orders_keys[0]['gamekey']
+    plugin._library_resolver._cache['orders_meta'][refetched]['fetched_at'] = 0
+    await plugin._library_resolver()
+
+    dirty = plugin._cache_store.dirty_keys
+    assert [k for k in dirty if k.startswith('library_')] == ['library_meta_' + refetched]
+
+
+@pytest.mark.asyncio
+async def test_library_cache_migration_from_single_meta_entry(plugin, orders_keys):
+    await plugin._library_resolver()
+    plugin._cache_store.flush()
+    metas = plugin._library_resolver._cache['orders_meta']
+    decode = CompactCodec().decode
+    library = decode(plugin.persistent_cache['library'])
+    library['orders_meta'] = {gamekey: metas[gamekey] for gamekey in library.pop('gamekeys')}
+    plugin.persistent_cache['library'] = json.dumps(library)
+    for key in [k for k in plugin.persistent_cache if k.startswith('library_meta_')]:
+        del plugin.persistent_cache[key]
+
+    plugin.handshake_complete()
+    assert plugin._library_resolver._cache['orders_meta'] == metas
+    plugin._cache_store.flush()
+    assert 'orders_meta' not in decode(plugin.persistent_cache['library'])
+    assert decode(plugin.persistent_cache['library_meta_' + orders_keys[0]['gamekey']]) == metas[orders_keys[0]['gamekey']]
+
+
+# ---------- lazy hydration -------------
+
+@pytest.mark.asyncio
+async def test_cache_decoded_lazily(plugin, get_troves, mocker):
+    owned = await plugin._library_resolver()
+    plugin._trove_games = {t['machine_name']: TroveGame(t) for t in get_troves(from_index=3)}
+    plugin.subscription_games_import_complete()
+    plugin._cache_store.flush()
+    troves = dict(plugin._trove_games)
+
+    decode = mocker.spy(CompactCodec, 'decode')
+    plugin.handshake_complete()
+    decoded = {call.args[1] for call in decode.call_args_list}
+    assert not any(plugin.persistent_cache[k] in decoded for k in plugin.persistent_cache
+                   if k == 'trove_games' or k.startswith('library_order_'))
+
+    assert plugin._trove_games == troves
+    assert await plugin._library_resolver(only_cache=True) == owned
+
+
+@pytest.mark.asyncio
+async def test_first_response_metric(plugin):
+    plugin.handshake_complete()
+    assert 0 <= plugin.startup_metrics['handshake_complete'] < 1
+    assert 'first_response' not in plugin.startup_metrics
+    await plugin.authenticate()
+    first_response = plugin.startup_metrics['first_response']
+    assert first_response > 0
+    await plugin.authenticate()
+    assert plugin.startup_metrics['first_response'] == first_response
+
+
+@pytest.mark.asyncio
+async def test_first_response_metric_on_local_games(plugin):
+    plugin.handshake_complete()
+    await plugin.get_local_games()
+    first_response = plugin.startup_metrics['first_response']
+    await plugin.authenticate()
+    assert plugin.startup_metrics['first_response'] == first_response
+
+
+@pytest.mark.asyncio
+async def test_first_response_metric_on_error(plugin):
+    plugin._api.authenticate.side_effect = AuthenticationRequired()
+    with pytest.raises(AuthenticationRequired):
+        await plugin.authenticate({'name': '_simpleauth_sess', 'value': 'x'})
+    assert plugin.startup_metrics['first_response'] > 0
\ No newline at end of file
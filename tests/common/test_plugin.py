@@ -58,7 +58,7 @@ async def test_install_game_drm_free(api_mock, plugin, overgrowth):
 async def test_install_game_trove(api_mock, plugin):
     id_ = 'trove_game'
     platform = HP.WINDOWS if IS_WINDOWS else HP.MAC
-    game = Mock(spec=TroveGame, downloads={platform: Mock(spec=TroveDownload)})
+    game = Mock(spec=TroveGame, human_name='Trove Game', downloads={platform: Mock(spec=TroveDownload)})
     plugin._owned_games = { id_: game }
     expected_url = "https://dl.humble.com/developer/trove_game_012_build-5584-win64.zip?gamekey=XrCTukcAFwsh&ttl=1563893021&t=7f2263e7f3360f3beb112e58521145a0"
     api_mock.sign_url_trove.return_value = {
@@ -91,11 +91,11 @@ async def test_get_os_compatibility(plugin, overgrowth):
 
 @pytest.mark.asyncio
 async def test_library_settings_key(plugin):
-    trove = Mock(spec=TroveGame)
-    drm_free = Mock(spec=Subproduct)
-    key = Mock(spec=KeyGame)
+    trove = Mock(spec=TroveGame, human_name='Trove', downloads={})
+    drm_free = Mock(spec=Subproduct, human_name='DRM free', downloads={})
+    key = Mock(spec=KeyGame, human_name='Key', downloads={})
     type(key).key_val = PropertyMock(return_value='COEO23DN')
-    unrevealed_key = Mock(spec=KeyGame)
+    unrevealed_key = Mock(spec=KeyGame, human_name='Unrevealed key', downloads={})
     type(unrevealed_key).key_val = PropertyMock(return_value=None)
 
     plugin._owned_games = {
@@ -0,0 +1,133 @@
+from unittest.mock import Mock
+
+import pytest
+
+from consts import IS_WINDOWS
+from model.game import Subproduct, TroveGame, Key
+from model.types import HP
+from registry import GameRegistry, normalize_title
+
+
+def subproduct(id_, name, platforms=('windows',)):
+    return Subproduct({
+        'machine_name': id_,
+        'human_name': name,
+        'downloads': [{'platform': p, 'machine_name': f'{id_}_{p}', 'download_struct': []} for p in platforms]
+    })
+
+
+def trove(id_, name, platforms=('windows',)):
+    return TroveGame({
+        'machine_name': id_,
+        'human-name': name,
+        'downloads': {p: {'machine_name': f'{id_}_{p}'} for p in platforms}
+    })
+
+
+@pytest.fixture
+def registry():
+    return GameRegistry(['owned', 'trove'])
+
+
+def test_normalize_title():
+    assert normalize_title('Trine 2: Complete Story') == 'trine 2 complete story'
+    assert normalize_title('  SHANK   2 ') == 'shank 2'
+
+
+def test_set_and_lookup(registry):
+    a = subproduct('a', 'A', ['windows', 'mac'])
+    k = Key({'machine_name': 'k', 'human_name': 'K'})
+    registry.set_source('owned', {'a': a, 'k': k})
+    assert registry['a'] is a
+    assert registry.get('x') is None
+    assert len(registry) == 2
+    assert set(registry.keys()) == {'a', 'k'}
+    assert registry.by_platform(HP.MAC) == {'a'}
+    assert registry.by_platform(HP.LINUX) == set()
+    assert registry.by_title('a') == {'a'}
+
+
+def test_set_source_removes_old(registry):
+    registry.set_source('owned', {'a': subproduct('a', 'A'), 'b': subproduct('b', 'B')})
+    registry.set_source('owned', {'b': subproduct('b', 'B')})
+    assert list(registry) == ['b']
+    assert registry.by_platform(HP.WINDOWS) == {'b'}
+    assert registry.by_title('A') == set()
+
+
+def test_later_source_wins(registry):
+    owned = subproduct('a', 'A', ['windows'])
+    trove_game = trove('a', 'A Trove', ['mac'])
+    registry.set_source('owned', {'a': owned})
+    registry.update_source('trove', {'a': trove_game})
+    assert registry['a'] is trove_game
+    assert registry.by_platform(HP.WINDOWS) == set()
+    assert registry.by_platform(HP.MAC) == {'a'}
+
+    registry.set_source('trove', {})
+    assert registry['a'] is owned
+    assert registry.by_title('a trove') == set()
+
+
+def test_version_bumped_only_on_change(registry):
+    a = subproduct('a', 'A')
+    registry.set_source('owned', {'a': a})
+    version = registry.version
+    registry.set_source('owned', {'a': a})
+    assert registry.version == version
+    registry.update_source('trove', {'b': trove('b', 'B')})
+    assert registry.version > version
+
+
+@pytest.mark.asyncio
+async def test_plugin_installable_titles_cached(plugin):
+    platform = 'windows' if IS_WINDOWS else 'mac'
+    plugin._owned_games = {
+        'a': subproduct('a', 'A', [platform]),
+        'b': subproduct('b', 'B', ['linux']),
+        'k': Key({'machine_name': 'k', 'human_name': 'K'}),
+    }
+    titles = plugin._get_installable_titles()
+    assert titles == {'A': 'a'}
+    assert plugin._get_installable_titles() is titles
+
+    plugin._trove_games = {'t': trove('t', 'T', [platform])}
+    assert plugin._get_installable_titles() == {'A': 'a', 'T': 't'}
+
+
+def test_ordered_by_source(registry):
+    registry.set_source('trove', {'t': trove('t', 'T'), 'a': trove('a', 'A')})
+    registry.set_source('owned', {'b': subproduct('b', 'B'), 'a': subproduct('a', 'A')})
+    assert list(registry.ordered()) == ['b', 'a', 't']
+
+
+@pytest.mark.asyncio
+async def test_plugin_installable_titles_trove_wins_on_same_title(plugin):
+    platform = 'windows' if IS_WINDOWS else 'mac'
+    plugin._owned_games = {f'owned_{i}': subproduct(f'owned_{i}', f'Game {i}', [platform]) for i in range(20)}
+    plugin._trove_games = {f'trove_{i}': trove(f'trove_{i}', f'Game {i}', [platform]) for i in range(20)}
+    assert plugin._get_installable_titles() == {f'Game {i}': f'trove_{i}' for i in range(20)}
+
+
+def test_source_loader_called_on_first_access(registry):
+    t = trove('t', 'T')
+    loader = Mock(return_value={'t': t})
+    registry.set_source_loader('trove', loader)
+    loader.assert_not_called()
+    assert registry.by_platform(HP.WINDOWS) == {'t'}
+    assert registry['t'] is t
+    loader.assert_called_once()
+
+
+def test_source_loader_replaced_by_set_source(registry):
+    loader = Mock(return_value={'t': trove('t', 'T')})
+    registry.set_source_loader('trove', loader)
+    registry.set_source('trove', {})
+    assert len(registry) == 0
+    loader.assert_not_called()
+
+
+def test_source_loader_before_update(registry):
+    registry.set_source_loader('trove', lambda: {'t': trove('t', 'T')})
+    registry.update_source('trove', {'u': trove('u', 'U')})
+    assert set(registry) == {'t', 'u'}
@@ -3,7 +3,7 @@ from pathlib import Path
 from dataclasses import dataclass
 import pytest
 
-from settings import UpdateTracker, Settings, InstalledSettings, LibrarySettings
+from settings import UpdateTracker, Settings, InstalledSettings, LibrarySettings, DebugSettings
 from consts import IS_WINDOWS
 
 # -------- UpdateTracker ----------
@@ -115,3 +115,20 @@ def test_settings_default_config():
         'library': LibrarySettings().serialize(),
         'installed': InstalledSettings().serialize()
     }
+
+
+def test_settings_debug_tracing(caplog):
+    debug = DebugSettings()
+    assert debug.tracing is False
+    debug.update({'tracing': True})
+    assert debug.tracing is True
+    debug.update({'tracing': 'yes'})
+    assert debug.tracing is True
+    assert 'TypeError' in caplog.text
+
+
+def test_settings_debug_serialized_only_when_set():
+    settings = Settings()
+    assert 'debug' not in settings.get_config()
+    settings.debug.update({'tracing': True})
+    assert settings.get_config()['debug'] == {'tracing': True}
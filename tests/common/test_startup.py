@@ -0,0 +1,31 @@
+"""Import budget of the plugin process: modules that must not be loaded before they are really needed"""
+import sys
+import json
+import asyncio
+import pathlib
+import subprocess
+
+import pytest
+
+
+SRC = pathlib.Path(__file__).parent.parent.parent / 'src'
+
+# GUI runs in a separate process; error reporting starts after handshake; the rest is rarely used
+DEFERRED_PACKAGES = {'toga', 'gui', 'sentry_sdk', 'distutils', 'setuptools', 'webbrowser'}
+
+
+@pytest.mark.skipif(sys.platform not in ('win32', 'darwin'), reason='plugin runs only on Windows and macOS')
+def test_plugin_import_budget():
+    code = 'import sys, json; import plugin; print(json.dumps(sorted(sys.modules)))'
+    output = subprocess.run([sys.executable, '-c', code], cwd=SRC, capture_output=True, text=True, check=True).stdout
+    modules = json.loads(output.splitlines()[-1])
+    assert {m for m in modules if m.split('.')[0] in DEFERRED_PACKAGES} == set()
+
+
+@pytest.mark.asyncio
+async def test_sentry_initialized_after_handshake(plugin, mocker):
+    init_sentry = mocker.patch('plugin.init_sentry')
+    plugin.handshake_complete()
+    init_sentry.assert_not_called()
+    await asyncio.sleep(0)
+    init_sentry.assert_called_once()
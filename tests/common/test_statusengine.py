@@ -0,0 +1,137 @@
+import asyncio
+from unittest.mock import Mock
+
+import psutil
+import pytest
+from galaxy.api.types import LocalGameState
+
+from local.localgame import LocalHumbleGame
+from local.statusengine import LocalStatusEngine
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def engine(clock):
+    return LocalStatusEngine(clock)
+
+
+@pytest.fixture
+def pids(mocker):
+    return mocker.patch('psutil.pids', return_value=[])
+
+
+@pytest.fixture
+def game(tmp_path):
+    exe = tmp_path / 'game.exe'
+    exe.touch()
+    return LocalHumbleGame('game', exe)
+
+
+def process(pid, status=psutil.STATUS_RUNNING, running=True):
+    return Mock(spec=psutil.Process, pid=pid, **{'status.return_value': status, 'is_running.return_value': running})
+
+
+def test_only_transitions_reported(engine, game, clock):
+    assert engine.poll([game]) == [('game', LocalGameState.Installed)]
+    clock.now += 100
+    assert engine.poll([game]) == []
+
+
+def test_exists_checked_on_backoff_cadence(engine, game, clock):
+    engine.poll([game])
+    assert engine.stats.exists_calls == 1
+    engine.poll([game])
+    assert engine.stats.exists_calls == 1
+    assert engine.stats.last_tick == 0
+
+    checks_at = []
+    for _ in range(120):
+        clock.now += 1
+        before = engine.stats.exists_calls
+        engine.poll([game])
+        if engine.stats.exists_calls > before:
+            checks_at.append(clock.now)
+    intervals = [b - a for a, b in zip(checks_at, checks_at[1:])]
+    assert intervals == sorted(intervals)
+    assert intervals[-1] == LocalStatusEngine.EXISTS_INTERVAL_MAX
+
+
+def test_uninstall_detected(engine, game, clock):
+    engine.poll([game])
+    game.executable.unlink()
+    engine.wake(expect_change=True)
+    assert engine.poll([game]) == [('game', LocalGameState.None_)]
+
+
+def test_new_game_checked_immediately(engine, game, tmp_path):
+    engine.poll([game])
+    other = LocalHumbleGame('other', tmp_path / 'not_existing.exe')
+    assert engine.poll([game, other]) == [('other', LocalGameState.None_)]
+
+
+def test_running_single_snapshot(engine, game, tmp_path, pids):
+    game.process = process(10)
+    game2 = LocalHumbleGame('game2', game.executable, process=process(11))
+    idle = LocalHumbleGame('idle', tmp_path / 'idle.exe')
+    pids.return_value = [1, 10, 11]
+
+    changes = engine.poll([game, game2, idle])
+    assert ('game', LocalGameState.Installed | LocalGameState.Running) in changes
+    pids.assert_called_once()
+    assert engine.stats.status_calls == 4  # is_running and status per tracked process
+    assert engine.next_poll_in == LocalStatusEngine.POLL_INTERVAL
+
+    pids.return_value = [1, 11]
+    assert engine.poll([game, game2, idle]) == [('game', LocalGameState.Installed)]
+    assert game.process is None
+
+
+def test_zombie_reaped(engine, game, pids):
+    game.process = proc = process(10, psutil.STATUS_ZOMBIE)
+    pids.return_value = [10]
+    assert engine.poll([game]) == [('game', LocalGameState.Installed)]
+    proc.wait.assert_called_once()
+    assert game.process is None
+
+
+def test_reused_pid_not_running(engine, game, pids):
+    game.process = process(10, running=False)  # pid exists, but belongs to another process now
+    pids.return_value = [10]
+    assert engine.poll([game]) == [('game', LocalGameState.Installed)]
+    assert game.process is None
+
+
+def test_removed_games_forgotten(engine, game, tmp_path):
+    other = LocalHumbleGame('other', tmp_path / 'other.exe')
+    engine.poll([game, other])
+    engine.poll([game])
+    assert set(engine._states) == set(engine._installed) == {'game'}
+    assert engine.poll([game, other]) == [('other', LocalGameState.None_)]
+
+
+def test_no_snapshot_when_nothing_running(engine, game, pids, clock):
+    engine.poll([game])
+    pids.assert_not_called()
+    assert engine.next_poll_in > LocalStatusEngine.POLL_INTERVAL
+
+
+@pytest.mark.asyncio
+async def test_wake_interrupts_sleep(engine, game):
+    engine.poll([game])
+    sleeping = asyncio.ensure_future(engine.sleep())
+    await asyncio.sleep(0)
+    assert not sleeping.done()
+    engine.wake()
+    await asyncio.wait_for(sleeping, 1)
@@ -1,10 +1,14 @@
+import asyncio
+import json
 from unittest.mock import MagicMock
 import pytest
 
-from conftest import aiter
+from conftest import aiter, AsyncMock
 
 from galaxy.api.types import SubscriptionGame
+from galaxy.api.errors import UnknownError
 from model.game import TroveGame
+from model.subscription import ChoiceContentData, ChoiceMonth
 
 
 @pytest.mark.asyncio
@@ -73,3 +77,143 @@ async def test_subscription_games_cache_trove(api_mock, plugin):
         'c': TroveGame({'human-name': 'C', 'machine_name': 'c'}),
         'z': TroveGame({'human-name': 'Z', 'machine_name': 'z'}),
     }
+
+
+@pytest.mark.asyncio
+async def test_trove_games_cache(plugin, get_troves):
+    troves = [TroveGame(t) for t in get_troves(from_index=0)[:3]]
+    plugin._trove_games = {t.machine_name: t for t in troves}
+    plugin.subscription_games_import_complete()
+    plugin._cache_store.flush()
+    plugin._trove_games = {}
+
+    plugin.handshake_complete()
+    assert plugin._trove_games == {t.machine_name: t for t in troves}
+
+
+@pytest.mark.asyncio
+async def test_trove_games_legacy_json_cache(plugin, get_troves):
+    raw = get_troves(from_index=0)[0]
+    plugin.persistent_cache['trove_games'] = json.dumps([TroveGame(raw).serialize(), {'broken': True}])
+    plugin.handshake_complete()
+    assert plugin._trove_games == {raw['machine_name']: TroveGame(raw)}
+
+
+# ---------- choice months -------------
+
+def choice_content(month_path, choices, choices_made=None, extras=(), max_choices=10):
+    return ChoiceContentData({
+        'userOptions': {},
+        'userSubscriptionPlan': None,
+        'payEarlyOptions': {},
+        'contentChoiceOptions': {
+            'MAX_CHOICES': max_choices,
+            'isActiveContent': False,
+            'productUrlPath': month_path,
+            'productMachineName': month_path,
+            'title': month_path,
+            'contentChoiceData': {
+                'initial': {
+                    'content_choices': {
+                        id_: {'title': title, 'display_item_machine_name': id_, 'delivery_methods': [], 'platforms': []}
+                        for id_, title in choices.items()
+                    }
+                },
+                'extras': [
+                    {'human_name': name, 'machine_name': id_, 'class': 'extra', 'types': []}
+                    for id_, name in extras
+                ]
+            },
+            'contentChoicesMade': {'initial': {'choices_made': choices_made}} if choices_made else None
+        }
+    })
+
+
+@pytest.fixture
+def plugin_with_months(plugin):
+    plugin._subscription_months = [
+        ChoiceMonth({
+            'machine_name': f'{name}_2020_choice',
+            'short_human_name': f'{name.title()} 2020',
+            'monthly_product_page_url': f'/subscription/{name}-2020'
+        }, is_active=(name == 'may'))
+        for name in ('may', 'april', 'march')
+    ]
+    return plugin
+
+
+@pytest.fixture
+def month_contents():
+    return {
+        'may-2020': choice_content('may-2020', {'a': 'A', 'b': 'B'}),
+        'april-2020': choice_content(
+            'april-2020', {'c': 'C', 'd': 'D', 'g': 'G'}, choices_made=['c', 'g'], max_choices=2, extras=[('e', 'E')]
+        ),
+        'march-2020': choice_content('march-2020', {'f': 'F'}),
+    }
+
+
+@pytest.mark.asyncio
+async def test_prepare_context_prefetches_months(api_mock, plugin_with_months, month_contents):
+    in_flight, max_in_flight = 0, 0
+    calls = []
+
+    async def get_content(path):
+        nonlocal in_flight, max_in_flight
+        calls.append(path)
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return month_contents[path]
+
+    api_mock.get_choice_content_data = get_content
+    names = ['Humble Choice 2020-04', 'Humble Choice 2020-03', 'Humble Trove']
+    ctx = await plugin_with_months.prepare_subscription_games_context(names)
+    assert sorted(calls) == ['april-2020', 'march-2020']
+    assert max_in_flight == 2
+
+    api_mock.get_choice_content_data = AsyncMock()
+    games = [g async for batch in plugin_with_months.get_subscription_games('Humble Choice 2020-04', ctx) for g in batch]
+    api_mock.get_choice_content_data.assert_not_called()
+    assert games == [SubscriptionGame('C', 'c'), SubscriptionGame('G', 'g'), SubscriptionGame('E', 'e')]
+
+
+@pytest.mark.asyncio
+async def test_prepare_context_failed_month_fetched_on_demand(api_mock, plugin_with_months, month_contents):
+    api_mock.get_choice_content_data = AsyncMock(side_effect=UnknownError())
+    ctx = await plugin_with_months.prepare_subscription_games_context(['Humble Choice 2020-03'])
+
+    api_mock.get_choice_content_data = AsyncMock(return_value=month_contents['march-2020'])
+    games = [g async for batch in plugin_with_months.get_subscription_games('Humble Choice 2020-03', ctx) for g in batch]
+    api_mock.get_choice_content_data.assert_called_once_with('march-2020')
+    assert games == [SubscriptionGame('F', 'f')]
+
+
+@pytest.mark.asyncio
+async def test_closed_months_cached(api_mock, plugin_with_months, month_contents):
+    names = ['Humble Choice 2020-05', 'Humble Choice 2020-04', 'Humble Choice 2020-03']
+
+    async def import_subscriptions():
+        ctx = await plugin_with_months.prepare_subscription_games_context(names)
+        return {
+            name: [g async for batch in plugin_with_months.get_subscription_games(name, ctx) for g in batch]
+            for name in names
+        }
+
+    async def get_content(path):
+        calls.append(path)
+        return month_contents[path]
+
+    calls = []
+    api_mock.get_choice_content_data = get_content
+    month_contents['may-2020'].pay_early_options['activeContentStart|datetime'] = '2020-05-01T17:00:00'
+    first = await import_subscriptions()
+    assert sorted(calls) == ['april-2020', 'march-2020', 'may-2020']
+    assert list(plugin_with_months._closed_choice_months) == ['april_2020_choice']  # march has choices left
+
+    plugin_with_months._cache_store.flush()
+    plugin_with_months.handshake_complete()  # reload from persistent cache
+    calls.clear()
+    assert await import_subscriptions() == first
+    assert sorted(calls) == ['march-2020', 'may-2020']
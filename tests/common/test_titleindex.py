@@ -0,0 +1,56 @@
+import difflib
+import random
+
+import pytest
+
+from local.titleindex import TitleIndex
+
+
+@pytest.fixture
+def titles(get_data):
+    result = set()
+    for order in get_data('orders.json'):
+        result.update(sub['human_name'] for sub in order['subproducts'])
+    for i in range(1, 5):
+        result.update(game['human-name'] for game in get_data(f'troves_{i}.json'))
+    return result
+
+
+@pytest.fixture
+def dirnames(titles):
+    rnd = random.Random(0)
+    result = ['', 'a', 'Steam', 'Epic Games', 'GOG Galaxy 2']
+    for title in rnd.sample(sorted(titles), 150):
+        result.append(title)
+        result.append(title.replace(':', '').replace(' - ', ' '))
+        result.append(''.join(rnd.sample(title, len(title))))
+    return result
+
+
+@pytest.mark.parametrize('cutoff', [1, 0.8, 0.6])
+def test_same_as_difflib(titles, dirnames, cutoff):
+    index = TitleIndex(titles)
+    for dirname in dirnames:
+        expected = difflib.get_close_matches(dirname, titles, cutoff=cutoff)
+        assert index.get_close_matches(dirname, titles, cutoff) == expected, dirname
+
+
+def test_not_indexed_candidates():
+    index = TitleIndex(['Shank 2'])
+    candidates = {'Shank 2', 'Trine 2: Complete Story'}
+    assert index.get_close_matches('Trine 2 Complete Story', candidates, 0.8) == ['Trine 2: Complete Story']
+    assert index.get_close_matches('Shank', candidates, 0.8) == ['Shank 2']
+
+
+def test_candidates_subset():
+    index = TitleIndex(['Shank', 'Shank 2'])
+    assert index.get_close_matches('Shank 2', {'Shank'}, 0.8) == ['Shank']
+
+
+def test_update():
+    index = TitleIndex(['Dummy', 'Shank 2'])
+    index.update(['Shank 2', 'Trine 2'])
+    assert 'Dummy' not in index
+    assert 'Trine 2' in index
+    assert index.get_close_matches('Trine', {'Trine 2'}, 0.8) == ['Trine 2']
+    assert index.get_close_matches('Dumy', {'Shank 2', 'Trine 2'}, 0.8) == []
@@ -0,0 +1,169 @@
+import json
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+
+from tracing import Tracer, Histogram, FileExporter
+
+
+class ListExporter:
+    def __init__(self):
+        self.records = []
+
+    def export(self, record):
+        self.records.append(record)
+
+    def close(self):
+        pass
+
+    @property
+    def spans(self):
+        return [r['span'] for r in self.records if 'span' in r]
+
+
+@pytest.fixture
+def exporter():
+    return ListExporter()
+
+
+@pytest.fixture
+def tracer(exporter):
+    return Tracer(exporter)
+
+
+def test_disabled_span_is_noop():
+    tracer = Tracer()
+    assert not tracer.enabled
+    with tracer.span('a', x=1) as span:
+        span.set(y=2)
+    assert tracer.span('b') is tracer.span('c')
+    assert tracer.histograms == {}
+
+
+@pytest.mark.asyncio
+async def test_disabled_traced():
+    tracer = Tracer()
+
+    @tracer.traced()
+    async def fn(x):
+        return x * 2
+
+    @tracer.traced()
+    async def gen():
+        yield 1
+        yield 2
+
+    assert await fn(2) == 4
+    assert [i async for i in gen()] == [1, 2]
+    assert tracer.histograms == {}
+
+
+def test_nested_spans_exported_as_tree(tracer, exporter):
+    with tracer.span('rpc'):
+        with tracer.span('api', path='a') as span:
+            span.set(status=200)
+        with tracer.span('build'):
+            pass
+    with tracer.span('other'):
+        pass
+
+    assert [s['name'] for s in exporter.spans] == ['rpc', 'other']
+    root = exporter.spans[0]
+    assert [c['name'] for c in root['children']] == ['api', 'build']
+    assert root['children'][0]['attrs'] == {'path': 'a', 'status': 200}
+    assert root['children'][1]['offset_ms'] >= root['children'][0]['offset_ms']
+    assert {name: h.count for name, h in tracer.histograms.items()} == {'rpc': 1, 'api': 1, 'build': 1, 'other': 1}
+
+
+def test_span_error(tracer, exporter):
+    with pytest.raises(KeyError):
+        with tracer.span('rpc'):
+            raise KeyError()
+    assert exporter.spans[0]['attrs'] == {'error': 'KeyError'}
+
+
+@pytest.mark.asyncio
+async def test_traced_concurrent_tasks(tracer, exporter):
+    @tracer.traced()
+    async def request(i):
+        with tracer.span('api', i=i):
+            await asyncio.sleep(0)
+
+    @tracer.traced()
+    async def rpc():
+        await asyncio.gather(request(1), request(2))
+
+    await asyncio.gather(rpc(), rpc())
+
+    assert [s['name'] for s in exporter.spans] == ['rpc', 'rpc']
+    for root in exporter.spans:
+        assert [c['name'] for c in root['children']] == ['request', 'request']
+        assert sorted(c['children'][0]['attrs']['i'] for c in root['children']) == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_traced_async_generator(tracer, exporter):
+    @tracer.traced()
+    async def pages():
+        for i in range(2):
+            with tracer.span('api', page=i):
+                await asyncio.sleep(0)
+            yield i
+
+    with tracer.span('consumer'):
+        async for _ in pages():
+            with tracer.span('process'):
+                pass
+
+    consumer = exporter.spans[0]
+    assert [c['name'] for c in consumer['children']] == ['process', 'process', 'pages']
+    assert [c['attrs']['page'] for c in consumer['children'][2]['children']] == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_traced_async_generator_error(tracer, exporter):
+    @tracer.traced()
+    async def pages():
+        yield 1
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        async for _ in pages():
+            pass
+    assert exporter.spans[0]['attrs'] == {'error': 'ValueError'}
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for ms in [1] * 90 + [40] * 9 + [3000]:
+        histogram.record(ms / 1000)
+    assert histogram.count == 100
+    assert histogram.percentile(50) == 1
+    assert histogram.percentile(95) == 50
+    assert histogram.percentile(100) == 3000
+    assert histogram.to_dict()['buckets_ms']['5000'] == 1
+
+
+def test_export_histograms_interval(exporter):
+    clock = Mock(return_value=0)
+    tracer = Tracer(exporter, clock=clock)
+    with tracer.span('rpc'):
+        pass
+    tracer.export_histograms(interval=60)
+    assert exporter.records == [{'span': exporter.spans[0]}]
+
+    clock.return_value = 61
+    tracer.export_histograms(interval=60)
+    assert exporter.records[-1]['histograms']['rpc']['count'] == 1
+
+
+def test_file_exporter_rotation(tmp_path):
+    path = tmp_path / 'traces' / 'traces.jsonl'
+    exporter = FileExporter(path, max_bytes=200, backup_count=2)
+    for i in range(20):
+        exporter.export({'span': {'name': 'rpc', 'i': i}})
+    exporter.close()
+
+    assert [json.loads(line)['span']['i'] for line in path.read_text().splitlines()][-1] == 19
+    assert sorted(p.name for p in path.parent.iterdir()) == ['traces.jsonl', 'traces.jsonl.1', 'traces.jsonl.2']
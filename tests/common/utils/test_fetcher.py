@@ -0,0 +1,180 @@
+import asyncio
+import time
+import pytest
+
+from utils.fetcher import FetchScheduler, TokenBucket, FetchStats, prefetch_pages
+
+
+@pytest.fixture
+def create_fetch():
+    def fn(fails_per_key=None, delay=0):
+        """Returns fetch function failing `fails_per_key[key]` times before success"""
+        fails = dict(fails_per_key or {})
+        calls = []
+        async def fetch(key):
+            calls.append(key)
+            await asyncio.sleep(delay)
+            if fails.get(key, 0) > 0:
+                fails[key] -= 1
+                raise ConnectionError(key)
+            return key.upper()
+        fetch.calls = calls
+        return fetch
+    return fn
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_ok(create_fetch):
+    fetch = create_fetch()
+    scheduler = FetchScheduler(concurrency=3, rate=1000)
+    results, errors = await scheduler.run(fetch, ['a', 'b', 'c', 'd'])
+    assert results == {'a': 'A', 'b': 'B', 'c': 'C', 'd': 'D'}
+    assert errors == {}
+    assert scheduler.last_stats.succeeded == 4
+    assert len(scheduler.last_stats.latencies) == 4
+
+
+@pytest.mark.asyncio
+async def test_fetch_no_keys(create_fetch):
+    scheduler = FetchScheduler()
+    assert ({}, {}) == await scheduler.run(create_fetch(), [])
+    assert scheduler.last_stats.requested == 0
+
+
+@pytest.mark.asyncio
+async def test_fetch_concurrency_bound():
+    running = 0
+    max_running = 0
+    async def fetch(key):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return key
+
+    scheduler = FetchScheduler(concurrency=2, rate=1000)
+    results, _ = await scheduler.run(fetch, list(range(10)))
+    assert len(results) == 10
+    assert max_running == 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_requeue_failed(create_fetch):
+    fetch = create_fetch({'b': 2})
+    scheduler = FetchScheduler(rate=1000, retries=2, backoff=0.01)
+    results, errors = await scheduler.run(fetch, ['a', 'b'])
+    assert results == {'a': 'A', 'b': 'B'}
+    assert errors == {}
+    assert fetch.calls.count('b') == 3
+    assert scheduler.last_stats.retries == 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_retries_exhausted(create_fetch):
+    fetch = create_fetch({'b': 5})
+    scheduler = FetchScheduler(rate=1000, retries=1, backoff=0.01)
+    results, errors = await scheduler.run(fetch, ['a', 'b'])
+    assert results == {'a': 'A'}
+    assert list(errors) == ['b']
+    assert isinstance(errors['b'], ConnectionError)
+    assert fetch.calls.count('b') == 2
+    assert scheduler.last_stats.failed == 1
+
+
+@pytest.mark.asyncio
+async def test_fetch_no_retry_for_not_retriable(create_fetch):
+    fetch = create_fetch({'a': 1})
+    scheduler = FetchScheduler(rate=1000, retries=3, backoff=0.01, should_retry=lambda e: False)
+    _, errors = await scheduler.run(fetch, ['a'])
+    assert list(errors) == ['a']
+    assert fetch.calls == ['a']
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    start = time.monotonic()
+    for _ in range(6):
+        await bucket.acquire()
+    assert time.monotonic() - start >= 0.09  # 5 tokens refilled with 50/s speed
+
+
+def test_stats_summary():
+    stats = FetchStats(requested=4, succeeded=3, failed=1, elapsed=2, latencies=[0.1, 0.2, 0.3, 0.4])
+    assert stats.throughput == 1.5
+    assert stats.mean_latency == pytest.approx(0.25)
+    assert stats.max_latency == 0.4
+    assert stats.percentile_latency(50) in (0.2, 0.3)
+    assert '3/4 ok' in str(stats)
+
+
+# ---------- prefetch_pages -------------
+
+@pytest.fixture
+def create_pager_fetch():
+    def fn(pages, delay=0.01, fail_at=None):
+        """Returns fetch function of `pages` items and [] after them, tracking requests in flight"""
+        fetch_state = {'started': [], 'cancelled': [], 'in_flight': 0, 'max_in_flight': 0}
+        async def fetch(index):
+            fetch_state['started'].append(index)
+            fetch_state['in_flight'] += 1
+            fetch_state['max_in_flight'] = max(fetch_state['max_in_flight'], fetch_state['in_flight'])
+            try:
+                await asyncio.sleep(delay * (1 + index % 3))  # pages complete out of order
+            except asyncio.CancelledError:
+                fetch_state['cancelled'].append(index)
+                raise
+            finally:
+                fetch_state['in_flight'] -= 1
+            if index == fail_at:
+                raise ConnectionError(index)
+            return [index] if index < pages else []
+        fetch.state = fetch_state
+        return fetch
+    return fn
+
+
+@pytest.mark.asyncio
+async def test_prefetch_pages_in_order(create_pager_fetch):
+    fetch = create_pager_fetch(pages=10)
+    result = [page async for page in prefetch_pages(fetch, lambda p: p == [], window=4)]
+    assert result == [[i] for i in range(10)]
+    assert fetch.state['max_in_flight'] == 4
+    assert fetch.state['in_flight'] == 0
+    assert fetch.state['cancelled']
+    assert min(fetch.state['cancelled']) > 10  # only speculative requests after the last page
+
+
+@pytest.mark.asyncio
+async def test_prefetch_pages_faster_than_sequential(create_pager_fetch):
+    fetch = create_pager_fetch(pages=12, delay=0.01)
+    start = time.monotonic()
+    [page async for page in prefetch_pages(fetch, lambda p: p == [], window=1)]
+    sequential = time.monotonic() - start
+
+    fetch = create_pager_fetch(pages=12, delay=0.01)
+    start = time.monotonic()
+    [page async for page in prefetch_pages(fetch, lambda p: p == [], window=6)]
+    assert time.monotonic() - start < sequential / 2
+
+
+@pytest.mark.asyncio
+async def test_prefetch_pages_error_cancels_pending(create_pager_fetch):
+    fetch = create_pager_fetch(pages=10, fail_at=2)
+    result = []
+    with pytest.raises(ConnectionError):
+        async for page in prefetch_pages(fetch, lambda p: p == [], start=1, window=3):
+            result.append(page)
+    assert result == [[1]]
+    assert fetch.state['in_flight'] == 0
+
+
+@pytest.mark.asyncio
+async def test_prefetch_pages_consumer_stops(create_pager_fetch):
+    fetch = create_pager_fetch(pages=10)
+    pages = prefetch_pages(fetch, lambda p: p == [], window=3)
+    async for page in pages:
+        break
+    await pages.aclose()
+    assert fetch.state['in_flight'] == 0
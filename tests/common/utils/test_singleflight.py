@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight, single_flight
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def fetch(calls):
+    async def fn(value, delay=0.01):
+        calls.append(value)
+        await asyncio.sleep(delay)
+        if isinstance(value, Exception):
+            raise value
+        return value
+    return fn
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_coalesced(fetch, calls):
+    flight = SingleFlight()
+    results = await asyncio.gather(*[flight.do('k', lambda: fetch(['shared'])) for _ in range(5)])
+    assert calls == [['shared']]
+    assert all(r is results[0] for r in results)
+    assert (flight.stats.calls, flight.stats.executed, flight.stats.coalesced) == (5, 1, 4)
+
+
+@pytest.mark.asyncio
+async def test_different_keys_not_coalesced(fetch, calls):
+    flight = SingleFlight()
+    assert await asyncio.gather(flight.do('a', lambda: fetch('a')), flight.do('b', lambda: fetch('b'))) == ['a', 'b']
+    assert sorted(calls) == ['a', 'b']
+
+
+@pytest.mark.asyncio
+async def test_no_memo_by_default(fetch, calls):
+    flight = SingleFlight()
+    await flight.do('k', lambda: fetch('v'))
+    await flight.do('k', lambda: fetch('v'))
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_memo_expires(fetch, calls):
+    clock = Clock()
+    flight = SingleFlight(ttl=10, clock=clock)
+    await flight.do('k', lambda: fetch('v'))
+    clock.now = 9.9
+    assert await flight.do('k', lambda: fetch('v')) == 'v'
+    assert len(calls) == 1
+    assert flight.stats.memo_hits == 1
+    clock.now = 10.1
+    await flight.do('k', lambda: fetch('v'))
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_memo_dropped_on_store(fetch):
+    clock = Clock()
+    flight = SingleFlight(ttl=10, clock=clock)
+    await flight.do('a', lambda: fetch('a'))
+    clock.now = 5
+    await flight.do('b', lambda: fetch('b'))
+    clock.now = 12
+    await flight.do('c', lambda: fetch('c'))
+    assert list(flight._memo) == ['b', 'c']
+
+
+@pytest.mark.asyncio
+async def test_forget(fetch, calls):
+    flight = SingleFlight(ttl=10)
+    await flight.do('k', lambda: fetch('v'))
+    flight.forget()
+    await flight.do('k', lambda: fetch('v'))
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_error_shared_but_not_memoized(fetch, calls):
+    flight = SingleFlight(ttl=10)
+    error = ValueError('x')
+    results = await asyncio.gather(*[flight.do('k', lambda: fetch(error)) for _ in range(3)], return_exceptions=True)
+    assert results == [error] * 3
+    assert await flight.do('k', lambda: fetch('ok')) == 'ok'
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_others(fetch, calls):
+    flight = SingleFlight()
+    first = asyncio.ensure_future(flight.do('k', lambda: fetch('v', delay=0.05)))
+    second = asyncio.ensure_future(flight.do('k', lambda: fetch('v', delay=0.05)))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    assert await second == 'v'
+    assert first.cancelled()
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_shared_call_cancelled_with_last_caller(calls):
+    started, finished = asyncio.Event(), []
+
+    async def fetch():
+        calls.append('v')
+        started.set()
+        await asyncio.sleep(0.05)
+        finished.append('v')
+
+    flight = SingleFlight()
+    callers = [asyncio.ensure_future(flight.do('k', fetch)) for _ in range(2)]
+    await started.wait()
+    for caller in callers:
+        caller.cancel()
+    await asyncio.wait(callers)
+    await asyncio.sleep(0.1)
+    assert finished == []
+    assert flight._in_flight == {} and flight._waiters == {}
+
+
+@pytest.mark.asyncio
+async def test_decorator_keys_by_arguments(fetch, calls):
+    class Api:
+        def __init__(self):
+            self._flight = SingleFlight()
+
+        @single_flight('_flight')
+        async def get(self, value, delay=0.01):
+            return await fetch(value, delay)
+
+    api = Api()
+    results = await asyncio.gather(api.get('a'), api.get('a'), api.get('b'), api.get('a', delay=0.02))
+    assert results == ['a', 'a', 'b', 'a']
+    assert sorted(calls) == ['a', 'a', 'b']
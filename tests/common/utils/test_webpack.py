@@ -0,0 +1,97 @@
+import json
+from unittest.mock import Mock
+
+import pytest
+from galaxy.api.errors import UnknownBackendResponse
+
+from conftest import AsyncMock
+
+from utils.webpack import WebpackJsonExtractor
+from webservice import AuthorizedHumbleAPI
+
+
+WEBPACK_ID = 'webpack-monthly-trove-data'
+DATA = {'newlyAdded': [{'human-name': 'Zoé </ 2', 'machine_name': 'zoe'}], 'standardProducts': []}
+
+
+@pytest.fixture
+def page():
+    script = f'<script id="{WEBPACK_ID}" type="application/json">\n  {json.dumps(DATA)}\n</script>'
+    other = '<script id="webpack-other" type="application/json">{"a": 1}</script>'
+    return ('<html>' + 'x' * 5000 + other + script + '<div>after</div>' * 100 + '</html>').encode()
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('size', [1, 7, 64, 100000])
+def test_extract_chunked(page, size):
+    extractor = WebpackJsonExtractor(WEBPACK_ID)
+    for chunk in chunked(page, size):
+        if extractor.feed(chunk):
+            break
+    assert extractor.done
+    assert extractor.result() == DATA
+    if size < len(page):
+        assert extractor.bytes_fed < len(page)
+
+
+def test_not_found(page):
+    extractor = WebpackJsonExtractor('webpack-not-existing')
+    for chunk in chunked(page, 64):
+        assert not extractor.feed(chunk)
+    with pytest.raises(ValueError):
+        extractor.result()
+
+
+def test_not_closed_script():
+    extractor = WebpackJsonExtractor(WEBPACK_ID)
+    extractor.feed(f'<script id="{WEBPACK_ID}" type="application/json"> {{"a": [1, 2]}} trailing'.encode())
+    assert not extractor.done
+    assert extractor.result() == {'a': [1, 2]}
+
+
+class _Content:
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self.read = 0
+
+    async def iter_chunked(self, _):
+        for chunk in self._chunks:
+            self.read += len(chunk)
+            yield chunk
+
+
+@pytest.mark.asyncio
+async def test_get_webpack_data(page, mocker):
+    content = _Content(chunked(page, 1000))
+    response = Mock(content=content)
+    api = AuthorizedHumbleAPI()
+    mocker.patch.object(api, '_request', AsyncMock(return_value=response))
+    assert await api._get_webpack_data('subscription/trove', WEBPACK_ID) == DATA
+    assert content.read < len(page)  # not read after the script
+    response.release.assert_called_once()
+    await api.close_session()
+
+
+@pytest.mark.asyncio
+async def test_get_webpack_data_invalid_json(mocker):
+    page = f'<script id="{WEBPACK_ID}" type="application/json">{{"a": </script>'.encode()
+    response = Mock(content=_Content([page]))
+    api = AuthorizedHumbleAPI()
+    mocker.patch.object(api, '_request', AsyncMock(return_value=response))
+    with pytest.raises(UnknownBackendResponse):
+        await api._get_webpack_data('subscription/trove', WEBPACK_ID)
+    response.release.assert_called_once()
+    await api.close_session()
+
+
+@pytest.mark.asyncio
+async def test_get_webpack_data_not_found(page, mocker):
+    api = AuthorizedHumbleAPI()
+    mocker.patch.object(api, '_request', AsyncMock(return_value=Mock(content=_Content([page]))))
+    with pytest.raises(UnknownBackendResponse):
+        await api._get_webpack_data('subscription/trove', 'webpack-not-existing')
+    await api.close_session()
+
@@ -8,9 +8,11 @@ from unittest.mock import MagicMock, Mock
 import sys
 sys.path.insert(0, str(pathlib.PurePath(__file__).parent.parent / 'src'))
 
+from aiohttp import web
 from galaxy.api.errors import UnknownError
 from plugin import HumbleBundlePlugin
 from settings import Settings
+from webservice import AuthorizedHumbleAPI
 
 
 class AsyncMock(MagicMock):
@@ -24,6 +26,13 @@ async def aiter(seq):
         yield item
 
 
+@pytest.fixture(autouse=True)
+def http_cache_dir(tmp_path, monkeypatch):
+    """AuthorizedHumbleAPI created with default HttpCache never writes to the user cache directory"""
+    monkeypatch.setattr(AuthorizedHumbleAPI, 'HTTP_CACHE_DIR', tmp_path / 'http-cache')
+    return tmp_path / 'http-cache'
+
+
 @pytest.fixture
 def delayed_fn():
     async def fn(delay, awaitable, *args, **kwargs):
@@ -44,6 +53,7 @@ def settings(mocker):
 def api_mock_raw():
     mock = MagicMock(spec=())
     mock.authenticate = AsyncMock()
+    mock.start_warm_up = Mock()
     mock.get_order_details = AsyncMock()
     mock.get_gamekeys = AsyncMock()
     mock.get_montly_trove_data = AsyncMock()
@@ -85,6 +95,7 @@ def api_mock(api_mock_raw, orders_keys, get_troves):
 async def plugin(api_mock, settings, mocker):
     mocker.patch('plugin.AuthorizedHumbleAPI', return_value=api_mock)
     mocker.patch('settings.Settings', return_value=settings)
+    mocker.patch('guirunner.prepare')  # no GUI worker processes in plugin tests
     plugin = HumbleBundlePlugin(Mock(), Mock(), "handshake_token")
     plugin.push_cache = Mock(spec=())
 
@@ -133,3 +144,25 @@ def get_troves(get_data):
             troves.extend(get_data(f'troves_{i + 1}.json'))
         return troves
     return fn
+
+
+@pytest.fixture
+async def create_server():
+    """Starts local aiohttp server with given routes; returns its base url"""
+    runners = []
+
+    async def fn(routes):
+        app = web.Application()
+        for method, path, handler in routes:
+            app.router.add_route(method, path, handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        runners.append(runner)
+        port = site._server.sockets[0].getsockname()[1]
+        return f'http://127.0.0.1:{port}/'
+
+    yield fn
+    for runner in runners:
+        await runner.cleanup()
@@ -0,0 +1,282 @@
+"""Local stand-in of humblebundle.com endpoints used by AuthorizedHumbleAPI.
+
+Serves an `Account` (by default built from tests/data fixtures) over real HTTP with configurable
+latency, random server errors and throttling, and counts requests per endpoint.
+Shared by end-to-end tests and benchmarks:
+
+    async with HumbleStandIn(Account.from_fixtures(), latency=0.05) as standin:
+        AuthorizedHumbleAPI._AUTHORITY = standin.url
+"""
+import json
+import time
+import base64
+import hashlib
+import random
+import asyncio
+import pathlib
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+
+DATA_DIR = pathlib.Path(__file__).parent / 'data'
+
+# Humble Choice started in December 2019; months are listed from the active one
+CHOICE_MONTHS = ['may-2020', 'april-2020', 'march-2020', 'february-2020', 'january-2020', 'december-2019']
+
+
+def _load(name: str):
+    with open(DATA_DIR / name) as f:
+        return json.load(f)
+
+
+def _month_machine_name(path: str) -> str:
+    month, year = path.split('-')
+    return f'{month}_{year}_choice'
+
+
+@dataclass
+class Account:
+    """Backend state of a single user: orders by gamekey, trove chunks and Choice months content"""
+    orders: Dict[str, dict]
+    trove_chunks: List[List[dict]]
+    choice_months: Dict[str, dict] = field(default_factory=dict)  # product url path: contentChoiceOptions
+    email: str = 'user@example.com'
+
+    @classmethod
+    def from_fixtures(cls) -> 'Account':
+        orders = {}
+        for order in _load('orders.json') + _load('orders_keys.json'):
+            order.setdefault('tpkd_dict', {'all_tpks': []})  # stripped from the fixture, always sent by the server
+            orders[order['gamekey']] = order
+        trove_chunks = [_load(f'troves_{i}.json') for i in range(1, 5)]
+        troves = [trove for chunk in trove_chunks for trove in chunk]
+        return cls(orders, trove_chunks, cls.make_choice_months(troves))
+
+    @staticmethod
+    def make_choice_months(troves: List[dict], games_per_month: int = 10, unlocked: int = 3) -> Dict[str, dict]:
+        """Choice months filled with trove games; the active one and `unlocked` past months are owned"""
+        months = {}
+        for i, path in enumerate(CHOICE_MONTHS):
+            games = troves[i * games_per_month:(i + 1) * games_per_month]
+            choices = {
+                g['machine_name']: {
+                    'title': g['human-name'],
+                    'display_item_machine_name': g['machine_name'],
+                    'delivery_methods': [],
+                    'platforms': [],
+                }
+                for g in games
+            }
+            made = list(choices)[:len(choices) // 2] if 0 < i <= unlocked else None
+            months[path] = {
+                'MAX_CHOICES': len(made) if made else len(choices),
+                'gamekey': f'choice{i}' if made else None,
+                'isActiveContent': i == 0,
+                'isChoiceTier': True,
+                'productUrlPath': path,
+                'productMachineName': _month_machine_name(path),
+                'title': f'{path} Humble Choice',
+                'contentChoiceData': {'initial': {'content_choices': choices}, 'extras': []},
+                'contentChoicesMade': {'initial': {'choices_made': made}} if made else None,
+            }
+        return months
+
+
+class HumbleStandIn:
+    """
+    :param latency:     seconds added to every response
+    :param error_rate:  fraction of requests answered with 503
+    :param rate_limit:  requests per second above which 429 with `Retry-After` is returned
+    :param etags:       send `ETag` and answer matching `If-None-Match` with 304
+    """
+    def __init__(
+        self,
+        account: Account,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: Optional[float] = None,
+        etags: bool = False,
+        seed: int = 0
+    ):
+        self.account = account
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.etags = etags
+        self._random = random.Random(seed)
+        self._window_start = 0.0
+        self._window_count = 0
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ''
+        self.requests: Counter = Counter()  # by endpoint
+        self.errors: Counter = Counter()  # by status
+        self.bytes_sent = 0
+
+    async def __aenter__(self) -> 'HumbleStandIn':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_):
+        await self.stop()
+
+    async def start(self):
+        app = web.Application(middlewares=[self._faults])
+        routes = [
+            ('GET', 'api/v1/user/order', self._order_list),
+            ('GET', 'api/v1/order/{gamekey}', self._order),
+            ('GET', 'api/v1/trove/chunk', self._trove_chunk),
+            ('GET', 'api/v1/subscriptions/humble_monthly/subscription_products_with_gamekeys/{cursor:.*}',
+             self._subscription_products),
+            ('GET', 'subscription/home', self._subscription_home),
+            ('GET', 'subscription/trove', self._trove_page),
+            ('GET', 'subscription/{month}', self._month_page),
+            ('GET', 'subscription', self._marketing_page),
+            ('GET', '', self._home),
+        ]
+        for method, path, handler in routes:
+            app.router.add_route(method, '/' + path, handler)
+            app.router.add_route(method, '//' + path, handler)  # AuthorizedHumbleAPI._ORDER_URL starts with slash
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f'http://127.0.0.1:{port}/'
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    def _throttled(self) -> bool:
+        if self.rate_limit is None:
+            return False
+        now = time.monotonic()
+        if now - self._window_start >= 1:
+            self._window_start, self._window_count = now, 0
+        self._window_count += 1
+        return self._window_count > self.rate_limit
+
+    @web.middleware
+    async def _faults(self, request: web.Request, handler):
+        resource = request.match_info.route.resource
+        endpoint = resource.canonical.lstrip('/') if resource is not None else request.path
+        self.requests[endpoint] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self._throttled():
+            self.errors[429] += 1
+            return web.Response(status=429, headers={'Retry-After': '1'})
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors[503] += 1
+            return web.Response(status=503)
+        response = await handler(request)
+        if self.etags and response.status == 200:
+            etag = '"' + hashlib.sha1(response.body).hexdigest()[:16] + '"'
+            if request.headers.get('If-None-Match') == etag:
+                return web.Response(status=304, headers={'ETag': etag})
+            response.headers['ETag'] = etag
+        self.bytes_sent += response.content_length or 0
+        return response
+
+    @staticmethod
+    def _webpack_page(webpack_id: str, data) -> web.Response:
+        body = (
+            '<html><head><title>Humble Bundle</title></head><body>' + '<div>filler</div>' * 500
+            + f'<script id="{webpack_id}" type="application/json">{json.dumps(data)}</script>'
+            + '<div>footer</div>' * 200 + '</body></html>'
+        )
+        return web.Response(text=body, content_type='text/html')
+
+    async def _home(self, request):
+        return web.Response(text='Humble Bundle')
+
+    async def _order_list(self, request):
+        return web.json_response([{'gamekey': gamekey} for gamekey in self.account.orders])
+
+    async def _order(self, request):
+        order = self.account.orders.get(request.match_info['gamekey'])
+        if order is None:
+            return web.Response(status=404)
+        return web.json_response(order)
+
+    async def _trove_chunk(self, request):
+        index = int(request.query['index'])
+        chunks = self.account.trove_chunks
+        return web.json_response(chunks[index] if index < len(chunks) else [])
+
+    async def _subscription_products(self, request):
+        owned = [m for m in self.account.choice_months.values() if m['gamekey']]
+        page = 2
+        cursor = int(request.match_info['cursor'] or 0)
+        products = owned[cursor * page:(cursor + 1) * page]
+        if (cursor + 1) * page >= len(owned):
+            products = products + [{'machine_name': 'monthly'}]  # not a choice product ends the listing
+        return web.json_response({'products': products, 'cursor': str(cursor + 1)})
+
+    async def _subscription_home(self, request):
+        return web.Response(text='home', content_type='text/html')
+
+    async def _marketing_page(self, request):
+        months = [
+            {
+                'machine_name': _month_machine_name(path),
+                'short_human_name': path,
+                'monthly_product_page_url': f'/subscription/{path}',
+                'item_count': len(month['contentChoiceData']['initial']['content_choices']),
+            }
+            for path, month in self.account.choice_months.items()
+        ]
+        data = {
+            'monthDetails': {'active_month': months[0], 'previous_months': months[1:]},
+            'userOptions': {'email': self.account.email},
+        }
+        return self._webpack_page('webpack-choice-marketing-data', data)
+
+    async def _month_page(self, request):
+        month = self.account.choice_months.get(request.match_info['month'])
+        if month is None:
+            return web.Response(status=404)
+        data = {
+            'userOptions': {'email': self.account.email},
+            'userSubscriptionPlan': {'human_name': 'Classic'} if month['isActiveContent'] else None,
+            'payEarlyOptions': {'activeContentStart|datetime': '2020-05-01T17:00:00'},
+            'contentChoiceOptions': month,
+        }
+        return self._webpack_page('webpack-monthly-product-data', data)
+
+    async def _trove_page(self, request):
+        chunks = self.account.trove_chunks
+        data = {'newlyAdded': chunks[0][:5] if chunks else [], 'standardProducts': chunks[0] if chunks else []}
+        return self._webpack_page('webpack-monthly-trove-data', data)
+
+
+def auth_cookie(user_id: int = 1) -> dict:
+    session = base64.b64encode(json.dumps({'user_id': user_id}).encode()).decode().rstrip('=')
+    return {'name': '_simpleauth_sess', 'value': f'{session}|1589793483|0123456789abcdef'}
+
+
+async def galaxy_import(plugin) -> Dict[str, Any]:
+    """Drives `plugin` the way Galaxy client does after start: authentication, owned games
+    and all subscriptions with their games. Returns what Galaxy would receive.
+    """
+    await plugin.authenticate(auth_cookie())
+    owned = await plugin.get_owned_games()
+    subscriptions = await plugin.get_subscriptions()
+    names = [sub.subscription_name for sub in subscriptions if sub.owned]
+    context = await plugin.prepare_subscription_games_context(names)
+    subscription_games = {}
+    for name in names:
+        games = []
+        async for page in plugin.get_subscription_games(name, context):
+            games.extend(page or [])
+        subscription_games[name] = games
+    plugin.subscription_games_import_complete()
+    return {'owned': owned, 'subscriptions': subscriptions, 'subscription_games': subscription_games}
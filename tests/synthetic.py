@@ -0,0 +1,225 @@
+"""Seeded generator of synthetic Humble accounts resembling real `api/v1/order/{gamekey}` responses.
+
+Scales the shape of tests/data fixtures to any number of orders: game bundles and storefront purchases
+with multi-platform downloads and soundtracks, third party keys (some revealed, some listing several games
+in one key), non-game bundles and Humble Choice orders. Game titles are drawn from a shared catalogue
+with long tail popularity, so the same game is owned many times like in real accounts with bundles.
+
+    orders = generate_orders(10_000, seed=1)
+    account = generate_account(10_000)  # standin.Account with fixture troves
+"""
+import random
+import string
+from typing import Dict, List, Tuple
+
+import standin
+from consts import NON_GAME_BUNDLE_TYPES
+from model.types import KEY_TYPE
+
+
+# relative frequencies as seen in real accounts
+_ORDER_KINDS = [('bundle', 55), ('storefront', 25), ('non_game_bundle', 12), ('widget', 4), ('choice', 4)]
+_GAME_BUNDLE_SUFFIXES = ['bundle', 'weekly', 'daily', 'freegame']
+_KEY_TYPES = [(KEY_TYPE.STEAM, 80), (KEY_TYPE.ORIGIN, 5), (KEY_TYPE.UPLAY, 7), (KEY_TYPE.EPIC, 3),
+              (KEY_TYPE.BATTLENET, 2), (KEY_TYPE.GOG, 3)]
+_PLATFORM_SETS = [(('windows',), 40), (('windows', 'mac'), 20), (('windows', 'mac', 'linux'), 30),
+                  (('linux',), 3), (('android',), 7)]
+_WORDS = (
+    'ace star dark light lost dead iron sky sea moon sun night shadow blood fire ice storm void dream '
+    'legend tales quest hero knight ninja robot zombie pirate space galaxy city tower dungeon castle '
+    'garden forest river island empire kingdom world war rising fall return origins chronicles'
+).split()
+_KEY_TYPE_HUMAN_NAMES = {
+    KEY_TYPE.STEAM: 'Steam', KEY_TYPE.ORIGIN: 'Origin', KEY_TYPE.UPLAY: 'Uplay',
+    KEY_TYPE.EPIC: 'Epic Games', KEY_TYPE.BATTLENET: 'Battle.net', KEY_TYPE.GOG: 'GOG',
+}
+
+
+def _weighted(rnd: random.Random, choices: List[Tuple]):
+    values, weights = zip(*choices)
+    return rnd.choices(values, weights)[0]
+
+
+class _Generator:
+    def __init__(self, orders: int, seed: int):
+        self._rnd = random.Random(seed)
+        self._catalogue = self._make_catalogue(max(50, orders * 3))
+        self._gamekeys = set()
+
+    def _make_catalogue(self, size: int) -> List[Tuple[str, str]]:
+        """(machine_name, human_name) of games, unique by both"""
+        games: Dict[str, str] = {}
+        while len(games) < size:
+            words = self._rnd.sample(_WORDS, self._rnd.randint(1, 3))
+            human_name = ' '.join(w.capitalize() for w in words)
+            if self._rnd.random() < 0.3:
+                human_name += f' {self._rnd.randint(2, 4)}'
+            machine_name = human_name.lower().replace(' ', '')
+            games.setdefault(machine_name, human_name)
+        return list(games.items())
+
+    def _game(self) -> Tuple[str, str]:
+        # long tail: half of picks are few popular games present in many bundles
+        index = int(self._rnd.paretovariate(1.2)) - 1
+        if index >= len(self._catalogue) or self._rnd.random() < 0.5:
+            index = self._rnd.randrange(len(self._catalogue))
+        return self._catalogue[index]
+
+    def _token(self, length: int) -> str:
+        return ''.join(self._rnd.choices(string.ascii_letters + string.digits, k=length))
+
+    def _gamekey(self) -> str:
+        while True:
+            gamekey = self._token(16)
+            if gamekey not in self._gamekeys:
+                self._gamekeys.add(gamekey)
+                return gamekey
+
+    def _download(self, machine_name: str, platform: str, gamekey: str) -> dict:
+        size = self._rnd.randint(10, 20000) * 1024 * 1024
+        file_name = f'{machine_name}_{platform}_{self._rnd.randint(1000000000, 1600000000)}.zip'
+        return {
+            'machine_name': f'{machine_name}_{platform}',
+            'platform': platform,
+            'download_struct': [{
+                'sha1': self._rnd.getrandbits(160).to_bytes(20, 'big').hex(),
+                'name': 'Download',
+                'url': {
+                    'web': f'https://dl.humble.com/{file_name}?gamekey={gamekey}&ttl=1563893020&t={self._token(32)}',
+                    'bittorrent': f'https://dl.humble.com/torrents/{file_name}.torrent?gamekey={gamekey}'
+                                  f'&ttl=1563893020&t={self._token(32)}',
+                },
+                'human_size': f'{size / 1024 / 1024:.1f} MB',
+                'file_size': size,
+                'small': 0,
+                'md5': self._rnd.getrandbits(128).to_bytes(16, 'big').hex(),
+            }],
+            'options_dict': {},
+            'download_identifier': '',
+            'android_app_only': platform == 'android',
+            'download_version_number': None,
+        }
+
+    def _subproduct(self, machine_name: str, human_name: str, platforms, gamekey: str) -> dict:
+        return {
+            'machine_name': machine_name,
+            'url': f'http://www.{machine_name}.com/',
+            'downloads': [self._download(machine_name, platform, gamekey) for platform in platforms],
+            'library_family_name': None,
+            'payee': {'human_name': f'{human_name} Studio', 'machine_name': f'{machine_name}studio'},
+            'human_name': human_name,
+            'custom_download_page_box_html': '',
+            'icon': f'https://hb.imgix.net/{self._token(40).lower()}.png?auto=format',
+        }
+
+    def _tpk(self, machine_name: str, human_name: str, gamekey: str, keyindex: int) -> dict:
+        key_type = _weighted(self._rnd, _KEY_TYPES)
+        if self._rnd.random() < 0.05:  # one key for a few games, e.g. "Game, Game 2, Game: DLC"
+            names = [human_name] + [self._game()[1] for _ in range(self._rnd.randint(1, 3))]
+            human_name = ', '.join(names)
+        tpk = {
+            'machine_name': f'{machine_name}_{key_type.value}',
+            'gamekey': gamekey,
+            'keyindex': keyindex,
+            'key_type': key_type.value,
+            'key_type_human_name': _KEY_TYPE_HUMAN_NAMES[key_type],
+            'human_name': human_name,
+            'visible': True,
+            'sold_out': False,
+            'disallowed_countries': [],
+            'exclusive_countries': [],
+            'instructions_html': f'<a href="https://support.humblebundle.com/">{key_type.value} Instructions</a>',
+            'preinstruction_text': 'Copy this key into the client.',
+            'class': f'{key_type.value}button',
+        }
+        if self._rnd.random() < 0.6:
+            tpk['redeemed_key_val'] = '-'.join(self._token(5).upper() for _ in range(3))
+        return tpk
+
+    def _order(self, kind: str) -> dict:
+        gamekey = self._gamekey()
+        subproducts: List[dict] = []
+        tpks: List[dict] = []
+        extra: dict = {}
+
+        if kind == 'non_game_bundle':
+            category = 'bundle'
+            bundle_type = self._rnd.choice(sorted(NON_GAME_BUNDLE_TYPES))
+            human_name = f'Humble {self._game()[1]} {bundle_type[:-len("bundle")].capitalize()} Bundle'
+            machine_name = human_name.lower().replace(' ', '')[:-len('bundle')] + '_' + bundle_type
+            for _ in range(self._rnd.randint(5, 15)):
+                name, title = self._game()
+                subproducts.append(self._subproduct(name + '_book', title, ['pdf', 'epub'], gamekey))
+        else:
+            if kind == 'bundle':
+                count = self._rnd.randint(3, 12)
+                bundle_name = self._game()[1]
+                human_name = f'Humble {bundle_name} Bundle'
+                suffix = self._rnd.choice(_GAME_BUNDLE_SUFFIXES)
+                machine_name = bundle_name.lower().replace(' ', '') + '_' + suffix
+            elif kind == 'choice':
+                count = self._rnd.randint(8, 12)
+                month = self._rnd.choice(standin.CHOICE_MONTHS)
+                human_name = f'Humble Choice {month}'
+                machine_name = month.replace('-', '_') + '_choice'
+                extra['choices_remaining'] = self._rnd.choice([0, 0, 0, 1, 3])
+            else:
+                count = 1
+                machine_name, human_name = self._game()
+                machine_name += '_' + kind
+            category = 'subscriptioncontent' if kind == 'choice' else kind
+            for i in range(count):
+                name, title = self._game()
+                platforms = _weighted(self._rnd, _PLATFORM_SETS)
+                with_drm_free = self._rnd.random() < 0.7
+                with_key = not with_drm_free or self._rnd.random() < 0.3
+                if with_drm_free:
+                    subproducts.append(self._subproduct(name, title, platforms, gamekey))
+                    if self._rnd.random() < 0.15:
+                        subproducts.append(self._subproduct(name + '_soundtrack', title, ['audio'], gamekey))
+                if with_key:
+                    tpks.append(self._tpk(name, title, gamekey, len(tpks)))
+
+        order = {
+            'amount_spent': round(self._rnd.uniform(1, 30), 2),
+            'product': {
+                'category': category,
+                'machine_name': machine_name,
+                'empty_tpkds': {},
+                'post_purchase_text': '',
+                'human_name': human_name,
+                'partial_gift_enabled': False,
+            },
+            'gamekey': gamekey,
+            'uid': self._token(13).upper(),
+            'created': f'20{self._rnd.randint(11, 20)}-{self._rnd.randint(1, 12):02}-{self._rnd.randint(1, 28):02}'
+                       'T17:38:38.328890',
+            'missed_credit': None,
+            'subproducts': subproducts,
+            'tpkd_dict': {'all_tpks': tpks},
+            'currency': 'USD',
+            'is_giftee': False,
+            'claimed': True,
+            'total': 0.0,
+            'path_ids': [self._token(16)],
+        }
+        order.update(extra)
+        return order
+
+    def orders(self, count: int) -> List[dict]:
+        return [self._order(_weighted(self._rnd, _ORDER_KINDS)) for _ in range(count)]
+
+
+def generate_orders(count: int, seed: int = 0) -> List[dict]:
+    """`count` order details; the same for the same seed"""
+    return _Generator(count, seed).orders(count)
+
+
+def generate_account(orders: int, seed: int = 0) -> standin.Account:
+    """Stand-in account with synthetic orders; troves and Choice months come from fixtures"""
+    fixtures = standin.Account.from_fixtures()
+    return standin.Account(
+        {order['gamekey']: order for order in generate_orders(orders, seed)},
+        fixtures.trove_chunks,
+        fixtures.choice_months,
+    )